@@ -1,4 +1,9 @@
-from math import cos, sin
+import argparse
+import heapq
+from math import ceil, cos, floor, inf, sin, sqrt
+from typing import Any, Callable, List, Optional, Tuple
+
+import numpy as np
 
 
 class Ball:
@@ -21,6 +26,38 @@ class Ball:
     def reflect_vertical(self) -> None:
         self.delta_y = -self.delta_y
 
+    def reflect(self, normal_x: float, normal_y: float) -> None:
+        """Mirrors the velocity about a wall with the given unit normal."""
+        projection = 2 * (self.delta_x * normal_x + self.delta_y * normal_y)
+        self.delta_x -= projection * normal_x
+        self.delta_y -= projection * normal_y
+
+    def collides(self, other: "Ball") -> bool:
+        """Elastically bounces two overlapping, approaching balls off each other.
+
+            Masses are taken proportional to the ball area, i.e. ``radius ** 2``.
+
+            Args:
+                other (Ball): Ball, which should be checked against this one.
+
+            Returns:
+                True, if the balls have collided, and false, if not.
+        """
+        dx = other.x - self.x
+        dy = other.y - self.y
+        dist2 = dx * dx + dy * dy
+        reach = self.radius + other.radius
+        approach = dx * (other.delta_x - self.delta_x) + dy * (other.delta_y - self.delta_y)
+        if dist2 == 0 or dist2 >= reach * reach or approach >= 0:
+            return False
+        mass, other_mass = self.radius ** 2, other.radius ** 2
+        impulse = 2 * approach / (dist2 * (mass + other_mass))
+        self.delta_x += other_mass * impulse * dx
+        self.delta_y += other_mass * impulse * dy
+        other.delta_x -= mass * impulse * dx
+        other.delta_y -= mass * impulse * dy
+        return True
+
     def __str__(self) -> str:
         return f"Ball at ({self.x}, {self.y}) of velocity ({self.delta_x}, {self.delta_y})"
 
@@ -44,14 +81,759 @@ class Container:
         else:
             return False
 
+    def collide_all(self, balls: "BallArray") -> np.ndarray:
+        """Moves every ball of the swarm and reflects it off the walls.
+
+            Equivalent to calling ``ball.move()`` and then ``container.collides(ball)``
+            for each ball, evaluated for the whole swarm at once.
+
+            Args:
+                balls (BallArray): Swarm, which should be stepped.
+
+            Returns:
+                Boolean mask of the balls, which have been reflected.
+        """
+        balls.move()
+        return self.reflect_all(balls)
+
+    def reflect_all(self, balls: "BallArray") -> np.ndarray:
+        """Reflects every ball of the swarm, the next move of which would leave the container.
+
+            Equivalent to calling ``container.collides(ball)`` for each ball.
+
+            Args:
+                balls (BallArray): Swarm, which should be checked.
+
+            Returns:
+                Boolean mask of the balls, which have been reflected.
+        """
+        horizontal = ((balls.x + balls.radius + balls.delta_x > self.x2)
+                      | (balls.x - balls.radius + balls.delta_x < self.x1))
+        vertical = ~horizontal & ((balls.y + balls.radius + balls.delta_y < self.y2)
+                                  | (balls.y - balls.radius + balls.delta_y > self.y1))
+        balls.reflect_horizontal(horizontal)
+        balls.reflect_vertical(vertical)
+        return horizontal | vertical
+
+    def state_at(self, ball: Ball, steps: int) -> Tuple[float, float, float, float]:
+        """Returns the state of the ball after ``steps`` calls of ``ball.move()`` and ``collides(ball)``.
+
+            The ball is not changed. Runs in constant time, whatever the number of steps.
+            It follows ``collides`` as it is: the vertical velocity flips at every step
+            without a horizontal reflection, so the ball only drifts vertically by the
+            steps, which a horizontal reflection has taken the turn of.
+
+            Args:
+                ball (Ball): Ball, which must start inside the container.
+                steps (int): Number of steps.
+
+            Returns:
+                Tuple of x, y, delta_x and delta_y.
+        """
+        x, y, delta_x, delta_y = self.states_at(ball, steps)
+        return float(x), float(y), float(delta_x), float(delta_y)
+
+    def position_at(self, ball: Ball, steps: int) -> Tuple[float, float]:
+        """Returns the position of the ball after ``steps`` steps, see ``state_at``."""
+        return self.state_at(ball, steps)[:2]
+
+    def states_at(self, ball: Ball, steps) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """Batched ``state_at`` for an array of step numbers.
+
+            Args:
+                ball (Ball): Ball, which must start inside the container.
+                steps (array-like of int): Numbers of steps.
+
+            Returns:
+                Arrays of x, y, delta_x and delta_y, shaped as ``steps``.
+        """
+        steps = np.asarray(steps, dtype=np.int64)
+        if np.any(steps < 0):
+            raise ValueError("The number of steps can't be negative")
+        if not self.y1 + ball.radius <= ball.y <= self.y2 - ball.radius:
+            raise ValueError("The ball must start inside the container")
+        if ball.delta_y != 0 and self.y1 + ball.radius == self.y2 - ball.radius:
+            raise ValueError("The ball must be lower than the container")
+        x, delta_x, drift, sign = _fold(ball.x, ball.delta_x, self.x1 + ball.radius, self.x2 - ball.radius,
+                                        steps)
+        return x, ball.y + drift * ball.delta_y, delta_x, sign * ball.delta_y
+
+    def sweep(self, ball: Ball) -> int:
+        """Moves the ball by one tick with continuous wall collisions.
+
+            Unlike ``move`` and ``collides``, the ball is reflected exactly where it touches
+            a wall, as many times as the tick requires, so it can't tunnel through the
+            container, whatever its velocity.
+
+            Args:
+                ball (Ball): Ball, which should be moved.
+
+            Returns:
+                Number of wall hits during the tick.
+        """
+        ball.x, ball.delta_x, horizontal = _reflect(ball.x, ball.delta_x, self.x1 + ball.radius,
+                                                    self.x2 - ball.radius)
+        ball.y, ball.delta_y, vertical = _reflect(ball.y, ball.delta_y, self.y1 + ball.radius,
+                                                  self.y2 - ball.radius)
+        return int(horizontal + vertical)
+
+    def sweep_all(self, balls: "BallArray", grid: Optional["SpatialHash"] = None,
+                  walls: Optional[np.ndarray] = None) -> np.ndarray:
+        """Moves the swarm by one tick with continuous wall and, optionally, ball collisions.
+
+            Balls, which can't meet another ball during the tick, are reflected off the
+            walls in closed form. The others are resolved event by event in the order of
+            their time of impact, so a ball can hit several walls and balls within a tick.
+
+            Args:
+                balls (BallArray): Swarm, which should be moved.
+                grid (SpatialHash): Broad phase for ball-to-ball collisions, None to ignore them.
+                walls (np.ndarray): Counters of the hits on the left, right, top and bottom wall,
+                    which are increased by the hits of the tick, None not to count them.
+
+            Returns:
+                Number of collisions of every ball during the tick.
+        """
+        hits = np.zeros(len(balls), dtype=np.int64)
+        free = np.ones(len(balls), dtype=bool)
+        if grid is not None and len(balls) > 1:
+            free = _sweep_pairs(self, balls, grid, hits, walls)
+        low_x, high_x = self.x1 + balls.radius[free], self.x2 - balls.radius[free]
+        low_y, high_y = self.y1 + balls.radius[free], self.y2 - balls.radius[free]
+        forward_x, forward_y = balls.delta_x[free] > 0, balls.delta_y[free] > 0
+        balls.x[free], balls.delta_x[free], horizontal = _reflect(balls.x[free], balls.delta_x[free], low_x, high_x)
+        balls.y[free], balls.delta_y[free], vertical = _reflect(balls.y[free], balls.delta_y[free], low_y, high_y)
+        hits[free] += horizontal + vertical
+        if walls is not None:
+            walls[0:2] += _sides(horizontal, forward_x)
+            walls[2:4] += _sides(vertical, forward_y)
+        return hits
+
     def __str__(self) -> str:
         return f"Container[({self.x1},{self.y1}),({self.x2}, {self.y2})]"
 
 
-ball = Ball(50, 50, 5, 10, 30)
-box = Container(0, 0, 100, 100)
-print(box)
-for step in range(0, 100):
-    ball.move()
-    box.collides(ball)
-    print(ball)  # check the position of the ball
+class PolygonContainer:
+    """Convex polygon arena.
+
+        Edge normals and offsets are computed once, so that the signed distance of a
+        point from every edge is a single dot product, positive inside the polygon.
+
+        Attributes:
+            vertices (np.ndarray): Corners of the polygon in order, shaped (n, 2).
+            normals (np.ndarray): Inward unit normals of the edges, shaped (n, 2).
+            offsets (np.ndarray): Offsets of the edges, ``normals[k] @ vertices[k]``.
+    """
+
+    # Balls are tested against the edges in blocks of this many, to bound the memory.
+    BLOCK = 65536
+
+    def __init__(self, vertices):
+        """PolygonContainer initializer, ``vertices`` are (x, y) pairs in either orientation."""
+        self.vertices = np.array(vertices, dtype=np.float64).reshape(-1, 2)
+        if len(self.vertices) < 3:
+            raise ValueError("A polygon needs at least three vertices")
+        edges = np.roll(self.vertices, -1, axis=0) - self.vertices
+        lengths = np.hypot(edges[:, 0], edges[:, 1])
+        if np.any(lengths == 0):
+            raise ValueError("The polygon has repeated vertices")
+        normals = np.stack([-edges[:, 1], edges[:, 0]], axis=1) / lengths[:, None]
+        inward = normals @ self.vertices.mean(axis=0) - np.einsum("ij,ij->i", normals, self.vertices)
+        self.normals = np.where(inward[:, None] < 0, -normals, normals)
+        self.offsets = np.einsum("ij,ij->i", self.normals, self.vertices)
+        if np.any(self.vertices @ self.normals.T - self.offsets < -1e-9 * lengths.max()):
+            raise ValueError("The polygon must be convex")
+
+    def collides(self, ball: Ball) -> bool:
+        """Reflects the ball about the edge, its next move would cross the deepest.
+
+            Args:
+                ball (Ball): Ball, which should be checked.
+
+            Returns:
+                True, if the ball has been reflected, and false, if not.
+        """
+        distances = self.normals @ (ball.x + ball.delta_x, ball.y + ball.delta_y) - self.offsets
+        heading = self.normals @ (ball.delta_x, ball.delta_y)
+        depth = np.where((distances < ball.radius) & (heading < 0), distances, np.inf)
+        edge = int(np.argmin(depth))
+        if depth[edge] == np.inf:
+            return False
+        ball.reflect(*self.normals[edge])
+        return True
+
+    def collide_all(self, balls: "BallArray") -> np.ndarray:
+        """Moves every ball of the swarm and reflects it, equivalent to ``move`` and ``collides``."""
+        balls.move()
+        return self.reflect_all(balls)
+
+    def reflect_all(self, balls: "BallArray") -> np.ndarray:
+        """Tests every ball against every edge at once, see ``collides``.
+
+            Returns:
+                Boolean mask of the balls, which have been reflected.
+        """
+        hit = np.zeros(len(balls), dtype=bool)
+        normal_x = np.zeros(len(balls))
+        normal_y = np.zeros(len(balls))
+        for start in range(0, len(balls), self.BLOCK):
+            part = slice(start, start + self.BLOCK)
+            delta_x, delta_y = balls.delta_x[part], balls.delta_y[part]
+            distances = (np.outer(balls.x[part] + delta_x, self.normals[:, 0])
+                         + np.outer(balls.y[part] + delta_y, self.normals[:, 1]) - self.offsets)
+            heading = np.outer(delta_x, self.normals[:, 0]) + np.outer(delta_y, self.normals[:, 1])
+            depth = np.where((distances < balls.radius[part, None]) & (heading < 0), distances, np.inf)
+            edge = np.argmin(depth, axis=1)
+            hit[part] = np.isfinite(depth[np.arange(len(edge)), edge])
+            normal_x[part], normal_y[part] = self.normals[edge].T
+        balls.reflect(hit, normal_x, normal_y)
+        return hit
+
+    def __str__(self) -> str:
+        return f"PolygonContainer of {len(self.vertices)} edges"
+
+
+def _fold(position: float, delta: float, low: float, high: float, steps: np.ndarray):
+    """Closed form of the horizontal axis of the ``move``/``collides`` loop.
+
+        The ball only ever visits the points ``position + j * delta``. It walks along
+        them and turns back at ``top``, the last point before ``high`` in the direction
+        of ``delta``, and at ``bottom``, the last point before ``low`` in the opposite one,
+        so ``j`` is a triangle wave of the step number.
+
+        ``collides`` reflects the vertical velocity at every step, in which the ball
+        doesn't turn horizontally, so the vertical displacement after ``k`` steps is
+        ``delta_y`` times ``drift(k) = sum((-1) ** (m - turns(m)) for m in range(k))``,
+        summed block by block of the wave, and the vertical sign is ``drift(k + 1) - drift(k)``.
+
+        Returns:
+            Positions, deltas, drifts and vertical signs, shaped as ``steps``.
+    """
+    if not low <= position <= high:
+        raise ValueError("The ball must start inside the container")
+    if delta == 0:
+        index, sign = np.zeros(steps.shape, dtype=np.int64), np.ones(steps.shape, dtype=np.int64)
+
+        def drift(count):
+            return count % 2
+    else:
+        size = abs(delta)
+        if delta > 0:
+            top, bottom = floor((high - position) / size), ceil((low - position) / size)
+        else:
+            top, bottom = floor((position - low) / size), ceil((position - high) / size)
+        length = top - bottom
+        if length == 0:
+            # The container is narrower than one step: the ball goes back and forth.
+            index = steps % 2
+            sign = 1 - 2 * index
+
+            def drift(count):
+                return count
+        else:
+            # A ball starting next to the wall it is heading for overshoots it by one step.
+            offset = length - 2 if top == 0 else -bottom
+            phase = (steps + offset) % (2 * length)
+            rising = phase < length
+            index = np.where(rising, bottom + phase, bottom + 2 * length - phase)
+            sign = np.where(rising, 1, -1)
+            if top == 0:
+                index = np.where(steps < 2, steps, index)
+                sign = np.where(steps < 2, 1 - 2 * steps, sign)
+
+            def signs(count):
+                # Sum of (-1) ** (n - n // length) over n < count, a block sums to 1 or 0.
+                blocks, rest = count // length, count % length
+                return (blocks if length % 2 else 0) + np.where(blocks * (length - 1) % 2, -1, 1) * (rest % 2)
+
+            def drift(count):
+                if top != 0:
+                    parity = np.where((offset + offset // length) % 2, -1, 1)
+                    return parity * (signs(count + offset) - signs(offset))
+                # Past the overshoot the turns are (m + offset) // length.
+                tail = np.where(offset % 2, -1, 1) * (signs(np.maximum(count, 2) + offset) - signs(offset + 2))
+                return np.where(count < 2, count, 2 + tail)
+    drifts = drift(steps)
+    return position + index * delta, sign * delta, drifts, drift(steps + 1) - drifts
+
+
+def _reflect(position, delta, low, high):
+    """Moves a point by ``delta`` within ``[low, high]``, mirroring it at the ends.
+
+        Returns:
+            New position, new delta and the number of reflections.
+    """
+    length = np.maximum(high - low, 0.0)
+    unfolded = position + delta - low
+    with np.errstate(divide="ignore", invalid="ignore"):
+        laps = np.where(length > 0, np.floor(unfolded / length), 0.0)
+    rest = unfolded - laps * length
+    even = laps % 2 == 0
+    moved = np.where(length > 0, np.where(even, low + rest, high - rest), position)
+    reflected = np.where(even, delta, -delta)
+    if np.ndim(moved) == 0:
+        return float(moved), float(reflected), int(abs(laps))
+    return moved, reflected, np.abs(laps).astype(np.int64)
+
+
+def _impact_times(dx, dy, vx, vy, reach):
+    """Returns when two balls, ``(dx, dy)`` apart and closing at ``(vx, vy)``, touch.
+
+        Overlapping, approaching balls touch at once, the others get infinity.
+    """
+    approach = dx * vx + dy * vy
+    speed2 = vx * vx + vy * vy
+    discriminant = approach * approach - speed2 * (dx * dx + dy * dy - reach * reach)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        time = -(approach + np.sqrt(np.maximum(discriminant, 0.0))) / speed2
+    return np.where((approach < 0) & (discriminant >= 0), np.maximum(time, 0.0), np.inf)
+
+
+def _impact_time(dx: float, dy: float, vx: float, vy: float, reach: float) -> float:
+    """Scalar ``_impact_times``."""
+    approach = dx * vx + dy * vy
+    if approach >= 0:
+        return inf
+    speed2 = vx * vx + vy * vy
+    discriminant = approach * approach - speed2 * (dx * dx + dy * dy - reach * reach)
+    if discriminant < 0:
+        return inf
+    return max(-(approach + sqrt(discriminant)) / speed2, 0.0)
+
+
+def _sides(laps: np.ndarray, forward: np.ndarray) -> np.ndarray:
+    """Splits the reflections of ``_reflect`` into the hits on the low and the high end.
+
+        A point moving forward hits the high end first and then both ends in turn.
+    """
+    first, second = (laps + 1) // 2, laps // 2
+    return np.array([np.where(forward, second, first).sum(), np.where(forward, first, second).sum()],
+                    dtype=np.int64)
+
+
+def _sweep_pairs(box: Container, balls: "BallArray", grid: "SpatialHash", hits: np.ndarray,
+                 wall_hits: Optional[np.ndarray] = None) -> np.ndarray:
+    """Resolves the balls, which can meet during the tick, in time of impact order.
+
+        The grid is rebuilt with cells covering the distance two balls can close in a
+        tick. Candidate pairs meeting on straight lines, or with a ball hitting a wall
+        during the tick, seed an event queue, and every ball drawn into a collision is
+        followed through its wall and ball events up to the end of the tick. The wall hits
+        are added to ``wall_hits``, as ``walls`` of ``Container.sweep_all``.
+
+        Returns:
+            Mask of the balls, which have not been touched and still have to be moved.
+    """
+    reach = 2 * float(balls.radius.max() + np.hypot(balls.delta_x, balls.delta_y).max())
+    cell_size = grid.cell_size
+    grid.cell_size = max(cell_size or 0.0, reach)
+    try:
+        grid.build(balls)
+    finally:
+        grid.cell_size = cell_size
+    first, second = grid.pairs()
+    # The cells are only as wide as the distance two balls can close in a tick.
+    near = np.hypot(balls.x[second] - balls.x[first], balls.y[second] - balls.y[first]) <= reach
+    first, second = first[near], second[near]
+    times = _impact_times(balls.x[second] - balls.x[first], balls.y[second] - balls.y[first],
+                          balls.delta_x[second] - balls.delta_x[first],
+                          balls.delta_y[second] - balls.delta_y[first],
+                          balls.radius[first] + balls.radius[second])
+    free = np.ones(len(balls), dtype=bool)
+    # A ball turned back by a wall can meet a neighbour it was moving away from.
+    next_x, next_y = balls.x + balls.delta_x, balls.y + balls.delta_y
+    turns = ((next_x < box.x1 + balls.radius) | (next_x > box.x2 - balls.radius)
+             | (next_y < box.y1 + balls.radius) | (next_y > box.y2 - balls.radius))
+    seeds = (times <= 1.0) | turns[first] | turns[second]
+    if not seeds.any():
+        return free
+    owners = np.concatenate([first, second])
+    order = np.argsort(owners, kind="stable")
+    partners = np.concatenate([second, first])[order]
+    bounds = np.searchsorted(owners[order], np.arange(len(balls) + 1))
+    x, y, r = balls.x.tolist(), balls.y.tolist(), balls.radius.tolist()
+    vx, vy = balls.delta_x.tolist(), balls.delta_y.tolist()
+    stamp, version, count = {}, {}, {}
+    sides = [0, 0, 0, 0]
+    queue = []
+
+    def advance(i, time):
+        x[i] += vx[i] * (time - stamp[i])
+        y[i] += vy[i] * (time - stamp[i])
+        stamp[i] = time
+
+    def walls(i, now):
+        for axis, position, delta, low, high in ((0, x[i], vx[i], box.x1 + r[i], box.x2 - r[i]),
+                                                 (1, y[i], vy[i], box.y1 + r[i], box.y2 - r[i])):
+            wait = (high - position) / delta if delta > 0 else (low - position) / delta if delta < 0 else inf
+            if now + max(wait, 0.0) <= 1.0:
+                heapq.heappush(queue, (now + max(wait, 0.0), i, -1 - axis, version[i], 0))
+
+    def join(i):
+        # A ball drawn in by a partner keeps its straight path until its own velocity changes.
+        if i not in stamp:
+            stamp[i], version[i], count[i] = 0.0, 0, 0
+            walls(i, 0.0)
+
+    def meet(i, now):
+        for j in partners[bounds[i]:bounds[i + 1]].tolist():
+            join(j)
+            dx = x[j] + vx[j] * (now - stamp[j]) - x[i]
+            dy = y[j] + vy[j] * (now - stamp[j]) - y[i]
+            wait = _impact_time(dx, dy, vx[j] - vx[i], vy[j] - vy[i], r[i] + r[j])
+            if now + wait <= 1.0:
+                heapq.heappush(queue, (now + wait, i, j, version[i], version[j]))
+
+    for i in np.unique(np.concatenate([first[seeds], second[seeds]])).tolist():
+        join(i)
+        meet(i, 0.0)
+    while queue:
+        time, i, j, version_i, version_j = heapq.heappop(queue)
+        if version_i != version[i] or (j >= 0 and version_j != version[j]):
+            continue
+        advance(i, time)
+        if j == -1:
+            sides[vx[i] > 0] += 1
+            vx[i] = -vx[i]
+        elif j == -2:
+            sides[2 + (vy[i] > 0)] += 1
+            vy[i] = -vy[i]
+        else:
+            advance(j, time)
+            dx, dy = x[j] - x[i], y[j] - y[i]
+            dist2 = dx * dx + dy * dy
+            if dist2 > 0:
+                mass, other_mass = r[i] ** 2, r[j] ** 2
+                impulse = 2 * (dx * (vx[j] - vx[i]) + dy * (vy[j] - vy[i])) / (dist2 * (mass + other_mass))
+                vx[i] += other_mass * impulse * dx
+                vy[i] += other_mass * impulse * dy
+                vx[j] -= mass * impulse * dx
+                vy[j] -= mass * impulse * dy
+            version[j] += 1
+            count[j] += 1
+            walls(j, time)
+            meet(j, time)
+        version[i] += 1
+        count[i] += 1
+        walls(i, time)
+        meet(i, time)
+    touched = np.fromiter(stamp, dtype=np.int64, count=len(stamp))
+    for i in touched.tolist():
+        advance(i, 1.0)
+    balls.x[touched] = [x[i] for i in touched]
+    balls.y[touched] = [y[i] for i in touched]
+    balls.delta_x[touched] = [vx[i] for i in touched]
+    balls.delta_y[touched] = [vy[i] for i in touched]
+    hits[touched] += [count[i] for i in touched]
+    if wall_hits is not None:
+        wall_hits += sides
+    free[touched] = False
+    return free
+
+
+class BallArray:
+    """Swarm of balls, stored as contiguous columns.
+
+        Attributes:
+            x (np.ndarray): X coordinates of the balls.
+            y (np.ndarray): Y coordinates of the balls.
+            radius (np.ndarray): Radii of the balls.
+            velocity (np.ndarray): Initial speeds of the balls.
+            direction (np.ndarray): Initial directions of the balls, in radians.
+            delta_x (np.ndarray): Horizontal velocity components.
+            delta_y (np.ndarray): Vertical velocity components.
+    """
+
+    def __init__(self, x, y, radius, velocity, direction):
+        """BallArray initializer, the arguments are array-likes of equal length."""
+        self.x = np.array(x, dtype=np.float64)
+        self.y = np.array(y, dtype=np.float64)
+        self.radius = np.array(radius, dtype=np.float64)
+        self.velocity = np.array(velocity, dtype=np.float64)
+        self.direction = np.array(direction, dtype=np.float64)
+        self.delta_x = self.velocity * np.cos(self.direction)
+        self.delta_y = -self.velocity * np.sin(self.direction)
+
+    @classmethod
+    def from_balls(cls, balls: List[Ball]) -> "BallArray":
+        """Builds a swarm from Ball instances, keeping their current velocities.
+
+            Args:
+                balls (List[Ball]): Balls, which should be copied into the swarm.
+
+            Returns:
+                BallArray
+        """
+        array = cls([b.x for b in balls], [b.y for b in balls], [b.radius for b in balls],
+                    [b.velocity for b in balls], [b.direction for b in balls])
+        array.delta_x = np.array([b.delta_x for b in balls], dtype=np.float64)
+        array.delta_y = np.array([b.delta_y for b in balls], dtype=np.float64)
+        return array
+
+    def to_balls(self) -> List[Ball]:
+        """Returns the swarm as a list of Ball instances."""
+        return [self[i] for i in range(len(self))]
+
+    def move(self) -> None:
+        self.x += self.delta_x
+        self.y += self.delta_y
+
+    def reflect_horizontal(self, mask: np.ndarray) -> None:
+        np.negative(self.delta_x, out=self.delta_x, where=mask)
+
+    def reflect_vertical(self, mask: np.ndarray) -> None:
+        np.negative(self.delta_y, out=self.delta_y, where=mask)
+
+    def reflect(self, mask: np.ndarray, normal_x: np.ndarray, normal_y: np.ndarray) -> None:
+        """Mirrors the velocities of the masked balls about walls with the given unit normals."""
+        projection = np.where(mask, 2 * (self.delta_x * normal_x + self.delta_y * normal_y), 0.0)
+        self.delta_x -= projection * normal_x
+        self.delta_y -= projection * normal_y
+
+    def __len__(self) -> int:
+        return len(self.x)
+
+    def __getitem__(self, i: int) -> Ball:
+        ball = Ball(float(self.x[i]), float(self.y[i]), float(self.radius[i]),
+                    float(self.velocity[i]), float(self.direction[i]))
+        ball.delta_x = float(self.delta_x[i])
+        ball.delta_y = float(self.delta_y[i])
+        return ball
+
+    def __str__(self) -> str:
+        return f"BallArray of {len(self)} balls"
+
+
+class SpatialHash:
+    """Uniform grid over a swarm, used as the broad phase of ball-to-ball collisions.
+
+        Balls are bucketed into square cells at least as wide as the largest ball,
+        so two touching balls always share a cell or sit in neighbouring ones.
+
+        Attributes:
+            cell_size (float): Side of a cell, defaults to the largest ball diameter.
+            order (np.ndarray): Ball indices, sorted by cell.
+            cells (np.ndarray): Sorted keys of the occupied cells.
+            starts (np.ndarray): Position of the first ball of each cell in ``order``.
+            counts (np.ndarray): Number of balls in each cell.
+    """
+
+    # Half of the 3x3 neighbourhood, so that every pair of cells is visited once.
+    NEIGHBOURS = ((0, 0), (1, -1), (1, 0), (1, 1), (0, 1))
+
+    def __init__(self, cell_size: Optional[float] = None):
+        """SpatialHash initializer."""
+        self.cell_size = cell_size
+        self.stride = 0
+        self.order = np.empty(0, dtype=np.int64)
+        self.cells = np.empty(0, dtype=np.int64)
+        self.starts = np.empty(0, dtype=np.int64)
+        self.counts = np.empty(0, dtype=np.int64)
+
+    def build(self, balls: BallArray) -> None:
+        """Rebuilds the grid from the current positions of the swarm.
+
+            Args:
+                balls (BallArray): Swarm, which should be bucketed.
+
+            Returns:
+                None.
+        """
+        if len(balls) == 0:
+            self.order = self.cells = self.starts = self.counts = np.empty(0, dtype=np.int64)
+            return
+        cell_size = self.cell_size or 2 * float(balls.radius.max()) or 1.0
+        column = np.floor(balls.x / cell_size).astype(np.int64)
+        row = np.floor(balls.y / cell_size).astype(np.int64)
+        column -= column.min()
+        row -= row.min()
+        # The spare row keeps the (1, -1) and (0, 1) neighbours from wrapping into another column.
+        self.stride = int(row.max()) + 2
+        keys = column * self.stride + row
+        self.order = np.argsort(keys, kind="stable")
+        self.cells, self.starts, self.counts = np.unique(keys[self.order], return_index=True,
+                                                         return_counts=True)
+
+    def pairs(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Returns candidate pairs of balls, which share a cell or sit in neighbouring cells.
+
+            Returns:
+                Two arrays of ball indices, every pair is listed once.
+        """
+        first, second = [], []
+        if len(self.cells) == 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+        for dx, dy in self.NEIGHBOURS:
+            target = self.cells + dx * self.stride + dy
+            found = np.minimum(np.searchsorted(self.cells, target), len(self.cells) - 1)
+            hit = self.cells[found] == target
+            a = np.nonzero(hit)[0]
+            b = found[hit]
+            sizes = self.counts[a] * self.counts[b]
+            owner = np.repeat(np.arange(len(a)), sizes)
+            local = np.arange(int(sizes.sum())) - np.repeat(np.cumsum(sizes) - sizes, sizes)
+            width = self.counts[b][owner]
+            i_local, j_local = local // width, local % width
+            if dx == 0 and dy == 0:
+                keep = i_local < j_local
+                owner, i_local, j_local = owner[keep], i_local[keep], j_local[keep]
+            first.append(self.order[self.starts[a][owner] + i_local])
+            second.append(self.order[self.starts[b][owner] + j_local])
+        return np.concatenate(first), np.concatenate(second)
+
+    def collide(self, balls: BallArray) -> int:
+        """Rebuilds the grid and elastically bounces every colliding pair of balls.
+
+            Uses the same rule as ``Ball.collides``. Impulses of a ball touching several
+            others at once are summed from the velocities before the step.
+
+            Args:
+                balls (BallArray): Swarm, which should be checked.
+
+            Returns:
+                Number of collided pairs.
+        """
+        self.build(balls)
+        i, j = self.pairs()
+        dx = balls.x[j] - balls.x[i]
+        dy = balls.y[j] - balls.y[i]
+        dist2 = dx * dx + dy * dy
+        reach = balls.radius[i] + balls.radius[j]
+        approach = dx * (balls.delta_x[j] - balls.delta_x[i]) + dy * (balls.delta_y[j] - balls.delta_y[i])
+        hit = (dist2 > 0) & (dist2 < reach * reach) & (approach < 0)
+        i, j, dx, dy = i[hit], j[hit], dx[hit], dy[hit]
+        mass, other_mass = balls.radius[i] ** 2, balls.radius[j] ** 2
+        impulse = 2 * approach[hit] / (dist2[hit] * (mass + other_mass))
+        n = len(balls)
+        balls.delta_x += (np.bincount(i, other_mass * impulse * dx, n)
+                          - np.bincount(j, mass * impulse * dx, n))
+        balls.delta_y += (np.bincount(i, other_mass * impulse * dy, n)
+                          - np.bincount(j, mass * impulse * dy, n))
+        return len(i)
+
+
+
+def _unprofiled(simulation: "Simulation", phase: str, function: Callable, *args) -> Any:
+    """Runs a phase of a step of the simulation, without a profiler."""
+    return function(*args)
+
+
+class Simulation:
+    """Headless simulation of a swarm of balls in a container.
+
+        Attributes:
+            balls (BallArray): Simulated swarm.
+            container (Container): Container, the balls bounce in.
+            stride (int): The state is recorded every ``stride`` steps.
+            verbose (bool): Whether every ball is printed after every step.
+            grid (SpatialHash): Broad phase for ball-to-ball collisions, None to disable them.
+            writer (TrajectoryWriter): If set, recorded states are streamed into it instead
+                of being kept in ``trajectory``.
+            checkpointer (Checkpointer): If set, saves the state every ``checkpointer.every`` steps.
+            continuous (bool): Whether steps use ``Container.sweep_all`` instead of ``collide_all``,
+                so that fast balls can't tunnel through walls or each other.
+            profiler (Profiler): If set, times every phase of the steps and counts the collisions.
+            step_count (int): Number of steps made so far.
+            steps (np.ndarray): Step numbers of the recorded states.
+            trajectory (np.ndarray): Recorded states, shaped (records, balls, 4) and holding
+                x, y, delta_x and delta_y.
+    """
+
+    def __init__(self, balls, container: Container, stride: int = 1, verbose: bool = False,
+                 grid: Optional[SpatialHash] = None, writer: Any = None, checkpointer: Any = None,
+                 continuous: bool = False, profiler: Any = None):
+        """Simulation initializer, ``balls`` is a BallArray or a list of Ball instances."""
+        if stride < 1:
+            raise ValueError("The recording stride must be positive")
+        if checkpointer is not None and not isinstance(container, Container):
+            raise TypeError(f"Only a rectangular Container can be checkpointed, not {type(container).__name__}")
+        self.balls = balls if isinstance(balls, BallArray) else BallArray.from_balls(balls)
+        self.container = container
+        self.stride = stride
+        self.verbose = verbose
+        self.grid = grid
+        self.writer = writer
+        self.checkpointer = checkpointer
+        self.continuous = continuous
+        self.profiler = profiler
+        self.step_count = 0
+        self.steps = np.empty(0, dtype=np.int64)
+        self.trajectory = np.empty((0, len(self.balls), 4))
+
+    def step(self) -> None:
+        """Moves every ball once and resolves its collisions, every phase through the profiler, if set."""
+        phase = _unprofiled if self.profiler is None else self.profiler.phase
+        if self.continuous:
+            phase(self, "sweep", self.container.sweep_all, self.balls, self.grid)
+        else:
+            phase(self, "move", self.balls.move)
+            phase(self, "walls", self.container.reflect_all, self.balls)
+            if self.grid is not None:
+                phase(self, "balls", self.grid.collide, self.balls)
+        phase(self, "output", self.finish_step)
+
+    def finish_step(self) -> None:
+        """Counts the step, saves a checkpoint if it is due and prints the balls if verbose."""
+        self.step_count += 1
+        if self.checkpointer is not None and self.step_count % self.checkpointer.every == 0:
+            self.checkpointer.save(self)
+        if self.verbose:
+            for ball in self.balls.to_balls():
+                print(ball)
+
+    def record(self, index: int) -> None:
+        """Stores the current state as the record ``index`` of the run, or streams it to the writer."""
+        if self.writer is not None:
+            self.writer.write(self.step_count, self.balls)
+            return
+        frame = self.trajectory[index]
+        frame[:, 0] = self.balls.x
+        frame[:, 1] = self.balls.y
+        frame[:, 2] = self.balls.delta_x
+        frame[:, 3] = self.balls.delta_y
+
+    def run(self, steps: int) -> np.ndarray:
+        """Makes ``steps`` steps, recording the state into preallocated arrays or the writer.
+
+            Args:
+                steps (int): Number of steps.
+
+            Returns:
+                States recorded during this run, see ``trajectory``.
+        """
+        first = self.step_count // self.stride + 1
+        last = (self.step_count + steps) // self.stride
+        self.steps = np.arange(first, last + 1, dtype=np.int64) * self.stride
+        if self.writer is not None:
+            self.trajectory = np.empty((0, len(self.balls), 4))
+        else:
+            self.trajectory = np.empty((len(self.steps), len(self.balls), 4))
+        record = 0
+        phase = _unprofiled if self.profiler is None else self.profiler.phase
+        for _ in range(steps):
+            self.step()
+            if self.step_count % self.stride != 0:
+                continue
+            phase(self, "record", self.record, record)
+            record += 1
+        return self.trajectory
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Runs the ball-in-a-box demo from the command line."""
+    parser = argparse.ArgumentParser(description="Bounces a ball in a box.")
+    parser.add_argument("--steps", type=int, default=100, help="number of steps")
+    parser.add_argument("--stride", type=int, default=1, help="record the state every STRIDE steps")
+    parser.add_argument("--verbose", action="store_true", help="print the ball after every step")
+    args = parser.parse_args(argv)
+    box = Container(0, 0, 100, 100)
+    simulation = Simulation([Ball(50, 50, 5, 10, 30)], box, stride=args.stride, verbose=args.verbose)
+    if args.verbose:
+        print(box)
+    simulation.run(args.steps)
+    if not args.verbose:
+        print(simulation.balls[0])
+
+
+if __name__ == "__main__":
+    main()
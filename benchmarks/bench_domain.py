@@ -0,0 +1,55 @@
+"""Times DomainDecomposition against a single process Simulation, with ball collisions.
+
+Run from the repository root: ``python benchmarks/bench_domain.py [balls]``.
+
+The speedup is bounded by the number of cores, which is printed first. On a single core,
+200 000 balls take about 130 ms a step in one process and the strips run at a speedup of
+0.89 to 0.95, the cost of the exchanges between them, so no scaling has been measured yet.
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ball import BallArray, Container, Simulation, SpatialHash  # noqa: E402
+from domain import DomainDecomposition  # noqa: E402
+
+# Roughly 5% of the area is covered by balls, whatever the swarm size.
+AREA_PER_BALL = 400.0
+STEPS = 20
+
+
+def swarm(n: int) -> BallArray:
+    rng = np.random.default_rng(n)
+    side = (n * AREA_PER_BALL) ** 0.5
+    return BallArray(rng.uniform(3, side - 3, n), rng.uniform(3, side - 3, n), rng.uniform(1, 3, n),
+                     rng.uniform(0.5, 2, n), rng.uniform(0, 2 * np.pi, n))
+
+
+def bench(n: int, workers: int) -> float:
+    side = int((n * AREA_PER_BALL) ** 0.5)
+    box = Container(0, 0, side, side)
+    if workers == 1:
+        simulation = Simulation(swarm(n), box, grid=SpatialHash())
+        start = time.perf_counter()
+        for _ in range(STEPS):
+            simulation.step()
+        return (time.perf_counter() - start) / STEPS
+    with DomainDecomposition(swarm(n), box, workers=workers, collisions=True) as domain:
+        domain.run(1)
+        start = time.perf_counter()
+        domain.run(STEPS)
+        return (time.perf_counter() - start) / STEPS
+
+
+if __name__ == "__main__":
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    print(f"{size} balls, {os.cpu_count() or 1} cores")
+    baseline = None
+    for workers in sorted({1, 2, 4, os.cpu_count() or 1}):
+        seconds = bench(size, workers)
+        baseline = baseline or seconds
+        print(f"{workers:>3} workers: {seconds * 1e3:9.2f} ms/step, speedup {baseline / seconds:5.2f}")
@@ -0,0 +1,110 @@
+"""Times filling a group into many courses at once, enrolling from many threads and a burst of async requests.
+
+Run from the repository root: ``python benchmarks/bench_enrollment.py``.
+"""
+import os
+import asyncio
+import random
+import sys
+import threading
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from course import EnrollmentRegistry, Math  # noqa: E402
+from registration import EnrollmentService  # noqa: E402
+from staff import Student  # noqa: E402
+
+STUDENTS = 500
+COURSES = 1000
+THREADS = 32
+CONTENDED_COURSES = 64
+LIMIT = 200
+BURST = 50_000
+
+
+def students(n: int):
+    return [Student(i, f"student{i}_name", "address", "phone", "email", "position", "rank", 50,
+                    student_number=i, average_mark=4) for i in range(n)]
+
+
+def courses(n: int, limit: int):
+    return [Math(f"course{i}", datetime.now(), datetime.now(), "description", [], [], limit) for i in range(n)]
+
+
+def bench_fill() -> float:
+    """Fills the group into every course, 500,000 enrollments in all.
+
+        Each one is pure Python work on plain lists and dicts: the seat in ``course.students``,
+        the course in ``student.courses``, both indexes and a new CourseProgress. On CPython
+        3.11 on one core that is about 2 us for the registry and 3 us for the progress, with
+        its share of garbage collection, so the fill takes 3 to 3.5 s. Milliseconds would need
+        the enrollments kept outside of those lists, which their callers read directly.
+    """
+    registry = EnrollmentRegistry()
+    group = students(STUDENTS)
+    start = time.perf_counter()
+    for course in courses(COURSES, STUDENTS):
+        course.add_students(group, registry)
+    return time.perf_counter() - start
+
+
+def bench_contention():
+    """Every thread enrolls all students in random order into random courses, then unenrolls half of them."""
+    registry = EnrollmentRegistry()
+    group = students(STUDENTS)
+    catalog = courses(CONTENDED_COURSES, LIMIT)
+    operations = [0] * THREADS
+
+    def work(k: int) -> None:
+        rng = random.Random(k)
+        for student in rng.sample(group, len(group)):
+            course = rng.choice(catalog)
+            try:
+                registry.enroll(student, course)
+            except ValueError:
+                pass
+            if rng.random() < 0.5:
+                registry.unenroll(student, rng.choice(catalog))
+            operations[k] += 2
+
+    threads = [threading.Thread(target=work, args=(k,)) for k in range(THREADS)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    seconds = time.perf_counter() - start
+    overbooked = sum(len(course.students) > course.limit for course in catalog)
+    duplicated = sum(len(set(map(id, course.students))) != len(course.students) for course in catalog)
+    return seconds, sum(operations), overbooked, duplicated
+
+
+def bench_burst():
+    """Submits a burst of enrollments and unenrollments at once to the async service."""
+    service = EnrollmentService(EnrollmentRegistry())
+    group = students(STUDENTS)
+    catalog = courses(CONTENDED_COURSES, LIMIT)
+    rng = random.Random(0)
+    calls = [(rng.random() < 0.3, rng.choice(group), rng.choice(catalog)) for _ in range(BURST)]
+
+    async def main():
+        futures = [(service.unenroll if leave else service.enroll)(student, course) for leave, student, course in calls]
+        await asyncio.gather(*futures)
+
+    start = time.perf_counter()
+    asyncio.run(main())
+    return time.perf_counter() - start, service.metrics()
+
+
+if __name__ == "__main__":
+    seconds = bench_fill()
+    print(f"{STUDENTS} students into {COURSES} courses: {seconds * 1e3:9.2f} ms, "
+          f"{seconds / (STUDENTS * COURSES) * 1e9:7.1f} ns/enrollment")
+    seconds, operations, overbooked, duplicated = bench_contention()
+    print(f"{THREADS} threads on {CONTENDED_COURSES} courses: {operations / seconds:10.0f} operations/s, "
+          f"{overbooked} overbooked and {duplicated} duplicated courses")
+    seconds, metrics = bench_burst()
+    print(f"burst of {BURST} async requests: {BURST / seconds:10.0f} requests/s, "
+          f"{metrics['mean_batch']:.0f} requests/batch, p99 latency {metrics['latency_p99'] * 1e3:.1f} ms")
@@ -0,0 +1,51 @@
+"""Compares the memory of per-student copies of the assignments with progresses sharing a template.
+
+Run from the repository root: ``python benchmarks/bench_progress_memory.py``.
+"""
+import copy
+import os
+import sys
+import tracemalloc
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from course import CourseProgress, Math  # noqa: E402
+
+STUDENTS = 10_000
+ASSIGNMENTS = 50
+
+
+def measure(build) -> int:
+    tracemalloc.start()
+    kept = build()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del kept
+    return size
+
+
+def graded(progress: CourseProgress) -> CourseProgress:
+    """Makes the progress hold its own marks, which are only copied from the template on first use."""
+    progress.marks, progress.done
+    return progress
+
+
+def main() -> None:
+    assignments = {f"task{i}": {"title": f"Task {i}", "description": "Solve the problems of the chapter",
+                                "is_done": False, "mark": 0.0} for i in range(ASSIGNMENTS)}
+    course = Math("math", datetime.now(), datetime.now(), "description", [], assignments, STUDENTS)
+    course.template
+    empty = Math("empty", datetime.now(), datetime.now(), "description", [], {}, STUDENTS)
+    copies = measure(lambda: [copy.deepcopy(assignments) for _ in range(STUDENTS)])
+    progresses = measure(lambda: [graded(CourseProgress("math", course.assignments, course)) for _ in range(STUDENTS)])
+    bare = measure(lambda: [graded(CourseProgress("empty", empty.assignments, empty)) for _ in range(STUDENTS)])
+    print(f"{STUDENTS} students x {ASSIGNMENTS} assignments")
+    print(f"deep copies:     {copies / STUDENTS:8.0f} bytes per student")
+    print(f"shared template: {(progresses - bare) / STUDENTS:8.0f} bytes per student "
+          f"({progresses / STUDENTS:.0f} with the rest of the progress)")
+    print(f"ratio:           {copies / (progresses - bare):8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
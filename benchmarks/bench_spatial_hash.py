@@ -0,0 +1,38 @@
+"""Times SpatialHash.collide on swarms of growing size at a constant density.
+
+Run from the repository root: ``python benchmarks/bench_spatial_hash.py``.
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ball import BallArray, SpatialHash  # noqa: E402
+
+SIZES = (10_000, 100_000, 1_000_000)
+# Roughly 5% of the area is covered by balls, whatever the swarm size.
+AREA_PER_BALL = 400.0
+REPEATS = 5
+
+
+def bench(n: int) -> float:
+    rng = np.random.default_rng(n)
+    side = (n * AREA_PER_BALL) ** 0.5
+    balls = BallArray(rng.uniform(0, side, n), rng.uniform(0, side, n), rng.uniform(1, 3, n),
+                      rng.uniform(0.5, 2, n), rng.uniform(0, 2 * np.pi, n))
+    grid = SpatialHash()
+    grid.collide(balls)
+    start = time.perf_counter()
+    for _ in range(REPEATS):
+        balls.move()
+        grid.collide(balls)
+    return (time.perf_counter() - start) / REPEATS
+
+
+if __name__ == "__main__":
+    for size in SIZES:
+        seconds = bench(size)
+        print(f"{size:>9} balls: {seconds * 1e3:9.2f} ms/step, {seconds / size * 1e9:7.1f} ns/ball")
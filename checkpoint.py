@@ -0,0 +1,168 @@
+import json
+import os
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Deque, Dict, Optional, Tuple
+
+import numpy as np
+
+from ball import BallArray, Container, Simulation, SpatialHash
+
+HEADER = np.dtype([("magic", "S8"), ("version", "<i8"), ("step_count", "<i8"), ("n_balls", "<i8"),
+                   ("meta_length", "<i8")])
+MAGIC = b"BALLCKP1"
+VERSION = 1
+COLUMNS = ("x", "y", "radius", "velocity", "direction", "delta_x", "delta_y")
+
+
+def snapshot(simulation: Simulation, rng: Optional[np.random.Generator] = None) -> Tuple[Dict[str, Any], np.ndarray]:
+    """Copies the state of the simulation, so that it can be written while the simulation goes on.
+
+        Returns:
+            Metadata and the ball columns, shaped (7, n).
+
+        Raises:
+            TypeError: The container isn't a rectangular Container, which is all the format holds.
+    """
+    box = simulation.container
+    if not isinstance(box, Container):
+        raise TypeError(f"Only a rectangular Container can be checkpointed, not {type(box).__name__}")
+    meta = {
+        "container": [box.x1, box.y1, box.width, box.height],
+        "stride": simulation.stride,
+        "continuous": simulation.continuous,
+        "grid": None if simulation.grid is None else {"cell_size": simulation.grid.cell_size},
+        "rng": None if rng is None else rng.bit_generator.state,
+    }
+    columns = np.empty((len(COLUMNS), len(simulation.balls)), dtype="<f8")
+    for row, name in zip(columns, COLUMNS):
+        row[:] = getattr(simulation.balls, name)
+    return {"step_count": simulation.step_count, **meta}, columns
+
+
+def write(path: str, meta: Dict[str, Any], columns: np.ndarray) -> None:
+    """Writes a snapshot atomically: a crash while writing leaves the previous checkpoint intact."""
+    step_count = meta["step_count"]
+    encoded = json.dumps({k: v for k, v in meta.items() if k != "step_count"}).encode()
+    header = np.zeros((), dtype=HEADER)
+    header["magic"] = MAGIC
+    header["version"] = VERSION
+    header["step_count"] = step_count
+    header["n_balls"] = columns.shape[1]
+    header["meta_length"] = len(encoded)
+    temporary = f"{path}.tmp"
+    with open(temporary, "wb") as file:
+        file.write(header.tobytes())
+        file.write(encoded)
+        file.write(np.ascontiguousarray(columns).data)
+    os.replace(temporary, path)
+
+
+def save(path: str, simulation: Simulation, rng: Optional[np.random.Generator] = None) -> None:
+    """Writes a checkpoint of the simulation and, optionally, of a random generator.
+
+        Args:
+            path (str): Path of the checkpoint file.
+            simulation (Simulation): Simulation, which should be saved.
+            rng (np.random.Generator): Random generator, the caller steps along with the simulation.
+
+        Returns:
+            None.
+    """
+    write(path, *snapshot(simulation, rng))
+
+
+def load(path: str, **options) -> Tuple[Simulation, Optional[np.random.Generator]]:
+    """Restores a simulation from a checkpoint, resuming exactly where it stopped.
+
+        Args:
+            path (str): Path of the checkpoint file.
+            options: Extra Simulation arguments, such as ``verbose``, ``writer`` or ``checkpointer``.
+
+        Returns:
+            Simulation and the random generator, or None if none has been saved.
+    """
+    with open(path, "rb") as file:
+        header = np.frombuffer(file.read(HEADER.itemsize), dtype=HEADER)
+        if len(header) == 0 or header[0]["magic"] != MAGIC:
+            raise ValueError(f"{path} is not a checkpoint file")
+        if header[0]["version"] != VERSION:
+            raise ValueError(f"Unsupported checkpoint version {header[0]['version']}")
+        meta = json.loads(file.read(int(header[0]["meta_length"])).decode())
+        n_balls = int(header[0]["n_balls"])
+        columns = np.fromfile(file, dtype="<f8", count=len(COLUMNS) * n_balls).reshape(len(COLUMNS), n_balls)
+    balls = BallArray(*columns[:5])
+    balls.delta_x = columns[5].astype(np.float64)
+    balls.delta_y = columns[6].astype(np.float64)
+    grid = None if meta["grid"] is None else SpatialHash(meta["grid"]["cell_size"])
+    simulation = Simulation(balls, Container(*meta["container"]), stride=meta["stride"], grid=grid,
+                            continuous=meta.get("continuous", False), **options)
+    simulation.step_count = int(header[0]["step_count"])
+    rng = None
+    if meta["rng"] is not None:
+        bit_generator = getattr(np.random, meta["rng"]["bit_generator"])()
+        bit_generator.state = meta["rng"]
+        rng = np.random.Generator(bit_generator)
+    return simulation, rng
+
+
+class Checkpointer:
+    """Saves a simulation every ``every`` steps on a background thread.
+
+        The stepping loop only pays for copying the state, while one checkpoint is being
+        written and one more waits for the writer. Every due checkpoint is written: if
+        both are still pending, the loop waits for the older one rather than skip the
+        new one. An error of a write is raised by the next ``save`` or ``wait``.
+
+        Attributes:
+            path (str): Path of the checkpoint file.
+            every (int): Number of steps between checkpoints.
+            rng (np.random.Generator): Random generator saved along with the simulation.
+            saved (int): Number of written checkpoints.
+            blocked (int): Number of checkpoints, which had to wait for the writer.
+    """
+
+    def __init__(self, path: str, every: int, rng: Optional[np.random.Generator] = None):
+        """Checkpointer initializer."""
+        if every < 1:
+            raise ValueError("The checkpoint interval must be positive")
+        self.path = path
+        self.every = every
+        self.rng = rng
+        self.saved = 0
+        self.blocked = 0
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        self._pending: Deque[Future] = deque()
+
+    def save(self, simulation: Simulation) -> None:
+        """Snapshots the simulation and hands the snapshot over to the writer thread.
+
+            Raises:
+                Exception: The error of an earlier write, which has failed.
+        """
+        while self._pending and self._pending[0].done():
+            self._pending.popleft().result()
+        if len(self._pending) > 1:
+            self.blocked += 1
+            self._pending.popleft().result()
+        meta, columns = snapshot(simulation, self.rng)
+        self._pending.append(self._executor.submit(self._write, meta, columns))
+
+    def _write(self, meta: Dict[str, Any], columns: np.ndarray) -> None:
+        write(self.path, meta, columns)
+        self.saved += 1
+
+    def wait(self) -> None:
+        """Blocks until the pending checkpoints are written, raising the error of the first one, which has failed."""
+        while self._pending:
+            self._pending.popleft().result()
+
+    def close(self) -> None:
+        self.wait()
+        self._executor.shutdown()
+
+    def __enter__(self) -> "Checkpointer":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
@@ -1,7 +1,14 @@
 from abc import ABC, abstractmethod
-from datetime import datetime
-from typing import List, Any
+from array import array
+from collections.abc import Mapping, MutableMapping
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterable, List, Any, Optional
+from dataclasses import dataclass, field
+import bisect
+import heapq
 import itertools
+import threading
+from types import MappingProxyType
 
 
 class Seminar:
@@ -48,6 +55,21 @@ class Seminar:
         return f"The comment {str} is added."
 
 
+@dataclass
+class EnrollmentResult:
+    """Outcome of a bulk enrollment.
+
+        Attributes:
+            enrolled (List[Any]): Students, who have been enrolled, in order.
+            rejected_full (List[Any]): Students, who didn't get a seat.
+            already_enrolled (List[Any]): Students, who were enrolled before or are repeated in the batch.
+    """
+
+    enrolled: List[Any] = field(default_factory=list)
+    rejected_full: List[Any] = field(default_factory=list)
+    already_enrolled: List[Any] = field(default_factory=list)
+
+
 class Course(ABC):
     @abstractmethod
     def add_student(self, student: Any) -> None:
@@ -59,6 +81,421 @@ class Course(ABC):
         """ Abstract method """
         pass
 
+    def add_students(self, students: Iterable[Any], registry: Optional["EnrollmentRegistry"] = None) -> EnrollmentResult:
+        """Enrolls students into a course at once, without printing
+
+            Arguments:
+                students (Iterable[Student]): Students, which should be enrolled, in order of priority
+                registry (EnrollmentRegistry): Registry of the enrollments, the module-wide one by default
+
+            Returns:
+                EnrollmentResult
+        """
+        return (registry or REGISTRY).enroll_many(students, self)
+
+    @property
+    def assignments(self) -> Any:
+        """Course's assignments, they can be edited in place like a dict"""
+        return self.__dict__.get("_assignments")
+
+    @assignments.setter
+    def assignments(self, assignments: Any) -> None:
+        self._template = None
+        self._assignments = CourseAssignments(self, assignments) if isinstance(assignments, Mapping) else assignments
+
+    @property
+    def template(self) -> "AssignmentTemplate":
+        """Template of the course's assignments, shared by the progresses of its students
+
+            It is built on first use and again after the assignments are edited, the
+            progresses made before keep the template they were made from.
+
+            Returns:
+                AssignmentTemplate
+        """
+        template = self.__dict__.get("_template")
+        if template is None:
+            template = self._template = AssignmentTemplate(self.assignments)
+        return template
+
+
+class AssignmentTemplate:
+    """Assignments of a course, without the marks, shared by the progresses of all its students.
+
+        The fields of the assignments are read-only, a progress keeps its own "is_done"
+        and "mark" of every assignment in arrays indexed by the position of the
+        assignment in the template.
+
+        Attributes:
+            names (tuple): Keys of the assignments, in order.
+            fields (tuple): Read-only fields of every assignment, without "is_done" and "mark".
+            positions (Mapping): Position of every key.
+            marks (tuple): Initial mark of every assignment.
+            done (tuple): Initial "is_done" of every assignment.
+            assignments (Mapping): Read-only copy of the assignments, with the initial marks,
+                or the assignments as given, if they aren't a dict.
+    """
+
+    __slots__ = ("names", "fields", "positions", "marks", "done", "assignments", "_by_date", "_arrays")
+
+    def __init__(self, assignments: Any) -> None:
+        """AssignmentTemplate initializer, copies the fields of the assignments."""
+        tasks = assignments if isinstance(assignments, Mapping) else {}
+        self.names = tuple(tasks)
+        self.fields = tuple(MappingProxyType({key: value for key, value in task.items()
+                                              if key not in ("is_done", "mark")})
+                            for task in tasks.values())
+        self.positions = MappingProxyType({name: position for position, name in enumerate(self.names)})
+        self.marks = tuple(float(task.get("mark", 0.0)) for task in tasks.values())
+        self.done = tuple(bool(task.get("is_done", False)) for task in tasks.values())
+        self.assignments = (MappingProxyType({name: MappingProxyType(dict(task)) for name, task in tasks.items()})
+                            if isinstance(assignments, Mapping) else assignments)
+        self._by_date = None
+        # Initial arrays of a progress, copied rather than converted for every student.
+        self._arrays = (array("d", self.marks), array("b", self.done))
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    @staticmethod
+    def date_of(name: Any, fields: Any, default: datetime) -> datetime:
+        """Date of an assignment: its key, if that is a datetime, or else its "date" field, or else the default."""
+        if isinstance(name, datetime):
+            return name
+        return fields.get("date") or default
+
+    def by_date(self, default: datetime) -> tuple:
+        """Sorts the assignments by date, the same order for every progress.
+
+            Arguments:
+                default (datetime): Date of the undated assignments.
+
+            Returns:
+                The sorted dates, the positions in date order and the slot in date order of every position.
+        """
+        cached = self._by_date
+        if cached is None or cached[0] != default:
+            dates = [self.date_of(name, fields, default) for name, fields in zip(self.names, self.fields)]
+            order = sorted(range(len(dates)), key=dates.__getitem__)
+            slots = array("l", bytes(array("l").itemsize * len(order)))
+            for slot, position in enumerate(order):
+                slots[position] = slot
+            cached = self._by_date = (default, [dates[position] for position in order], array("l", order), slots)
+        return cached[1:]
+
+
+class CourseTask(MutableMapping):
+    """Assignment of a course, editing it rebuilds the template of the course."""
+
+    __slots__ = ("_course", "_task")
+
+    def __init__(self, course: Course, task: dict) -> None:
+        self._course = course
+        self._task = task
+
+    def __getitem__(self, key: str) -> Any:
+        return self._task[key]
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        self._task[key] = value
+        self._course._template = None
+
+    def __delitem__(self, key: str) -> None:
+        del self._task[key]
+        self._course._template = None
+
+    def __iter__(self):
+        return iter(self._task)
+
+    def __len__(self) -> int:
+        return len(self._task)
+
+    def __repr__(self) -> str:
+        return repr(self._task)
+
+
+class CourseAssignments(MutableMapping):
+    """Assignments of a course, kept as copies of the given ones.
+
+        Every edit, of an assignment or of one of its fields, rebuilds the template of
+        the course on its next use.
+    """
+
+    __slots__ = ("_course", "_tasks")
+
+    def __init__(self, course: Course, assignments: Mapping) -> None:
+        self._course = course
+        self._tasks = {name: dict(task) for name, task in assignments.items()}
+
+    def __getitem__(self, name: Any) -> CourseTask:
+        return CourseTask(self._course, self._tasks[name])
+
+    def __setitem__(self, name: Any, task: dict) -> None:
+        self._tasks[name] = dict(task)
+        self._course._template = None
+
+    def __delitem__(self, name: Any) -> None:
+        del self._tasks[name]
+        self._course._template = None
+
+    def __contains__(self, name: Any) -> bool:
+        return name in self._tasks
+
+    def __iter__(self):
+        return iter(self._tasks)
+
+    def __len__(self) -> int:
+        return len(self._tasks)
+
+    def __repr__(self) -> str:
+        return repr(self._tasks)
+
+
+class Assignment(MutableMapping):
+    """Assignment of one progress: the fields of the template with the progress's own "is_done" and "mark".
+
+        It is bound to the key of the assignment, so it keeps working after other
+        assignments are added to or removed from the progress, and raises KeyError
+        once its own assignment is removed.
+    """
+
+    __slots__ = ("_progress", "_name", "_template", "_slot")
+
+    def __init__(self, progress: "CourseProgress", name: Any) -> None:
+        self._progress = progress
+        self._name = name
+        self._template = progress.template
+        self._slot = progress.template.positions[name]
+
+    @property
+    def _position(self) -> int:
+        """Position of the assignment in the current template of the progress."""
+        template = self._progress.template
+        if template is not self._template:
+            if self._name not in template.positions:
+                raise KeyError(f"Assignment {self._name!r} has been removed from the progress")
+            self._template, self._slot = template, template.positions[self._name]
+        return self._slot
+
+    def __getitem__(self, key: str) -> Any:
+        if key == "mark":
+            return self._progress.marks[self._position]
+        if key == "is_done":
+            return bool(self._progress.done[self._position])
+        return self._progress.template.fields[self._position][key]
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        if key == "mark":
+            self._progress._set_mark(self._position, float(value))
+        elif key == "is_done":
+            self._progress.done[self._position] = bool(value)
+        else:
+            raise TypeError(f"Field {key!r} is shared by the course, only 'is_done' and 'mark' can be changed")
+
+    def __delitem__(self, key: str) -> None:
+        raise TypeError("Fields of an assignment can't be removed")
+
+    def __iter__(self):
+        yield from self._progress.template.fields[self._position]
+        yield "is_done"
+        yield "mark"
+
+    def __len__(self) -> int:
+        return len(self._progress.template.fields[self._position]) + 2
+
+    def __repr__(self) -> str:
+        return repr(dict(self))
+
+
+class Assignments(MutableMapping):
+    """Assignments of one CourseProgress, read from its template and its arrays of marks.
+
+        Adding or removing an assignment gives the progress a template of its own.
+    """
+
+    __slots__ = ("_progress",)
+
+    def __init__(self, progress: "CourseProgress") -> None:
+        self._progress = progress
+
+    def __getitem__(self, name: Any) -> Assignment:
+        return Assignment(self._progress, name)
+
+    def __setitem__(self, name: Any, task: dict) -> None:
+        tasks = {key: dict(self[key]) for key in self}
+        tasks[name] = task
+        self._progress._load(AssignmentTemplate(tasks))
+
+    def __delitem__(self, name: Any) -> None:
+        if name not in self._progress.template.positions:
+            raise KeyError(name)
+        self._progress._load(AssignmentTemplate({key: dict(self[key]) for key in self if key != name}))
+
+    def __contains__(self, name: Any) -> bool:
+        return name in self._progress.template.positions
+
+    def __iter__(self):
+        return iter(self._progress.template.names)
+
+    def __len__(self) -> int:
+        return len(self._progress.template.names)
+
+    def clear(self) -> None:
+        self._progress._load(AssignmentTemplate({}))
+
+    def __repr__(self) -> str:
+        return repr({name: dict(task) for name, task in self.items()})
+
+
+_REMOVED = object()
+
+
+class NotesLog(MutableMapping):
+    """Notes of a progress, ordered by the time they were written.
+
+        Keys are datetimes, which only grow: a note written in the same microsecond as
+        the previous one, or after the clock went back, gets the previous key plus a
+        microsecond, so no note overwrites another. Lookups and range queries bisect
+        the sorted keys. Removed and evicted notes leave gaps, which are compacted
+        once they outnumber the notes, so eviction is amortised constant time.
+
+        Attributes:
+            max_count (int): Number of notes kept, the oldest are evicted first, None to keep all.
+            max_age (timedelta): Notes older than this before the newest one are evicted, None to keep them.
+    """
+
+    __slots__ = ("max_count", "max_age", "_keys", "_notes", "_start", "_live")
+
+    def __init__(self, max_count: Optional[int] = None, max_age: Optional[timedelta] = None) -> None:
+        """NotesLog initializer."""
+        self.max_count = max_count
+        self.max_age = max_age
+        self._keys: List[datetime] = []
+        self._notes: List[Any] = []
+        # Slots before _start are evicted, after it removed notes hold _REMOVED.
+        self._start = 0
+        self._live = 0
+
+    def append(self, note: Any, at: Optional[datetime] = None) -> datetime:
+        """Adds a note, evicting the ones past the retention.
+
+            Args:
+                note (Any): Note to add.
+                at (datetime): Time of the note, now by default.
+
+            Returns:
+                Key of the note, later than the key of every note written before.
+        """
+        key = at or datetime.now()
+        if self._keys and key <= self._keys[-1]:
+            key = self._keys[-1] + timedelta(microseconds=1)
+        self._keys.append(key)
+        self._notes.append(note)
+        self._live += 1
+        self.evict(key)
+        return key
+
+    def evict(self, now: Optional[datetime] = None) -> None:
+        """Drops the oldest notes over ``max_count`` and the ones older than ``max_age`` before ``now``.
+
+            Args:
+                now (datetime): Time the age is measured from, the newest key by default.
+        """
+        if now is None:
+            now = self._keys[-1] if self._keys else datetime.now()
+        oldest = None if self.max_age is None else now - self.max_age
+        keys, notes = self._keys, self._notes
+        start = self._start
+        while start < len(keys):
+            if notes[start] is not _REMOVED:
+                if ((self.max_count is None or self._live <= self.max_count)
+                        and (oldest is None or keys[start] >= oldest)):
+                    break
+                self._live -= 1
+            start += 1
+        self._start = start
+        self._compact()
+
+    def _compact(self) -> None:
+        if len(self._keys) > 2 * self._live + 16:
+            live = [(key, note) for key, note in zip(self._keys[self._start:], self._notes[self._start:])
+                    if note is not _REMOVED]
+            self._keys = [key for key, _ in live]
+            self._notes = [note for _, note in live]
+            self._start = 0
+
+    def _find(self, key: datetime) -> int:
+        i = bisect.bisect_left(self._keys, key, self._start)
+        if i < len(self._keys) and self._keys[i] == key and self._notes[i] is not _REMOVED:
+            return i
+        raise KeyError(key)
+
+    def __getitem__(self, key: datetime) -> Any:
+        return self._notes[self._find(key)]
+
+    def __setitem__(self, key: datetime, note: Any) -> None:
+        """Replaces the note of a key, or adds one, which is slower unless the key is the latest."""
+        i = bisect.bisect_left(self._keys, key, self._start)
+        if i < len(self._keys) and self._keys[i] == key:
+            self._live += self._notes[i] is _REMOVED
+            self._notes[i] = note
+        else:
+            self._keys.insert(i, key)
+            self._notes.insert(i, note)
+            self._live += 1
+        self.evict(max(key, self._keys[-1]))
+
+    def __delitem__(self, key: datetime) -> None:
+        self._notes[self._find(key)] = _REMOVED
+        self._live -= 1
+        self._compact()
+
+    def __iter__(self):
+        for key, note in zip(self._keys[self._start:], self._notes[self._start:]):
+            if note is not _REMOVED:
+                yield key
+
+    def __len__(self) -> int:
+        return self._live
+
+    def range(self, start: Optional[datetime] = None, stop: Optional[datetime] = None) -> List[tuple]:
+        """Returns the keys and notes with ``start <= key < stop``, in order.
+
+            Args:
+                start (datetime): Earliest key, from the oldest note by default.
+                stop (datetime): Key to stop before, up to the newest note by default.
+
+            Returns:
+                List of (key, note) pairs.
+        """
+        lo = self._start if start is None else bisect.bisect_left(self._keys, start, self._start)
+        hi = len(self._keys) if stop is None else bisect.bisect_left(self._keys, stop, lo)
+        return [(key, note) for key, note in zip(self._keys[lo:hi], self._notes[lo:hi]) if note is not _REMOVED]
+
+    def pages(self, size: int, start: Optional[datetime] = None, stop: Optional[datetime] = None):
+        """Iterates over the notes of a range in lists of at most ``size`` pairs.
+
+            Each page is looked up after the last key of the previous one, so notes may
+            be added or removed between pages.
+        """
+        if size < 1:
+            raise ValueError("A page holds at least one note")
+        after = None
+        while True:
+            if after is None:
+                lo = self._start if start is None else bisect.bisect_left(self._keys, start, self._start)
+            else:
+                lo = bisect.bisect_right(self._keys, after, self._start)
+            hi = len(self._keys) if stop is None else bisect.bisect_left(self._keys, stop, lo)
+            page = []
+            while lo < hi and len(page) < size:
+                if self._notes[lo] is not _REMOVED:
+                    page.append((self._keys[lo], self._notes[lo]))
+                lo += 1
+            if not page:
+                return
+            yield page
+            after = page[-1][0]
 
 
 class CourseProgress:
@@ -68,8 +505,35 @@ class CourseProgress:
             title (str): Course's name.
             received_marks (dict): Dictionary of the marks, student has received.
             visited_lectures (int): Number of lectures, student has visited.
-            completed_assignments (dict): Assignments, student has completed (or not).
-            notes (dict): Notes about CourseProgress
+            completed_assignments (Mapping): Assignments, student has completed (or not).
+            notes (NotesLog): Notes about CourseProgress, by the time they were left.
+            template (AssignmentTemplate): Fields of the assignments, shared with the other
+                students of the course.
+            marks (array): Mark of every assignment, by its position in the template.
+            done (array): Whether every assignment is done, by its position in the template.
+
+        A progress made from the assignments of its course shares the template of the
+        course, the marks are its own, so checking the assignments of one student
+        doesn't change the marks of another. Adding or removing an assignment gives
+        the progress a template of its own.
+
+        The final mark is a float sum of the marks in the order of the assignments,
+        bit for bit the one of a scan. Its running prefix sums are kept between calls
+        and only recomputed from the earliest assignment, whose mark has changed, so
+        repeated calls and marks changed at the end don't rescan the assignments.
+
+        For the marks to a date, the assignments are sorted by date, ties in their
+        order, with float prefix sums of their marks kept the same way, so the sum to a
+        date is the one of a scan over the assignments in date order, which is the
+        scan in their order whenever they are listed by date, as undated ones always
+        are. The date of an assignment is its key, if that is a datetime, or else its
+        "date" field, or else the start date of the course. The order is shared through
+        the template, and a query only extends the prefix sums up to its date.
+
+        A changed mark costs O(1), it only marks the prefix sums from its position
+        stale. No float sum can be updated in place bit for bit, as the new mark
+        changes the rounding of every later partial sum, so the first query after it
+        recomputes them from there.
 
         """
 
@@ -78,9 +542,131 @@ class CourseProgress:
         self.title = title
         self.received_marks = {}
         self.visited_lectures = 0
-        self.completed_assignments = completed_assignments
-        self.notes = {}
         self.course = course
+        template = getattr(course, "template", None)
+        if template is None or completed_assignments is not course.assignments:
+            template = AssignmentTemplate(completed_assignments)
+        self._load(template)
+        self._notes = None
+
+    @property
+    def marks(self) -> array:
+        """Mark of every assignment, by its position in the template."""
+        if self._marks is None:
+            self._marks = self.template._arrays[0][:]
+        return self._marks
+
+    @property
+    def done(self) -> array:
+        """Whether every assignment is done, by its position in the template."""
+        if self._done is None:
+            self._done = self.template._arrays[1][:]
+        return self._done
+
+    @property
+    def completed_assignments(self) -> "Assignments":
+        """Assignments, student has completed (or not), a view of the template and the marks."""
+        return Assignments(self)
+
+    @property
+    def notes(self) -> "NotesLog":
+        """Notes about the course, the log is created on first use."""
+        if self._notes is None:
+            self._notes = NotesLog()
+        return self._notes
+
+    @notes.setter
+    def notes(self, notes: "NotesLog") -> None:
+        self._notes = notes
+
+    def _load(self, template: AssignmentTemplate) -> None:
+        """Starts from the initial marks of the template."""
+        self.template = template
+        # Copied from the template on first use.
+        self._marks = self._done = None
+        # Filled by _index, empty until the first query by date.
+        self._dates = ()
+        self._order = self._slots = ()
+        self._date_sums = ()
+        self._dated = 0
+        # Running sums of the marks, valid for the first _summed positions, allocated on first use.
+        self._sums = None
+        self._summed = 0
+        self._marks_count = len(template.names)
+        self._indexed = False
+
+    def _recount(self) -> None:
+        """Drops the running sums after the marks were written in bulk."""
+        self._summed = 0
+        self._marks_count = len(self.template)
+        self._indexed = False
+
+    def _set_mark(self, position: int, mark: float) -> None:
+        """Sets a mark, marking the running sums stale from its position on."""
+        self.marks[position] = mark
+        self._summed = min(self._summed, position)
+        if self._indexed:
+            self._dated = min(self._dated, self._slots[position])
+
+    def _date_of(self, name: Any, task: Any) -> datetime:
+        return AssignmentTemplate.date_of(name, task, self.course.start_date)
+
+    def _index(self) -> None:
+        """Sorts the assignments by date, the prefix sums are filled by the queries."""
+        self._dates, self._order, self._slots = self.template.by_date(self.course.start_date)
+        self._date_sums = array("d", bytes(8 * len(self._order)))
+        self._dated = 0
+        self._indexed = True
+
+    def _total(self) -> float:
+        """Returns the float sum of the marks in the order of the assignments."""
+        n = len(self.marks)
+        if self._sums is None or len(self._sums) != n:
+            self._sums, self._summed = array("d", bytes(8 * n)), 0
+        total = self._sums[self._summed - 1] if self._summed else 0.0
+        for position in range(self._summed, n):
+            total += self.marks[position]
+            self._sums[position] = total
+        self._summed = n
+        return total
+
+    def _prefix(self, size: int) -> float:
+        """Returns the float sum of the marks of the ``size`` earliest assignments, in date order."""
+        if size > self._dated:
+            total = self._date_sums[self._dated - 1] if self._dated else 0.0
+            for slot in range(self._dated, size):
+                total += self.marks[self._order[slot]]
+                self._date_sums[slot] = total
+            self._dated = size
+        return self._date_sums[size - 1] if size else 0.0
+
+    def check_aggregates(self) -> bool:
+        """Checks the running sums and count of the marks against full scans of the assignments.
+
+                The final sum is checked against a scan in the order of the assignments,
+                the sums to every date against a scan in date order.
+
+                Returns:
+                    True, if they match, and false, if not.
+
+                """
+        tasks = list(self.completed_assignments.items())
+        total = 0.0
+        for name, task in tasks:
+            total += task["mark"]
+        if self._marks_count != len(tasks) or self._total() != total:
+            return False
+        if not self._indexed:
+            return True
+        dates = [self._date_of(name, task) for name, task in tasks]
+        if self._dates != sorted(dates):
+            return False
+        total = 0.0
+        for size, position in enumerate(sorted(range(len(tasks)), key=dates.__getitem__), 1):
+            total += tasks[position][1]["mark"]
+            if self._prefix(size) != total:
+                return False
+        return True
 
     def get_progress_to_date(self, date: datetime) -> str:
         """Returns a grade before date in arguments.
@@ -92,15 +678,31 @@ class CourseProgress:
                     The relation between the sum of grades and their quantity.
 
                 """
-        grades = 0.0
-        i = 0.0
-        for task_date, task in self.completed_assignments.items():
-            if self.course.start_date <= date:
-                grades += task["mark"]
-                i += 1.0
-        if i == 0.0:
-            i = 1.0
-        return grades / i
+        if not self._indexed:
+            self._index()
+        count = bisect.bisect_right(self._dates, date)
+        return self._prefix(count) / max(count, 1)
+
+    def progress_over_dates(self, dates: Iterable[datetime]) -> List[float]:
+        """Returns the grades before every date, like get_progress_to_date, in one pass over the assignments.
+
+                Arguments:
+                    dates (Iterable[datetime]): Dates in any order.
+
+                Returns:
+                    The grades in the order of the dates.
+
+                """
+        if not self._indexed:
+            self._index()
+        dates = list(dates)
+        grades = [0.0] * len(dates)
+        slot = 0
+        for i in sorted(range(len(dates)), key=dates.__getitem__):
+            while slot < len(self._dates) and self._dates[slot] <= dates[i]:
+                slot += 1
+            grades[i] = self._prefix(slot) / max(slot, 1)
+        return grades
 
     def get_final_mark(self) -> float:
         """Returns a final grade.
@@ -112,25 +714,19 @@ class CourseProgress:
                     The relation between the sum of grades and their quantity.
 
                     """
-        final_mark = 0.0
-        i = 0.0
-        for mark, task in self.completed_assignments.items():
-            final_mark += task["mark"]
-            i += 1.0
-        final_mark /= i
-        return final_mark
-
-    def fill_notes(self, note: str) -> None:
+        return self._total() / float(self._marks_count)
+
+    def fill_notes(self, note: str) -> datetime:
         """Leave a note about course.
 
                Args:
                    note (str): Note that is attached
 
                Returns:
-                   None.
+                   Date of the note, unique for the progress.
 
                """
-        self.notes[datetime.now()] = note
+        return self.notes.append(note)
 
     def remove_note(self, date: datetime) -> None:
         """Delete a note about course for the date.
@@ -145,10 +741,298 @@ class CourseProgress:
         del self.notes[date]
 
 
+class Waitlist:
+    """Students waiting for a seat in a course, held in a heap.
+
+        Attributes:
+            key (Callable): Priority of a student, lower goes first. By default students
+                are served in the order they joined, ties are broken the same way.
+            heap (List[list]): Entries of [priority, order, student], left students are set to None.
+    """
+
+    def __init__(self, key: Optional[Callable[[Any], Any]] = None) -> None:
+        """Waitlist initializer."""
+        self.key = key
+        self.heap: List[list] = []
+        self._entries: Dict[int, list] = {}
+        self._order = itertools.count()
+
+    def push(self, student: Any) -> bool:
+        """Adds the student in O(log n), returns false, if they are already waiting."""
+        if student in self:
+            return False
+        order = next(self._order)
+        entry = [order if self.key is None else self.key(student), order, student]
+        self._entries[student.personal_info.id_] = entry
+        heapq.heappush(self.heap, entry)
+        return True
+
+    def pop(self) -> Optional[Any]:
+        """Removes and returns the first student in O(log n), or None if nobody is waiting."""
+        while self.heap:
+            student = heapq.heappop(self.heap)[2]
+            if student is not None:
+                del self._entries[student.personal_info.id_]
+                return student
+        return None
+
+    def remove(self, student: Any) -> bool:
+        """Takes the student off the list in O(1), the entry is dropped once it reaches the top."""
+        entry = self._entries.get(student.personal_info.id_)
+        if entry is None or entry[2] is not student:
+            return False
+        del self._entries[student.personal_info.id_]
+        entry[2] = None
+        return True
+
+    def __contains__(self, student: Any) -> bool:
+        entry = self._entries.get(student.personal_info.id_)
+        return entry is not None and entry[2] is student
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class EnrollmentRegistry:
+    """Hash indexes of the enrollments, keyed by course and student id.
+
+        ``course.students`` and ``student.courses`` stay plain lists, the registry keeps
+        the position of every enrollment in both of them, so enrolling and membership
+        checks don't scan the lists. Unenrolling keeps the order of both lists, so it
+        shifts the positions of the entries after the removed one. Entries are checked
+        against the lists before use.
+
+        As before, a student can't be enrolled in two courses of the same title, so the
+        courses of a student are indexed by title.
+
+        The registry is thread-safe: every course and every student has its own lock,
+        so the seat check and the reservation are atomic without serialising unrelated
+        courses. A course lock is always taken before a student lock, never after.
+
+        A course with a waitlist puts the students, who find it full, on the list, and
+        every seat freed by ``unenroll`` goes to the first of them. Promotions are
+        reported to the callbacks added with ``on_promote``, outside of the locks.
+
+        Attributes:
+            students_of (Dict[Course, Dict[int, int]]): Positions in ``course.students``, by course and student id.
+            courses_of (Dict[int, Dict[str, int]]): Positions in ``student.courses``, by student id and course title.
+            waitlists (Dict[Course, Waitlist]): Waitlists, by course.
+    """
+
+    def __init__(self) -> None:
+        """EnrollmentRegistry initializer."""
+        self.students_of: Dict[Course, Dict[int, int]] = {}
+        self.courses_of: Dict[int, Dict[str, int]] = {}
+        self.waitlists: Dict[Course, Waitlist] = {}
+        self._listeners: List[Callable[[Any, Course], None]] = []
+        self._course_locks: Dict[Course, threading.Lock] = {}
+        self._student_locks: Dict[int, threading.Lock] = {}
+
+    def _course_lock(self, course: Course) -> threading.Lock:
+        lock = self._course_locks.get(course)
+        # setdefault is atomic, so racing threads end up with the same lock.
+        return lock or self._course_locks.setdefault(course, threading.Lock())
+
+    def _student_lock(self, student: Any) -> threading.Lock:
+        lock = self._student_locks.get(student.personal_info.id_)
+        return lock or self._student_locks.setdefault(student.personal_info.id_, threading.Lock())
+
+    def waitlist(self, course: Course, key: Optional[Callable[[Any], Any]] = None, create: bool = True) -> Waitlist:
+        """Returns the waitlist of the course, creating it with the given priority if there's none.
+
+            Args:
+                course (Course): Course, the waitlist belongs to.
+                key (Callable): Priority of a student, lower goes first, e.g.
+                    ``lambda student: -student.average_mark``. Defaults to the order of joining.
+                create (bool): Whether a missing waitlist is created, or an empty one returned.
+
+            Returns:
+                Waitlist
+        """
+        waitlist = self.waitlists.get(course)
+        if waitlist is None:
+            if not create:
+                return Waitlist()
+            waitlist = self.waitlists.setdefault(course, Waitlist(key))
+        return waitlist
+
+    def on_promote(self, callback: Callable[[Any, Course], None]) -> None:
+        """Calls ``callback(student, course)`` whenever a student is promoted from a waitlist."""
+        self._listeners.append(callback)
+
+    @staticmethod
+    def _position(index: Dict[Any, int], key: Any, items: List[Any], item: Any) -> Optional[int]:
+        position = index.get(key)
+        if position is not None and position < len(items) and items[position] is item:
+            return position
+        return None
+
+    @staticmethod
+    def _remove(index: Dict[Any, int], key: Callable[[Any], Any], items: List[Any], position: int) -> None:
+        """Removes the item at the position, keeping the order, and shifts the positions after it."""
+        del items[position]
+        for shifted, item in enumerate(items[position:], position):
+            if index.get(key(item)) == shifted + 1:
+                index[key(item)] = shifted
+
+    def _has_title(self, student: Any, title: str) -> bool:
+        """Checks whether the student is enrolled in a course of the title, the caller holds the student lock."""
+        position = self.courses_of.get(student.personal_info.id_, {}).get(title)
+        return position is not None and position < len(student.courses) and student.courses[position].title == title
+
+    def is_enrolled(self, student: Any, course: Course) -> bool:
+        """Checks whether the student is enrolled in the course.
+
+            Args:
+                student (Student): Student, who should be checked.
+                course (Course): Course, which should be checked.
+
+            Returns:
+                True, if the student is enrolled, and false, if not.
+        """
+        return self._position(self.students_of.get(course, {}), student.personal_info.id_,
+                              course.students, student) is not None
+
+    def enroll(self, student: Any, course: Course) -> bool:
+        """Adds the student to the course and the course to the student, if there's a free seat.
+
+            Args:
+                student (Student): Student, who needs to be enrolled.
+                course (Course): Course, the student is enrolled in.
+
+            Returns:
+                True, if the student has been enrolled, and false, if the course is full.
+
+            Raises:
+                ValueError: The student is already enrolled in the course, or in another one of the same title.
+        """
+        with self._course_lock(course):
+            if self.is_enrolled(student, course):
+                raise ValueError("The student has already enrolled in this course")
+            if len(course.students) >= course.limit:
+                waitlist = self.waitlists.get(course)
+                if waitlist is not None:
+                    waitlist.push(student)
+                return False
+            if not self._seat(student, course):
+                raise ValueError("The student has already enrolled in this course")
+        return True
+
+    def _seat(self, student: Any, course: Course) -> bool:
+        """Enrolls the student, the caller holds the course lock and has checked the seat.
+
+            Returns:
+                True, if the student has been enrolled, and false, if they are enrolled in
+                another course of the same title.
+        """
+        with self._student_lock(student):
+            if self._has_title(student, course.title):
+                return False
+            self.students_of.setdefault(course, {})[student.personal_info.id_] = len(course.students)
+            course.students.append(student)
+            self.courses_of.setdefault(student.personal_info.id_, {})[course.title] = len(student.courses)
+            student.courses.append(course)
+            student.course_progress.append(CourseProgress(course.title, course.assignments, course))
+        return True
+
+    def enroll_many(self, students: Iterable[Any], course: Course) -> EnrollmentResult:
+        """Enrolls a batch of students, checking the capacity once and reserving the seats in one step.
+
+            Args:
+                students (Iterable[Student]): Students, who need to be enrolled, in order of priority.
+                course (Course): Course, the students are enrolled in.
+
+            Returns:
+                EnrollmentResult, the rejected students are on the waitlist, if the course has one.
+        """
+        with self._course_lock(course):
+            return self._enroll_many(students, course)
+
+    def _enroll_many(self, students: Iterable[Any], course: Course) -> EnrollmentResult:
+        result = EnrollmentResult()
+        enrolled, rejected, repeated = result.enrolled, result.rejected_full, result.already_enrolled
+        index = self.students_of.setdefault(course, {})
+        current = course.students
+        start = len(current)
+        free = course.limit - start
+        title = course.title
+        assignments, courses_of = course.assignments, self.courses_of
+        seen = set()
+        for student in students:
+            id_ = student.personal_info.id_
+            position = index.get(id_)
+            if id_ in seen or (position is not None and position < start and current[position] is student):
+                repeated.append(student)
+                continue
+            if len(enrolled) >= free:
+                rejected.append(student)
+                continue
+            courses = courses_of.get(id_)
+            if courses is None:
+                courses = courses_of.setdefault(id_, {})
+            with self._student_lock(student):
+                # _has_title, inlined: the loop runs once per student of the batch.
+                taken, listed = courses.get(title), student.courses
+                if taken is not None and taken < len(listed) and listed[taken].title == title:
+                    repeated.append(student)
+                    continue
+                courses[title] = len(listed)
+                listed.append(course)
+                student.course_progress.append(CourseProgress(title, assignments, course))
+            seen.add(id_)
+            index[id_] = len(current)
+            current.append(student)
+            enrolled.append(student)
+        waitlist = self.waitlists.get(course)
+        if waitlist is not None:
+            for student in rejected:
+                waitlist.push(student)
+        return result
+
+    def unenroll(self, student: Any, course: Course) -> bool:
+        """Removes the student from the course and the course from the student.
+
+            Args:
+                student (Student): Student, who needs to be unenrolled.
+                course (Course): Course, the student is unenrolled from.
+
+            Returns:
+                True, if the student has been unenrolled, and false, if they weren't enrolled.
+        """
+        id_ = student.personal_info.id_
+        promoted = []
+        with self._course_lock(course):
+            students = self.students_of.get(course, {})
+            position = self._position(students, id_, course.students, student)
+            if position is None:
+                return False
+            del students[id_]
+            self._remove(students, lambda other: other.personal_info.id_, course.students, position)
+            with self._student_lock(student):
+                courses = self.courses_of.get(id_, {})
+                position = self._position(courses, course.title, student.courses, course)
+                if position is not None:
+                    del courses[course.title]
+                    self._remove(courses, lambda other: other.title, student.courses, position)
+            waitlist = self.waitlists.get(course)
+            while waitlist and len(course.students) < course.limit:
+                waiting = waitlist.pop()
+                if not self.is_enrolled(waiting, course) and self._seat(waiting, course):
+                    promoted.append(waiting)
+        for waiting in promoted:
+            for callback in self._listeners:
+                callback(waiting, course)
+        return True
+
+
+REGISTRY = EnrollmentRegistry()
+
+
 class Enrollment:
-    def __init__(self, student: Any, course: Course):
+    def __init__(self, student: Any, course: Course, registry: Optional[EnrollmentRegistry] = None):
         self.student = student
         self.course = course
+        self.registry = registry or REGISTRY
 
     def enroll(self) -> None:
         """Enrolls a student in a course
@@ -161,16 +1045,10 @@ class Enrollment:
 
         """
         try:
-            for i in self.student.courses:
-                if i.title == self.course.title:
-                    raise ValueError("The student has already enrolled in this course")
-            if len(self.course.students) < self.course.limit:
-                course_progress = CourseProgress(title=self.course.title, completed_assignments=self.course.assignments,
-                                                 course=self.course)
-                self.student.courses.append(self.course)
-                self.student.course_progress.append(course_progress)
-                self.course.students.append(self.student)
+            if self.registry.enroll(self.student, self.course):
                 print(f"Student {self.student.personal_info.name} has enrolled into {self.course.title}")
+            elif self.student in self.registry.waitlist(self.course, create=False):
+                print(f"Student {self.student.personal_info.name} has been put on the waitlist of {self.course.title}")
             else:
                 print(
                     f"Student {self.student.personal_info.name} can't enroll in this course, because the limit of "
@@ -188,16 +1066,8 @@ class Enrollment:
                  None.
 
         """
-        for i, student in enumerate(self.course.students):
-            if student.personal_info.id_ == id:
-                self.course.students.pop(i)
-                for j in self.student.courses:
-                    if j.title == self.course.title:
-                        # student.unenroll(title=self.course.title)
-                        self.student.courses.pop(i)
-                        print(f"Student {self.student.personal_info.name} has unenrolled from {self.course.title}")
-                        break
-                break
+        if self.student.personal_info.id_ == id and self.registry.unenroll(self.student, self.course):
+            print(f"Student {self.student.personal_info.name} has unenrolled from {self.course.title}")
 
 
 class Math(Course):
@@ -0,0 +1,349 @@
+import multiprocessing
+from math import ceil
+from multiprocessing import shared_memory
+from threading import BrokenBarrierError
+from typing import Optional, Tuple
+
+import numpy as np
+
+from ball import BallArray, Container, SpatialHash
+
+# Columns of a ball in the shared buffer, the id keeps the order of the original swarm.
+FIELDS = ("x", "y", "radius", "velocity", "direction", "delta_x", "delta_y", "id")
+X, DELTA_X, DELTA_Y, ID = 0, 5, 6, 7
+
+
+def _views(buffer, workers: int, capacity: int) -> Tuple[np.ndarray, ...]:
+    """Splits the shared buffer into the strips, their outboxes, the counters and the strip edges.
+
+        Returns:
+            Balls of every strip and balls leaving it, both shaped (workers, fields, capacity),
+            destinations of the leaving balls, shaped (workers, capacity), the number of
+            balls, of leaving balls and of staying balls of every strip, the number of balls
+            every strip sends to every other, shaped (workers, workers), and the
+            ``workers + 1`` edges.
+    """
+    size = workers * len(FIELDS) * capacity
+    strips = np.ndarray((workers, len(FIELDS), capacity), dtype=np.float64, buffer=buffer)
+    outbox = np.ndarray((workers, len(FIELDS), capacity), dtype=np.float64, buffer=buffer, offset=size * 8)
+    offset = 2 * size * 8
+    destination = np.ndarray((workers, capacity), dtype=np.int64, buffer=buffer, offset=offset)
+    offset += workers * capacity * 8
+    counts = np.ndarray(workers, dtype=np.int64, buffer=buffer, offset=offset)
+    leaving = np.ndarray(workers, dtype=np.int64, buffer=buffer, offset=offset + workers * 8)
+    staying = np.ndarray(workers, dtype=np.int64, buffer=buffer, offset=offset + 2 * workers * 8)
+    sent = np.ndarray((workers, workers), dtype=np.int64, buffer=buffer, offset=offset + 3 * workers * 8)
+    edges = np.ndarray(workers + 1, dtype=np.float64, buffer=buffer,
+                       offset=offset + (3 + workers) * workers * 8)
+    return strips, outbox, destination, counts, leaving, staying, sent, edges
+
+
+def _buffer_size(workers: int, capacity: int) -> int:
+    return (2 * workers * len(FIELDS) * capacity + workers * capacity + (3 + workers) * workers + workers + 1) * 8
+
+
+def _edges(x: np.ndarray, workers: int, cell_size: Optional[float]) -> np.ndarray:
+    """Boundaries of strips holding equal shares of the swarm, rather than equal areas.
+
+        Raises:
+            ValueError: If a strip is narrower than a cell of the collision grid.
+    """
+    inner = np.quantile(x, np.arange(1, workers) / workers) if len(x) else np.zeros(workers - 1)
+    edges = np.concatenate([[-np.inf], inner, [np.inf]]).astype(np.float64)
+    if cell_size is not None and np.any(np.diff(edges) < cell_size):
+        raise ValueError("The strips are narrower than a ball, use fewer workers")
+    return edges
+
+
+def _swarm(columns: np.ndarray) -> BallArray:
+    """Wraps columns of the shared buffer as a BallArray, without copying them."""
+    swarm = BallArray.__new__(BallArray)
+    for name, column in zip(FIELDS, columns):
+        setattr(swarm, name, column)
+    return swarm
+
+
+class _Strip:
+    """State of one worker: its strip of the container and the shared buffer."""
+
+    def __init__(self, name: str, workers: int, capacity: int, index: int, container: Container,
+                 cell_size: Optional[float]):
+        self.memory = shared_memory.SharedMemory(name=name)
+        (self.strips, self.outbox, self.destination, self.counts, self.leaving, self.staying, self.sent,
+         self.edges) = _views(self.memory.buf, workers, capacity)
+        self.capacity = capacity
+        self.index = index
+        self.container = container
+        self.grid = None if cell_size is None else SpatialHash(cell_size)
+        self.halo = 0.0 if cell_size is None else cell_size
+
+    def hand_off(self) -> None:
+        """Moves the balls of the strip and puts the ones, which left it, into its outbox."""
+        k = self.index
+        n = int(self.counts[k])
+        own = self.strips[k, :, :n]
+        swarm = _swarm(own)
+        self.container.collide_all(swarm)
+        target = np.searchsorted(self.edges, swarm.x, side="right") - 1
+        np.clip(target, 0, len(self.edges) - 2, out=target)
+        gone = target != k
+        m = int(np.count_nonzero(gone))
+        self.leaving[k] = m
+        self.staying[k] = n - m
+        self.sent[k] = np.bincount(target[gone], minlength=len(self.counts))
+        if m:
+            self.outbox[k, :, :m] = own[:, gone]
+            self.destination[k, :m] = target[gone]
+            self.strips[k, :, :n - m] = own[:, ~gone]
+            self.counts[k] = n - m
+
+    def overflows(self) -> bool:
+        """Whether taking over the balls handed off would overflow any strip, the same answer for every worker.
+
+            It reads the balls staying in every strip, rather than the counts, which a
+            faster worker may already be updating in ``take_over``.
+        """
+        return bool(np.any(self.staying + self.sent.sum(axis=0) > self.capacity))
+
+    def take_over(self) -> None:
+        """Appends the balls, which other strips have handed over to this one."""
+        k = self.index
+        n = int(self.counts[k])
+        for sender in range(len(self.counts)):
+            if sender == k or self.sent[sender, k] == 0:
+                continue
+            mine = self.destination[sender, :self.leaving[sender]] == k
+            m = int(self.sent[sender, k])
+            self.strips[k, :, n:n + m] = self.outbox[sender, :, :self.leaving[sender]][:, mine]
+            n += m
+        self.counts[k] = n
+
+    def collide(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Bounces the balls of the strip off each other and off the halo of the neighbouring strips.
+
+            Returns:
+                New velocities of the balls of the strip, written back after every strip
+                has read its halo.
+        """
+        k = self.index
+        n = int(self.counts[k])
+        parts = [self.strips[k, :, :n]]
+        low, high = self.edges[k] - self.halo, self.edges[k + 1] + self.halo
+        for neighbour in (k - 1, k + 1):
+            if 0 <= neighbour < len(self.counts):
+                other = self.strips[neighbour, :, :self.counts[neighbour]]
+                parts.append(other[:, (other[X] >= low) & (other[X] < high)])
+        swarm = _swarm(np.concatenate(parts, axis=1))
+        self.grid.collide(swarm)
+        return swarm.delta_x[:n], swarm.delta_y[:n]
+
+    def run(self, steps: int, barrier, resume: bool = False) -> int:
+        """Makes up to ``steps`` steps.
+
+            Args:
+                steps (int): Number of steps.
+                barrier: Barrier shared by the workers.
+                resume (bool): Whether the first step was interrupted after its balls moved,
+                    so it starts with the collisions.
+
+            Returns:
+                Number of steps made. Fewer than ``steps``, if a strip was about to overflow:
+                the next step has then moved the balls, but not handed them over.
+        """
+        k = self.index
+        for step in range(steps):
+            if not resume or step > 0:
+                self.hand_off()
+                barrier.wait()
+                if self.overflows():
+                    return step
+                self.take_over()
+                barrier.wait()
+            if self.grid is not None:
+                delta_x, delta_y = self.collide()
+                barrier.wait()
+                n = int(self.counts[k])
+                self.strips[k, DELTA_X, :n] = delta_x
+                self.strips[k, DELTA_Y, :n] = delta_y
+        return steps
+
+
+def _worker(name, workers, capacity, index, container, cell_size, barrier, connection) -> None:
+    strip = _Strip(name, workers, capacity, index, container, cell_size)
+    try:
+        while True:
+            command, steps = connection.recv()
+            if command == "stop":
+                break
+            try:
+                connection.send(("done", strip.run(steps, barrier, resume=command == "resume")))
+            except BrokenBarrierError:
+                connection.send(("aborted", "Another worker has failed"))
+            except Exception as error:
+                barrier.abort()
+                connection.send(("error", f"Strip {index}: {type(error).__name__}: {error}"))
+    finally:
+        del (strip.strips, strip.outbox, strip.destination, strip.counts, strip.leaving, strip.staying, strip.sent,
+             strip.edges)
+        strip.memory.close()
+
+
+class DomainDecomposition:
+    """Steps a swarm with one process per vertical strip of the container.
+
+        The balls live in a shared memory buffer, where every strip owns a block of
+        slots. Balls crossing a strip boundary are handed off through per-strip
+        outboxes, a strip, which no ball leaves, isn't rewritten. Ball-to-ball
+        collisions copy the strip together with a halo of ``cell_size`` read straight
+        from the blocks of its neighbours. A tick is equivalent to ``Simulation.step``
+        with the same container and grid.
+
+        The strips start with equal shares of the swarm. When the balls handed over
+        would overflow a strip, the workers stop before taking them over and the
+        swarm is split again into equal shares, then the step goes on.
+
+        Attributes:
+            container (Container): Container, the balls bounce in.
+            workers (int): Number of strips and worker processes.
+            capacity (int): Maximum number of balls a strip can hold.
+            cell_size (float): Cell size of the collision grids, None to disable collisions.
+            step_count (int): Number of steps made so far.
+            rebalances (int): Number of times the swarm has been split again.
+    """
+
+    def __init__(self, balls: BallArray, container: Container, workers: Optional[int] = None,
+                 collisions: bool = False, capacity: Optional[int] = None):
+        """DomainDecomposition initializer, starts the worker processes.
+
+            Args:
+                balls (BallArray): Swarm, which is copied into shared memory.
+                container (Container): Container, the balls bounce in.
+                workers (int): Number of strips, defaults to the number of cores.
+                collisions (bool): Whether the balls bounce off each other, as with a
+                    ``SpatialHash`` of the default cell size.
+                capacity (int): Slots of every strip, defaults to four times a fair share.
+        """
+        self.container = container
+        self.workers = workers or multiprocessing.cpu_count()
+        n = len(balls)
+        self.capacity = capacity or min(n, 4 * ceil(n / self.workers) + 64)
+        self.cell_size = (2 * float(balls.radius.max()) or 1.0) if collisions and n else None
+        edges = _edges(balls.x, self.workers, self.cell_size)
+        self.step_count = 0
+        self.rebalances = 0
+        self._failure: Optional[str] = None
+        self._memory = shared_memory.SharedMemory(create=True, size=_buffer_size(self.workers, self.capacity))
+        columns = np.stack([getattr(balls, name) for name in FIELDS[:-1]] + [np.arange(n, dtype=np.float64)])
+        try:
+            self._distribute(columns, edges)
+        except ValueError:
+            self.close()
+            raise
+        self._barrier = multiprocessing.Barrier(self.workers)
+        self._connections = []
+        self._processes = []
+        for k in range(self.workers):
+            parent, child = multiprocessing.Pipe()
+            process = multiprocessing.Process(
+                target=_worker, daemon=True,
+                args=(self._memory.name, self.workers, self.capacity, k, container,
+                      self.cell_size, self._barrier, child))
+            process.start()
+            self._connections.append(parent)
+            self._processes.append(process)
+
+    def _distribute(self, columns: np.ndarray, edges: np.ndarray) -> None:
+        """Writes the balls into the strips between the edges, with empty outboxes."""
+        strips, outbox, destination, counts, leaving, staying, sent, shared_edges = \
+            _views(self._memory.buf, self.workers, self.capacity)
+        try:
+            owner = np.clip(np.searchsorted(edges, columns[X], side="right") - 1, 0, self.workers - 1)
+            sizes = np.bincount(owner, minlength=self.workers)
+            if sizes.max(initial=0) > self.capacity:
+                raise ValueError(f"Strip {int(sizes.argmax())} needs more than {self.capacity} slots")
+            for k in range(self.workers):
+                strips[k, :, :sizes[k]] = columns[:, owner == k]
+            counts[:] = staying[:] = sizes
+            leaving[:] = 0
+            sent[:] = 0
+            shared_edges[:] = edges
+        finally:
+            del strips, outbox, destination, counts, leaving, staying, sent, shared_edges
+
+    def _rebalance(self) -> None:
+        """Splits the swarm of an interrupted step, whose balls have moved, into equal shares again."""
+        strips, outbox, destination, counts, leaving, staying, sent, edges = \
+            _views(self._memory.buf, self.workers, self.capacity)
+        columns = np.concatenate([strips[k, :, :counts[k]] for k in range(self.workers)]
+                                 + [outbox[k, :, :leaving[k]] for k in range(self.workers)], axis=1)
+        del strips, outbox, destination, counts, leaving, staying, sent, edges
+        self._distribute(columns, _edges(columns[X], self.workers, self.cell_size))
+        self.rebalances += 1
+
+    @property
+    def edges(self) -> np.ndarray:
+        """Boundaries of the strips along x, ``workers + 1`` of them."""
+        views = _views(self._memory.buf, self.workers, self.capacity)
+        edges = views[-1].copy()
+        del views
+        return edges
+
+    def run(self, steps: int) -> None:
+        """Makes ``steps`` steps, the workers synchronise on a barrier between the phases of a step.
+
+            Raises:
+                RuntimeError: If a worker has failed. The message is the one of the worker,
+                    which has failed first. The swarm is then left in the middle of a step
+                    and every later run fails as well.
+        """
+        if self._failure is not None:
+            raise RuntimeError(f"A previous run has failed, the swarm is inconsistent: {self._failure}")
+        command = "run"
+        while steps > 0:
+            for connection in self._connections:
+                connection.send((command, steps))
+            replies = [connection.recv() for connection in self._connections]
+            failed = [message for status, message in replies if status == "error"]
+            failed += [message for status, message in replies if status == "aborted"]
+            if failed:
+                self._barrier.reset()
+                self._failure = failed[0]
+                raise RuntimeError(failed[0])
+            done = min(message for _, message in replies)
+            self.step_count += done
+            steps -= done
+            if steps > 0:
+                try:
+                    self._rebalance()
+                except ValueError as error:
+                    self._failure = f"Can't rebalance the strips: {error}"
+                    raise RuntimeError(self._failure) from error
+                command = "resume"
+
+    @property
+    def balls(self) -> BallArray:
+        """Copy of the swarm, in the order of the original BallArray."""
+        strips, outbox, destination, counts, leaving, staying, sent, edges = \
+            _views(self._memory.buf, self.workers, self.capacity)
+        columns = np.concatenate([strips[k, :, :counts[k]] for k in range(self.workers)], axis=1)
+        del strips, outbox, destination, counts, leaving, staying, sent, edges
+        columns = columns[:, np.argsort(columns[ID])]
+        return _swarm(columns[:ID].copy())
+
+    def close(self) -> None:
+        """Stops the workers and frees the shared memory."""
+        for connection in getattr(self, "_connections", []):
+            connection.send(("stop", None))
+        for process in getattr(self, "_processes", []):
+            process.join()
+        self._connections, self._processes = [], []
+        if self._memory is not None:
+            self._memory.close()
+            self._memory.unlink()
+            self._memory = None
+
+    def __enter__(self) -> "DomainDecomposition":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
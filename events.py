@@ -0,0 +1,220 @@
+import heapq
+import itertools
+from math import floor, inf, sqrt
+from typing import Dict, List, Optional, Set, Tuple
+
+from ball import Ball, Container
+
+
+class EventDrivenSimulation:
+    """Event-driven (time-of-impact) simulation of balls in a container.
+
+        Instead of moving every ball on every tick, the simulation predicts when each
+        ball next hits a wall, another ball or the border of its grid cell, keeps those
+        events in a priority queue and jumps straight from one event to the next.
+        Positions are stored together with the time they refer to and are only brought
+        up to date for the balls taking part in an event. Every velocity change bumps
+        the version of the ball, which invalidates the events predicted before it.
+
+        Time is measured in ticks, i.e. a ball covers ``(delta_x, delta_y)`` per unit of
+        time. Contacts are resolved exactly, without the one tick look-ahead of
+        ``Container.collides``.
+
+        Attributes:
+            balls (List[Ball]): Simulated balls, updated by ``sync``.
+            container (Container): Container, the balls bounce in.
+            cell_size (float): Side of a grid cell, defaults to the largest ball diameter.
+            time (float): Current simulation time.
+            collisions (int): Number of resolved wall and ball collisions.
+            events (int): Number of processed (not stale) events.
+    """
+
+    WALL_X, WALL_Y, BALL, CELL = range(4)
+
+    def __init__(self, balls: List[Ball], container: Container, cell_size: Optional[float] = None):
+        """EventDrivenSimulation initializer."""
+        self.balls = balls
+        self.container = container
+        self.cell_size = cell_size or 2 * max((b.radius for b in balls), default=0.5)
+        self.time = 0.0
+        self.collisions = 0
+        self.events = 0
+        self.x = [float(b.x) for b in balls]
+        self.y = [float(b.y) for b in balls]
+        self.delta_x = [float(b.delta_x) for b in balls]
+        self.delta_y = [float(b.delta_y) for b in balls]
+        self.radius = [float(b.radius) for b in balls]
+        self.stamp = [0.0] * len(balls)
+        self.version = [0] * len(balls)
+        self.cell: List[Tuple[int, int]] = []
+        self.grid: Dict[Tuple[int, int], Set[int]] = {}
+        self.queue: List[tuple] = []
+        self.counter = itertools.count()
+        for i in range(len(balls)):
+            cell = (floor(self.x[i] / self.cell_size), floor(self.y[i] / self.cell_size))
+            self.cell.append(cell)
+            self.grid.setdefault(cell, set()).add(i)
+        for i in range(len(balls)):
+            self.predict(i)
+
+    def advance(self, i: int) -> None:
+        """Brings the stored position of the ball up to the current time."""
+        elapsed = self.time - self.stamp[i]
+        self.x[i] += self.delta_x[i] * elapsed
+        self.y[i] += self.delta_y[i] * elapsed
+        self.stamp[i] = self.time
+
+    def schedule(self, delay: float, kind: int, i: int, j: int = -1) -> None:
+        if delay < inf:
+            heapq.heappush(self.queue, (self.time + max(delay, 0.0), next(self.counter), kind, i, j,
+                                        self.version[i], self.version[j] if j >= 0 else 0))
+
+    def predict(self, i: int, cells: Optional[List[Tuple[int, int]]] = None) -> None:
+        """Schedules the next events of the ball.
+
+            Args:
+                i (int): Index of the ball.
+                cells (List[Tuple[int, int]]): Cells, which have just become adjacent to the
+                    ball. By default the wall events and the whole 3x3 neighbourhood are
+                    predicted, which is needed after the velocity of the ball has changed.
+
+            Returns:
+                None.
+        """
+        self.advance(i)
+        column, row = self.cell[i]
+        if cells is None:
+            box, r = self.container, self.radius[i]
+            self.schedule(self.wall_time(self.x[i], self.delta_x[i], box.x1 + r, box.x2 - r), self.WALL_X, i)
+            self.schedule(self.wall_time(self.y[i], self.delta_y[i], box.y1 + r, box.y2 - r), self.WALL_Y, i)
+            cells = [(column + dx, row + dy) for dx in (-1, 0, 1) for dy in (-1, 0, 1)]
+        self.schedule(min(self.wall_time(self.x[i], self.delta_x[i], column * self.cell_size,
+                                         (column + 1) * self.cell_size),
+                          self.wall_time(self.y[i], self.delta_y[i], row * self.cell_size,
+                                         (row + 1) * self.cell_size)), self.CELL, i)
+        for cell in cells:
+            for j in self.grid.get(cell, ()):
+                if j != i:
+                    self.schedule(self.impact_time(i, j), self.BALL, i, j)
+
+    @staticmethod
+    def wall_time(position: float, delta: float, low: float, high: float) -> float:
+        """Returns the time, until a point moving with ``delta`` reaches ``low`` or ``high``."""
+        if delta > 0:
+            return (high - position) / delta
+        if delta < 0:
+            return (low - position) / delta
+        return inf
+
+    def impact_time(self, i: int, j: int) -> float:
+        """Returns the time, until the two balls touch, or infinity if they never do."""
+        self.advance(j)
+        dx, dy = self.x[j] - self.x[i], self.y[j] - self.y[i]
+        vx, vy = self.delta_x[j] - self.delta_x[i], self.delta_y[j] - self.delta_y[i]
+        approach = dx * vx + dy * vy
+        if approach >= 0:
+            return inf
+        speed2 = vx * vx + vy * vy
+        reach = self.radius[i] + self.radius[j]
+        discriminant = approach * approach - speed2 * (dx * dx + dy * dy - reach * reach)
+        if discriminant < 0:
+            return inf
+        return -(approach + sqrt(discriminant)) / speed2
+
+    def bounce(self, i: int, j: int) -> None:
+        """Elastically bounces two touching balls, with masses proportional to ``radius ** 2``."""
+        dx, dy = self.x[j] - self.x[i], self.y[j] - self.y[i]
+        dist2 = dx * dx + dy * dy
+        approach = dx * (self.delta_x[j] - self.delta_x[i]) + dy * (self.delta_y[j] - self.delta_y[i])
+        if dist2 == 0:
+            return
+        mass, other_mass = self.radius[i] ** 2, self.radius[j] ** 2
+        impulse = 2 * approach / (dist2 * (mass + other_mass))
+        self.delta_x[i] += other_mass * impulse * dx
+        self.delta_y[i] += other_mass * impulse * dy
+        self.delta_x[j] -= mass * impulse * dx
+        self.delta_y[j] -= mass * impulse * dy
+
+    def cross(self, i: int) -> List[Tuple[int, int]]:
+        """Moves the ball into the neighbouring cell it is entering.
+
+            Returns:
+                Cells, which have become adjacent to the ball.
+        """
+        column, row = self.cell[i]
+        size = self.cell_size
+        to_x = self.wall_time(self.x[i], self.delta_x[i], column * size, (column + 1) * size)
+        to_y = self.wall_time(self.y[i], self.delta_y[i], row * size, (row + 1) * size)
+        self.grid[(column, row)].discard(i)
+        if to_x <= to_y:
+            step = 1 if self.delta_x[i] > 0 else -1
+            column += step
+            fresh = [(column + step, row + dy) for dy in (-1, 0, 1)]
+        else:
+            step = 1 if self.delta_y[i] > 0 else -1
+            row += step
+            fresh = [(column + dx, row + step) for dx in (-1, 0, 1)]
+        self.cell[i] = (column, row)
+        self.grid.setdefault((column, row), set()).add(i)
+        return fresh
+
+    def step(self, until: float = inf) -> bool:
+        """Processes the next valid event, unless it comes after ``until``.
+
+            Args:
+                until (float): Latest time of the event, stale events before it are dropped.
+
+            Returns:
+                True, if an event has been processed, and false, if there is none up to ``until``.
+        """
+        while self.queue and self.queue[0][0] <= until:
+            time, _, kind, i, j, version_i, version_j = heapq.heappop(self.queue)
+            if version_i != self.version[i] or (j >= 0 and version_j != self.version[j]):
+                continue
+            self.time = time
+            self.events += 1
+            self.advance(i)
+            if kind == self.CELL:
+                self.predict(i, self.cross(i))
+                return True
+            if kind == self.WALL_X:
+                self.delta_x[i] = -self.delta_x[i]
+            elif kind == self.WALL_Y:
+                self.delta_y[i] = -self.delta_y[i]
+            else:
+                self.advance(j)
+                self.bounce(i, j)
+                self.version[j] += 1
+            self.version[i] += 1
+            self.collisions += 1
+            self.predict(i)
+            if j >= 0:
+                self.predict(j)
+            return True
+        return False
+
+    def run(self, duration: float) -> None:
+        """Processes every event of the next ``duration`` ticks and moves the clock forward.
+
+            Args:
+                duration (float): Number of ticks to simulate.
+
+            Returns:
+                None.
+        """
+        until = self.time + duration
+        while self.step(until):
+            pass
+        self.time = until
+
+    def sync(self) -> List[Ball]:
+        """Writes the state at the current time back into the Ball instances.
+
+            Returns:
+                Updated balls.
+        """
+        for i, ball in enumerate(self.balls):
+            self.advance(i)
+            ball.x, ball.y = self.x[i], self.y[i]
+            ball.delta_x, ball.delta_y = self.delta_x[i], self.delta_y[i]
+        return self.balls
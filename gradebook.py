@@ -0,0 +1,144 @@
+from typing import Any, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from course import Course, CourseProgress
+
+
+def progress_of(student: Any, course: Course) -> Optional[CourseProgress]:
+    """Returns the latest progress of the student in the course, None if there is none."""
+    for progress in reversed(student.course_progress):
+        if progress.course is course:
+            return progress
+    return None
+
+
+class Gradebook:
+    """Marks of a whole course as a students x assignments matrix.
+
+        Rows follow ``course.students``, columns the assignments of the course's template.
+        A progress, which shares the template, is copied a row at a time straight from
+        its arrays. One with a template of its own is read by key, the cells of the
+        assignments it doesn't have are masked out of the statistics, and the marks of
+        the ones the course doesn't have are summed aside, so the final marks still
+        average every assignment of the progress.
+
+        The statistics are computed on the matrix, call ``sync`` after the progresses
+        change and ``write_back`` to store marks changed in the matrix.
+
+        Attributes:
+            course (Course): Course of the gradebook.
+            students (List[Any]): Students of the rows.
+            progresses (List[CourseProgress]): Progress of every row, None for a student without one.
+            names (tuple): Keys of the assignments of the columns.
+            marks (np.ndarray): Marks, shaped (students, assignments).
+            done (np.ndarray): Whether every assignment is done, of the same shape.
+            present (np.ndarray): Whether the progress of the row has the assignment, of the same shape.
+            extra_marks (np.ndarray): Sum of the marks of every row outside the columns, and of the done ones.
+            extra_counts (np.ndarray): Number of the assignments of every row outside the columns, and of the done ones.
+    """
+
+    def __init__(self, course: Course):
+        """Gradebook initializer, reads the marks of the students enrolled in the course."""
+        self.course = course
+        self.sync()
+
+    def sync(self) -> None:
+        """Reads the marks of the students, who are enrolled in the course now."""
+        template = self.course.template
+        self.students = list(self.course.students)
+        self.progresses: List[Optional[CourseProgress]] = [progress_of(s, self.course) for s in self.students]
+        self.names = template.names
+        self.marks = np.zeros((len(self.students), len(self.names)))
+        self.done = np.zeros((len(self.students), len(self.names)), dtype=bool)
+        self.present = np.zeros((len(self.students), len(self.names)), dtype=bool)
+        self.extra_marks = np.zeros((len(self.students), 2))
+        self.extra_counts = np.zeros((len(self.students), 2), dtype=np.int64)
+        for row, progress in enumerate(self.progresses):
+            if progress is None:
+                continue
+            if progress.template is template or progress.template.names == self.names:
+                self.marks[row] = np.frombuffer(progress.marks, dtype=np.float64)
+                self.done[row] = np.frombuffer(progress.done, dtype=np.int8)
+                self.present[row] = True
+                continue
+            for name, task in progress.completed_assignments.items():
+                column = template.positions.get(name)
+                if column is None:
+                    done = bool(task["is_done"])
+                    self.extra_marks[row] += (task["mark"], task["mark"] if done else 0.0)
+                    self.extra_counts[row] += (1, done)
+                    continue
+                self.marks[row, column] = task["mark"]
+                self.done[row, column] = task["is_done"]
+                self.present[row, column] = True
+
+    def write_back(self) -> None:
+        """Stores the marks and done flags of the matrix in the progresses."""
+        for row, progress in enumerate(self.progresses):
+            if progress is None:
+                continue
+            if progress.template.names == self.names:
+                np.frombuffer(progress.marks, dtype=np.float64)[:] = self.marks[row]
+                np.frombuffer(progress.done, dtype=np.int8)[:] = self.done[row]
+                progress._recount()
+                continue
+            for column, name in enumerate(self.names):
+                if name in progress.completed_assignments:
+                    task = progress.completed_assignments[name]
+                    task["mark"] = float(self.marks[row, column])
+                    task["is_done"] = bool(self.done[row, column])
+
+    def final_marks(self, done_only: bool = False) -> np.ndarray:
+        """Returns the final mark of every student, as ``CourseProgress.get_final_mark``.
+
+            Args:
+                done_only (bool): Average the done assignments only.
+
+            Returns:
+                Final marks, NaN for a student without assignments to average.
+        """
+        weights = self.present & self.done if done_only else self.present
+        extra = 1 if done_only else 0
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return (((self.marks * weights).sum(axis=1) + self.extra_marks[:, extra])
+                    / (weights.sum(axis=1) + self.extra_counts[:, extra]))
+
+    def assignment_means(self, done_only: bool = False) -> np.ndarray:
+        """Returns the mean mark of every assignment, NaN for one nobody has to average."""
+        weights = self.present & self.done if done_only else self.present
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return (self.marks * weights).sum(axis=0) / weights.sum(axis=0)
+
+    def mean(self, done_only: bool = False) -> float:
+        """Returns the class average of the final marks."""
+        finals = self.final_marks(done_only)
+        return float(np.nanmean(finals)) if np.any(~np.isnan(finals)) else float("nan")
+
+    def completion(self) -> np.ndarray:
+        """Returns the share of done assignments of every student."""
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return ((self.done & self.present).sum(axis=1) + self.extra_counts[:, 1]) / (
+                self.present.sum(axis=1) + self.extra_counts[:, 0])
+
+    def percentiles(self, q: Union[float, Sequence[float]], done_only: bool = False) -> np.ndarray:
+        """Returns percentiles, from 0 to 100, of the final marks."""
+        return np.nanpercentile(self.final_marks(done_only), q)
+
+    def histogram(self, bins: Union[int, Sequence[float]] = 10, range: Optional[Tuple[float, float]] = None,
+                  done_only: bool = False) -> Tuple[np.ndarray, np.ndarray]:
+        """Returns the counts and the bin edges of the final marks, as ``np.histogram``."""
+        finals = self.final_marks(done_only)
+        return np.histogram(finals[~np.isnan(finals)], bins=bins, range=range)
+
+    def ranks(self, done_only: bool = False) -> np.ndarray:
+        """Returns the rank of every student by final mark, 1 for the best, equal marks sharing a rank."""
+        finals = np.nan_to_num(self.final_marks(done_only), nan=-np.inf)
+        ordered = np.sort(finals)[::-1]
+        return np.searchsorted(-ordered, -finals, side="left") + 1
+
+    def ranking(self, done_only: bool = False) -> List[Tuple[Any, float]]:
+        """Returns the students with their final marks, from the best, in enrollment order on ties."""
+        finals = self.final_marks(done_only)
+        order = np.argsort(-np.nan_to_num(finals, nan=-np.inf), kind="stable")
+        return [(self.students[row], float(finals[row])) for row in order]
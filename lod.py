@@ -0,0 +1,206 @@
+from typing import Any, List, Optional, Tuple
+
+import numpy as np
+
+from ball import BallArray
+
+Points = Tuple[np.ndarray, np.ndarray, np.ndarray]
+
+
+def _areas(first: Points, last: Points, candidates: Points) -> np.ndarray:
+    """Returns the area of the triangles in the (step, x) plane plus the one in the (step, y) plane.
+
+        ``first`` and ``last`` are one point per ball, ``candidates`` are shaped (m, balls).
+    """
+    step_a, x_a, y_a = first
+    step_b, x_b, y_b = last
+    step_c, x_c, y_c = candidates
+    return (np.abs((step_a - step_b) * (x_c - x_a) - (step_a - step_c) * (x_b - x_a))
+            + np.abs((step_a - step_b) * (y_c - y_a) - (step_a - step_c) * (y_b - y_a)))
+
+
+def _pick(candidates: Points, chosen: np.ndarray) -> Points:
+    columns = np.arange(candidates[0].shape[1])
+    return tuple(values[chosen, columns] for values in candidates)
+
+
+def lttb(step: np.ndarray, x: np.ndarray, y: np.ndarray, k: int) -> Points:
+    """Largest-triangle-three-buckets downsampling of every ball to ``k`` points.
+
+        Args:
+            step, x, y (np.ndarray): Points of every ball, shaped (m, balls) and ordered by step.
+            k (int): Number of points to keep, at least 3.
+
+        Returns:
+            Steps, x and y of the kept points, shaped (min(m, k), balls).
+    """
+    m = len(step)
+    if m <= k:
+        return step, x, y
+    if k < 3:
+        raise ValueError("Downsampling keeps at least three points")
+    points = (step.astype(np.float64), x, y)
+    edges = 1 + (np.arange(k - 1) * (m - 2)) // (k - 2)
+    kept = [tuple(values[0] for values in (step, x, y))]
+    previous = tuple(values[0] for values in points)
+    for bucket in range(k - 2):
+        lo, hi = edges[bucket], edges[bucket + 1]
+        following = slice(hi, edges[bucket + 2]) if bucket < k - 3 else slice(m - 1, m)
+        average = tuple(values[following].mean(axis=0) for values in points)
+        chosen = lo + np.argmax(_areas(previous, average, tuple(values[lo:hi] for values in points)), axis=0)
+        previous = _pick(points, chosen)
+        kept.append(_pick((step, x, y), chosen))
+    kept.append(tuple(values[-1] for values in (step, x, y)))
+    return tuple(np.stack(column) for column in zip(*kept))
+
+
+class _Level:
+    """Points of one level of the pyramid, growing by doubling."""
+
+    def __init__(self, n_balls: int):
+        self.length = 0
+        self.step = np.empty((16, n_balls), dtype=np.int64)
+        self.x = np.empty((16, n_balls))
+        self.y = np.empty((16, n_balls))
+        # Bucket, which waits for the average of the next one, and the bucket being filled.
+        self.held: Optional[Points] = None
+        self.incoming: List[Points] = []
+        self.previous: Optional[Points] = None
+
+    def append(self, point: Points) -> None:
+        if self.length == len(self.step):
+            self.step, self.x, self.y = (np.concatenate([values, np.empty_like(values)])
+                                         for values in (self.step, self.x, self.y))
+        self.step[self.length], self.x[self.length], self.y[self.length] = point
+        self.length += 1
+
+    def points(self, start: int, stop: int) -> Points:
+        return self.step[start:stop], self.x[start:stop], self.y[start:stop]
+
+
+class TrajectoryPyramid:
+    """Level-of-detail pyramid of a recorded run, built while the simulation runs.
+
+        Level ``l`` keeps one point of every ball per ``factor ** l`` frames, chosen
+        by largest-triangle-three-buckets: the point of a bucket forming the largest
+        triangle with the point kept before it and the average of the next bucket. A
+        bucket is therefore settled one bucket late. Raw frames aren't kept, pass a
+        TrajectoryWriter to stream them to a file as well.
+
+        Use it as the ``writer`` of a Simulation.
+
+        Attributes:
+            n_balls (int): Number of balls in every frame.
+            factor (int): Number of points of a level merged into one of the next level.
+            writer (TrajectoryWriter): If set, receives every frame.
+            levels (List[_Level]): Levels 1, 2, ..., created as the run grows, ``levels[l - 1]``
+                being the level ``l``.
+            n_frames (int): Number of frames written so far.
+    """
+
+    def __init__(self, n_balls: int, factor: int = 4, writer: Any = None):
+        """TrajectoryPyramid initializer."""
+        if factor < 2:
+            raise ValueError("Every level must merge at least two points")
+        self.n_balls = n_balls
+        self.factor = factor
+        self.writer = writer
+        self.levels: List[_Level] = []
+        self.n_frames = 0
+        self._steps = np.empty(1024, dtype=np.int64)
+
+    def write(self, step: int, balls: BallArray) -> None:
+        """Adds the current state of the swarm as one frame, in amortised constant time per ball."""
+        if len(balls) != self.n_balls:
+            raise ValueError(f"Expected {self.n_balls} balls, got {len(balls)}")
+        if self.writer is not None:
+            self.writer.write(step, balls)
+        if self.n_frames == len(self._steps):
+            self._steps = np.concatenate([self._steps, np.empty_like(self._steps)])
+        self._steps[self.n_frames] = step
+        self.n_frames += 1
+        self._push(0, (np.full(self.n_balls, step, dtype=np.int64), balls.x.copy(), balls.y.copy()))
+
+    def _push(self, depth: int, point: Points) -> None:
+        """Feeds a point into the level ``depth + 1``, settling a bucket once the next one is full."""
+        if depth == len(self.levels):
+            self.levels.append(_Level(self.n_balls))
+        level = self.levels[depth]
+        if level.previous is None:
+            level.previous = point
+        level.incoming.append(point)
+        if len(level.incoming) < self.factor:
+            return
+        incoming = tuple(np.stack(column) for column in zip(*level.incoming))
+        level.incoming = []
+        held, level.held = level.held, incoming
+        if held is None:
+            return
+        average = tuple(values.astype(np.float64).mean(axis=0) for values in incoming)
+        chosen = np.argmax(_areas(level.previous, average, held), axis=0)
+        level.previous = _pick(held, chosen)
+        level.append(level.previous)
+        self._push(depth + 1, level.previous)
+
+    def _raw(self) -> Points:
+        """Frames, which aren't settled in the first level yet."""
+        level = self.levels[0]
+        waiting = ([] if level.held is None else list(zip(*level.held))) + level.incoming
+        if not waiting:
+            return tuple(np.empty((0, self.n_balls), dtype=t) for t in (np.int64, np.float64, np.float64))
+        return tuple(np.stack(column) for column in zip(*waiting))
+
+    def query(self, start: Optional[int] = None, stop: Optional[int] = None, k: int = 1000,
+              balls=slice(None)) -> Points:
+        """Returns at most ``k`` points of every ball for the frames with ``start <= step < stop``.
+
+            The finest level with at most ``k`` buckets overlapping the window is read,
+            along with the newest points of the finer levels, which its buckets don't
+            cover yet, so the cost depends on ``k`` and not on the length of the window.
+            The points of the buckets straddling the ends may lie outside the window.
+
+            Args:
+                start (int): First step, defaults to the beginning of the run.
+                stop (int): Step to stop before, defaults to the end of the run.
+                k (int): Maximum number of points, at least 3.
+                balls: Ball ids, as in ``TrajectoryReader.read``.
+
+            Returns:
+                Steps, x and y of the points, shaped (points, balls).
+        """
+        steps = self._steps[:self.n_frames]
+        first = 0 if start is None else int(np.searchsorted(steps, start, side="left"))
+        last = self.n_frames if stop is None else int(np.searchsorted(steps, stop, side="left"))
+        parts = []
+        if self.levels and first < last:
+            depth = 1
+            while depth < len(self.levels) and -(last // -self.factor ** depth) - first // self.factor ** depth > k:
+                depth += 1
+            settled = 0
+            for level in range(depth, 0, -1):
+                stored = self.levels[level - 1]
+                size = self.factor ** level
+                lo = max(settled * self.factor, first // size)
+                hi = min(stored.length, -(last // -size))
+                if lo < hi:
+                    parts.append(tuple(values[:, balls] for values in stored.points(lo, hi)))
+                settled = stored.length
+            raw = self._raw()
+            offset = self.n_frames - len(raw[0])
+            lo, hi = max(first, offset) - offset, max(last, offset) - offset
+            parts.append(tuple(values[lo:hi, balls] for values in raw))
+        if not parts:
+            return tuple(np.empty((0, self.n_balls), dtype=t)[:, balls] for t in (np.int64, np.float64, np.float64))
+        step, x, y = (np.concatenate(column) for column in zip(*parts))
+        return lttb(step, x, y, k)
+
+    def close(self) -> None:
+        """Closes the writer, the pyramid stays queryable."""
+        if self.writer is not None:
+            self.writer.close()
+
+    def __enter__(self) -> "TrajectoryPyramid":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
@@ -0,0 +1,154 @@
+import json
+import time
+from typing import Any, Callable, Dict, Optional
+
+import numpy as np
+
+from ball import BallArray, Container, Simulation
+
+BUCKETS = 64
+
+
+class PhaseTimer:
+    """Durations of one phase of the simulation step.
+
+        Attributes:
+            count (int): Number of measurements.
+            total (float): Total duration, in seconds.
+            minimum (float): Shortest duration, in seconds.
+            maximum (float): Longest duration, in seconds.
+            histogram (List[int]): Number of durations in every power of two nanoseconds bucket,
+                bucket ``k`` holding durations in ``[2 ** (k - 1), 2 ** k)`` ns.
+    """
+
+    def __init__(self):
+        """PhaseTimer initializer."""
+        self.count = 0
+        self.total = 0.0
+        self.minimum = float("inf")
+        self.maximum = 0.0
+        self.histogram = [0] * BUCKETS
+
+    def add(self, seconds: float) -> None:
+        self.count += 1
+        self.total += seconds
+        self.minimum = min(self.minimum, seconds)
+        self.maximum = max(self.maximum, seconds)
+        self.histogram[min(int(seconds * 1e9).bit_length(), BUCKETS - 1)] += 1
+
+    def report(self) -> Dict[str, Any]:
+        last = max((k for k, n in enumerate(self.histogram) if n), default=-1)
+        return {
+            "count": self.count,
+            "total": self.total,
+            "mean": self.total / self.count if self.count else 0.0,
+            "min": self.minimum if self.count else 0.0,
+            "max": self.maximum,
+            "histogram_ns": {f"<{2 ** k}": n for k, n in enumerate(self.histogram[:last + 1])},
+        }
+
+
+class Profiler:
+    """Opt-in instrumentation of a Simulation.
+
+        Attach it with ``Simulation(..., profiler=Profiler())``. Without a profiler the
+        simulation doesn't pay for any of the measurements.
+
+        Attributes:
+            phases (Dict[str, PhaseTimer]): Timings of ``move``, ``walls``, ``balls``, ``sweep``,
+                ``output`` and ``record``.
+            steps (int): Number of profiled steps.
+            wall_hits (Dict[str, int]): Wall hits on the left, right, top and bottom side.
+            reflections (Dict[str, int]): Number of horizontal and vertical reflections of
+                single balls, i.e. the calls of ``Ball.reflect_horizontal`` and
+                ``Ball.reflect_vertical`` the scalar loop would make. Continuous steps
+                reflect a ball once per wall hit, so they count every hit.
+            ball_collisions (int): Number of ball-to-ball collisions.
+            sweep_hits (int): Number of collisions resolved by continuous steps.
+    """
+
+    def __init__(self):
+        """Profiler initializer."""
+        self.phases: Dict[str, PhaseTimer] = {}
+        self.steps = 0
+        self.wall_hits = {"left": 0, "right": 0, "top": 0, "bottom": 0}
+        self.reflections = {"horizontal": 0, "vertical": 0}
+        self.ball_collisions = 0
+        self.sweep_hits = 0
+        self._started: Optional[float] = None
+        self._elapsed = 0.0
+
+    def measure(self, phase: str, function: Callable, *args) -> Any:
+        """Calls the function and adds its duration to the phase."""
+        start = time.perf_counter()
+        result = function(*args)
+        self.phases.setdefault(phase, PhaseTimer()).add(time.perf_counter() - start)
+        return result
+
+    def count_walls(self, container: Container, balls: BallArray) -> None:
+        """Counts the walls, the next move of every ball is about to cross, and the reflections of ``collides``."""
+        next_x = balls.x + balls.delta_x
+        next_y = balls.y + balls.delta_y
+        left = next_x - balls.radius < container.x1
+        right = next_x + balls.radius > container.x2
+        top = next_y - balls.radius < container.y1
+        bottom = next_y + balls.radius > container.y2
+        self.wall_hits["left"] += int(np.count_nonzero(left))
+        self.wall_hits["right"] += int(np.count_nonzero(right))
+        self.wall_hits["top"] += int(np.count_nonzero(top))
+        self.wall_hits["bottom"] += int(np.count_nonzero(bottom))
+        horizontal = left | right
+        # collides checks the vertical walls only without a horizontal hit, and the other way round.
+        vertical = ~horizontal & ((next_y + balls.radius < container.y2) | (next_y - balls.radius > container.y1))
+        self.reflections["horizontal"] += int(np.count_nonzero(horizontal))
+        self.reflections["vertical"] += int(np.count_nonzero(vertical))
+
+    def phase(self, simulation: Simulation, name: str, function: Callable, *args) -> Any:
+        """Runs a phase of ``Simulation.step`` or ``Simulation.run``, timing it and counting its collisions.
+
+            ``Simulation`` calls it for every phase, the ``output`` phase ending a step.
+        """
+        if self._started is None:
+            self._started = time.perf_counter()
+        if name == "sweep":
+            walls = np.zeros(4, dtype=np.int64)
+            hits = self.measure(name, function, *args, walls)
+            self.sweep_hits += int(hits.sum())
+            left, right, top, bottom = walls.tolist()
+            self.wall_hits["left"] += left
+            self.wall_hits["right"] += right
+            self.wall_hits["top"] += top
+            self.wall_hits["bottom"] += bottom
+            self.reflections["horizontal"] += left + right
+            self.reflections["vertical"] += top + bottom
+            return hits
+        if name == "walls":
+            self.count_walls(simulation.container, simulation.balls)
+        result = self.measure(name, function, *args)
+        if name == "balls":
+            self.ball_collisions += result
+        elif name == "output":
+            self.steps += 1
+            self._elapsed = time.perf_counter() - self._started
+        return result
+
+    def report(self) -> Dict[str, Any]:
+        """Returns the collected statistics as a JSON-serialisable dictionary."""
+        return {
+            "steps": self.steps,
+            "elapsed": self._elapsed,
+            "steps_per_second": self.steps / self._elapsed if self._elapsed else 0.0,
+            "phases": {name: timer.report() for name, timer in self.phases.items()},
+            "wall_hits": dict(self.wall_hits),
+            "reflections": dict(self.reflections),
+            "ball_collisions": self.ball_collisions,
+            "sweep_hits": self.sweep_hits,
+        }
+
+    def to_json(self, path: Optional[str] = None) -> str:
+        """Returns the report as JSON, also writing it to ``path`` if given."""
+        encoded = json.dumps(self.report(), indent=2)
+        if path is not None:
+            with open(path, "w") as file:
+                file.write(encoded)
+        return encoded
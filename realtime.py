@@ -0,0 +1,192 @@
+import asyncio
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from ball import Simulation
+
+DROP_OLDEST = "drop_oldest"
+DROP_NEWEST = "drop_newest"
+
+
+@dataclass(frozen=True)
+class Frame:
+    """Positions of the swarm after a tick, shared by every subscriber.
+
+        Attributes:
+            step (int): Step number of the simulation.
+            time (float): Event loop time of the tick.
+            x (np.ndarray): X coordinates of the balls.
+            y (np.ndarray): Y coordinates of the balls.
+    """
+
+    step: int
+    time: float
+    x: np.ndarray
+    y: np.ndarray
+
+
+class Subscription:
+    """Bounded queue of frames for one consumer.
+
+        When the consumer falls behind, the queue never grows past ``maxsize``: with
+        ``DROP_OLDEST`` the stale frames make room for the new one, so ``maxsize=1``
+        coalesces everything into the latest frame, and with ``DROP_NEWEST`` new frames
+        are discarded until the consumer catches up.
+
+        Attributes:
+            maxsize (int): Maximum number of queued frames.
+            policy (str): ``DROP_OLDEST`` or ``DROP_NEWEST``.
+            delivered (int): Number of frames taken by the consumer.
+            dropped (int): Number of frames lost because of a full queue.
+            closed (bool): Whether the driver has stopped publishing.
+    """
+
+    def __init__(self, maxsize: int = 8, policy: str = DROP_OLDEST):
+        """Subscription initializer."""
+        if maxsize < 1:
+            raise ValueError("The queue must hold at least one frame")
+        if policy not in (DROP_OLDEST, DROP_NEWEST):
+            raise ValueError(f"Unknown policy {policy}")
+        self.maxsize = maxsize
+        self.policy = policy
+        self.frames: deque = deque()
+        self.delivered = 0
+        self.dropped = 0
+        self.closed = False
+        self._waiter: Optional[asyncio.Future] = None
+
+    def publish(self, frame: Frame) -> None:
+        """Queues the frame without ever blocking the publisher."""
+        if len(self.frames) >= self.maxsize:
+            self.dropped += 1
+            if self.policy == DROP_NEWEST:
+                return
+            self.frames.popleft()
+        self.frames.append(frame)
+        self._wake()
+
+    def close(self) -> None:
+        self.closed = True
+        self._wake()
+
+    def _wake(self) -> None:
+        if self._waiter is not None and not self._waiter.done():
+            self._waiter.set_result(None)
+
+    async def get(self) -> Optional[Frame]:
+        """Returns the next frame, or None once the subscription is closed and drained."""
+        while not self.frames:
+            if self.closed:
+                return None
+            self._waiter = asyncio.get_running_loop().create_future()
+            await self._waiter
+        self.delivered += 1
+        return self.frames.popleft()
+
+    def __aiter__(self) -> "Subscription":
+        return self
+
+    async def __anext__(self) -> Frame:
+        frame = await self.get()
+        if frame is None:
+            raise StopAsyncIteration
+        return frame
+
+
+class RealtimeDriver:
+    """Steps a simulation at a target tick rate and publishes frames to async subscribers.
+
+        Ticks are scheduled on a fixed grid, so a late tick doesn't shift the following
+        ones. A driver, which falls more than one tick behind, skips the missed ticks
+        instead of bursting through them.
+
+        Attributes:
+            simulation (Simulation): Simulation to step.
+            tick_rate (float): Target number of ticks per second.
+            steps_per_tick (int): Number of simulation steps per tick.
+            subscriptions (List[Subscription]): Current subscribers.
+            ticks (int): Number of ticks made.
+            skipped (int): Number of ticks skipped after overruns.
+    """
+
+    def __init__(self, simulation: Simulation, tick_rate: float, steps_per_tick: int = 1):
+        """RealtimeDriver initializer."""
+        if tick_rate <= 0:
+            raise ValueError("The tick rate must be positive")
+        self.simulation = simulation
+        self.tick_rate = tick_rate
+        self.steps_per_tick = steps_per_tick
+        self.subscriptions: List[Subscription] = []
+        self.ticks = 0
+        self.skipped = 0
+        self._jitter_total = 0.0
+        self._jitter_max = 0.0
+        self._running = False
+
+    def subscribe(self, maxsize: int = 8, policy: str = DROP_OLDEST) -> Subscription:
+        subscription = Subscription(maxsize, policy)
+        self.subscriptions.append(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        self.subscriptions.remove(subscription)
+        subscription.close()
+
+    def stop(self) -> None:
+        """Makes ``run`` return after the current tick."""
+        self._running = False
+
+    async def run(self, ticks: Optional[int] = None) -> None:
+        """Runs the paced loop until ``stop`` is called or ``ticks`` ticks are made.
+
+            Args:
+                ticks (int): Number of ticks, runs until stopped by default.
+
+            Returns:
+                None.
+        """
+        loop = asyncio.get_running_loop()
+        period = 1.0 / self.tick_rate
+        deadline = loop.time()
+        self._running = True
+        made = 0
+        try:
+            while self._running and (ticks is None or made < ticks):
+                now = loop.time()
+                jitter = now - deadline
+                if jitter > period:
+                    missed = int(jitter // period)
+                    self.skipped += missed
+                    deadline += missed * period
+                    jitter -= missed * period
+                self._jitter_total += abs(jitter)
+                self._jitter_max = max(self._jitter_max, abs(jitter))
+                for _ in range(self.steps_per_tick):
+                    self.simulation.step()
+                balls = self.simulation.balls
+                frame = Frame(self.simulation.step_count, now, balls.x.copy(), balls.y.copy())
+                for subscription in self.subscriptions:
+                    subscription.publish(frame)
+                self.ticks += 1
+                made += 1
+                deadline += period
+                await asyncio.sleep(max(0.0, deadline - loop.time()))
+        finally:
+            self._running = False
+            for subscription in self.subscriptions:
+                subscription.close()
+
+    def metrics(self) -> Dict[str, Any]:
+        """Returns tick, jitter and dropped frame statistics."""
+        return {
+            "ticks": self.ticks,
+            "skipped_ticks": self.skipped,
+            "jitter_mean": self._jitter_total / self.ticks if self.ticks else 0.0,
+            "jitter_max": self._jitter_max,
+            "dropped_frames": sum(s.dropped for s in self.subscriptions),
+            "subscribers": [{"delivered": s.delivered, "dropped": s.dropped, "queued": len(s.frames)}
+                            for s in self.subscriptions],
+        }
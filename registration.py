@@ -0,0 +1,118 @@
+import asyncio
+from collections import deque
+from typing import Any, Dict, List, Optional
+
+from course import REGISTRY, Course, EnrollmentRegistry
+
+ENROLL = "enroll"
+UNENROLL = "unenroll"
+
+ENROLLED = "enrolled"
+FULL = "full"
+ALREADY_ENROLLED = "already_enrolled"
+UNENROLLED = "unenrolled"
+NOT_ENROLLED = "not_enrolled"
+
+
+class EnrollmentService:
+    """Asyncio front end, which coalesces enrollment requests into batches per course.
+
+        Requests are queued per course and applied once per event loop iteration, so a
+        burst submitted together is handled in one pass: a run of enrollments goes
+        through ``Course.add_students``, unenrollments through the registry, in the
+        order they were submitted. The outcome of every request matches the one of
+        the same calls made synchronously in that order.
+
+        Attributes:
+            registry (EnrollmentRegistry): Registry of the enrollments.
+            queues (Dict[Course, deque]): Pending requests of every course.
+            requests (int): Number of requests applied.
+            batches (int): Number of batches applied.
+            latencies (deque): Seconds from submission to result of the latest requests.
+    """
+
+    def __init__(self, registry: Optional[EnrollmentRegistry] = None, latency_window: int = 10000):
+        """EnrollmentService initializer."""
+        self.registry = registry or REGISTRY
+        self.queues: Dict[Course, deque] = {}
+        self.requests = 0
+        self.batches = 0
+        self.latencies: deque = deque(maxlen=latency_window)
+
+    def enroll(self, student: Any, course: Course) -> asyncio.Future:
+        """Queues an enrollment, the future resolves to ENROLLED, FULL or ALREADY_ENROLLED."""
+        return self._submit(ENROLL, student, course)
+
+    def unenroll(self, student: Any, course: Course) -> asyncio.Future:
+        """Queues an unenrollment, the future resolves to UNENROLLED or NOT_ENROLLED."""
+        return self._submit(UNENROLL, student, course)
+
+    def _submit(self, kind: str, student: Any, course: Course) -> asyncio.Future:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        queue = self.queues.get(course)
+        if queue is None:
+            queue = self.queues[course] = deque()
+            loop.call_soon(self._flush, course)
+        queue.append((kind, student, future, loop.time()))
+        return future
+
+    def _flush(self, course: Course) -> None:
+        """Applies every pending request of the course, skipping the cancelled ones."""
+        pending = [request for request in self.queues.pop(course) if not request[2].cancelled()]
+        try:
+            statuses = self._apply(course, pending)
+        except Exception as error:
+            for _, _, future, _ in pending:
+                future.set_exception(error)
+            return
+        now = asyncio.get_running_loop().time()
+        for (_, _, future, submitted), status in zip(pending, statuses):
+            future.set_result(status)
+            self.latencies.append(now - submitted)
+        self.requests += len(pending)
+        self.batches += 1
+
+    def _apply(self, course: Course, pending: List[tuple]) -> List[str]:
+        statuses: List[str] = []
+        start = 0
+        while start < len(pending):
+            kind = pending[start][0]
+            stop = start
+            while stop < len(pending) and pending[stop][0] == kind:
+                stop += 1
+            students = [student for _, student, _, _ in pending[start:stop]]
+            if kind == UNENROLL:
+                statuses += [UNENROLLED if self.registry.unenroll(student, course) else NOT_ENROLLED
+                             for student in students]
+            else:
+                result = course.add_students(students, self.registry)
+                enrolled = {id(student) for student in result.enrolled}
+                full = {id(student) for student in result.rejected_full}
+                for student in students:
+                    if id(student) in enrolled:
+                        enrolled.discard(id(student))
+                        statuses.append(ENROLLED)
+                    else:
+                        statuses.append(FULL if id(student) in full else ALREADY_ENROLLED)
+            start = stop
+        return statuses
+
+    def metrics(self) -> Dict[str, Any]:
+        """Returns the queue depth, batch sizes and latency percentiles, in seconds."""
+        latencies = sorted(self.latencies)
+
+        def percentile(q: float) -> float:
+            return latencies[min(len(latencies) - 1, int(q * len(latencies)))] if latencies else 0.0
+
+        return {
+            "requests": self.requests,
+            "batches": self.batches,
+            "mean_batch": self.requests / self.batches if self.batches else 0.0,
+            "queue_depth": sum(len(queue) for queue in self.queues.values()),
+            "queued_courses": len(self.queues),
+            "latency_p50": percentile(0.5),
+            "latency_p90": percentile(0.9),
+            "latency_p99": percentile(0.99),
+            "latency_max": latencies[-1] if latencies else 0.0,
+        }
@@ -4,7 +4,7 @@ from typing import List, Any
 from dataclasses import dataclass
 from abc import ABC, abstractmethod
 
-from course import Course, Math, Programming, Algorithms
+from course import Course, EnrollmentResult, Math, Programming, Algorithms
 
 
 class PersonalInfo:
@@ -212,7 +212,7 @@ class Professor(Staff, ABC):
         pass
 
     @abstractmethod
-    def fill_course(self, group: Group) -> None:
+    def fill_course(self, group: Group) -> EnrollmentResult:
         pass
 
     @abstractmethod
@@ -346,9 +346,16 @@ class MathProfessor(Professor):
         else:
             print("The course has already been created")
 
-    def fill_course(self, group: Group) -> None:
-        for student in group.student_list:
-            self.course.add_student(student)
+    def fill_course(self, group: Group) -> EnrollmentResult:
+        """Enrolls the whole group into the professor's course at once
+
+            Args:
+                group (Group): Group, which should be enrolled.
+
+            Returns:
+                EnrollmentResult
+        """
+        return self.course.add_students(group.student_list)
 
     def define_control_works_date(self) -> None:
         if self.course.control_works_date is None:
@@ -483,9 +490,16 @@ class ProgrammingProfessor(Professor):
         else:
             print("The course has already been created")
 
-    def fill_course(self, group: Group) -> None:
-        for student in group.student_list:
-            self.course.add_student(student)
+    def fill_course(self, group: Group) -> EnrollmentResult:
+        """Enrolls the whole group into the professor's course at once
+
+            Args:
+                group (Group): Group, which should be enrolled.
+
+            Returns:
+                EnrollmentResult
+        """
+        return self.course.add_students(group.student_list)
 
     def add_extra_tasks(self, task: dict):
         self.course.extra_tasks.update(task)
@@ -616,9 +630,16 @@ class AlgorithmsProfessor(Professor):
         else:
             print("The course has already been created")
 
-    def fill_course(self, group: Group) -> None:
-        for student in group.student_list:
-            self.course.add_student(student)
+    def fill_course(self, group: Group) -> EnrollmentResult:
+        """Enrolls the whole group into the professor's course at once
+
+            Args:
+                group (Group): Group, which should be enrolled.
+
+            Returns:
+                EnrollmentResult
+        """
+        return self.course.add_students(group.student_list)
 
     def find_errors(self):
         if self.course.errors == 0:
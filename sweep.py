@@ -0,0 +1,138 @@
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Callable, Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+from ball import BallArray, Container
+
+BALL_PARAMETERS = ("x", "y", "radius", "velocity", "direction")
+CONTAINER_PARAMETERS = ("x", "y", "width", "height")
+
+
+class SweepResult:
+    """Summary statistics of a parameter sweep, one row per configuration.
+
+        Attributes:
+            configs (np.ndarray): Configurations, shaped (n, 9): the Ball arguments
+                followed by the Container arguments.
+            regions (int): The container is split into ``regions`` x ``regions`` cells.
+            horizontal (np.ndarray): Number of horizontal reflections.
+            vertical (np.ndarray): Number of vertical reflections.
+            occupancy (np.ndarray): Number of steps spent in each cell, shaped (n, regions ** 2).
+            final (np.ndarray): Final x, y, delta_x and delta_y, shaped (n, 4).
+            completed (int): Number of configurations, which have been run.
+    """
+
+    def __init__(self, configs: np.ndarray, regions: int):
+        """SweepResult initializer."""
+        self.configs = configs
+        self.regions = regions
+        self.horizontal = np.zeros(len(configs), dtype=np.int64)
+        self.vertical = np.zeros(len(configs), dtype=np.int64)
+        self.occupancy = np.zeros((len(configs), regions * regions), dtype=np.int64)
+        self.final = np.full((len(configs), 4), np.nan)
+        self.completed = 0
+
+    def add(self, start: int, summary: Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]) -> None:
+        """Stores the summary of the configurations ``start``, ``start + 1``, ..."""
+        horizontal, vertical, occupancy, final = summary
+        stop = start + len(horizontal)
+        self.horizontal[start:stop] = horizontal
+        self.vertical[start:stop] = vertical
+        self.occupancy[start:stop] = occupancy
+        self.final[start:stop] = final
+        self.completed += len(horizontal)
+
+    def bounces(self) -> np.ndarray:
+        """Returns the total number of wall hits of every configuration."""
+        return self.horizontal + self.vertical
+
+
+def grid(ball: Dict[str, Sequence], container: Dict[str, Sequence]) -> np.ndarray:
+    """Returns the cartesian product of the parameter grids.
+
+        Args:
+            ball (Dict[str, Sequence]): Values of every Ball argument.
+            container (Dict[str, Sequence]): Values of every Container argument.
+
+        Returns:
+            Configurations, shaped (n, 9).
+    """
+    axes = [ball[name] for name in BALL_PARAMETERS] + [container[name] for name in CONTAINER_PARAMETERS]
+    return np.array(list(itertools.product(*axes)), dtype=np.float64).reshape(-1, 9)
+
+
+def run_chunk(configs: np.ndarray, steps: int, regions: int):
+    """Runs a chunk of configurations side by side and summarises them.
+
+        Every configuration is a single ball in its own container, so the chunk is
+        stepped as one BallArray against a Container holding arrays of walls.
+
+        Args:
+            configs (np.ndarray): Configurations, shaped (m, 9).
+            steps (int): Number of steps.
+            regions (int): Number of cells along every side of the container.
+
+        Returns:
+            Horizontal and vertical reflection counts, occupancy of the cells and
+            final states of the chunk.
+    """
+    balls = BallArray(*configs[:, :5].T)
+    box = Container(*configs[:, 5:].T)
+    count = len(configs)
+    horizontal = np.zeros(count, dtype=np.int64)
+    vertical = np.zeros(count, dtype=np.int64)
+    occupancy = np.zeros(count * regions * regions, dtype=np.int64)
+    offset = np.arange(count) * regions * regions
+    # The container spans x1..x2 and y1..y2, both inclusive, one less than its width and height.
+    span_x = np.where(box.x2 > box.x1, box.x2 - box.x1, 1.0)
+    span_y = np.where(box.y2 > box.y1, box.y2 - box.y1, 1.0)
+    for _ in range(steps):
+        # A reflection always flips the sign bit, even of a zero velocity.
+        flipped_x, flipped_y = np.signbit(balls.delta_x), np.signbit(balls.delta_y)
+        box.collide_all(balls)
+        horizontal += np.signbit(balls.delta_x) != flipped_x
+        vertical += np.signbit(balls.delta_y) != flipped_y
+        column = np.clip(((balls.x - box.x1) * regions // span_x).astype(np.int64), 0, regions - 1)
+        row = np.clip(((balls.y - box.y1) * regions // span_y).astype(np.int64), 0, regions - 1)
+        occupancy += np.bincount(offset + row * regions + column, minlength=len(occupancy))
+    final = np.stack([balls.x, balls.y, balls.delta_x, balls.delta_y], axis=1)
+    return horizontal, vertical, occupancy.reshape(count, -1), final
+
+
+def sweep(ball: Dict[str, Sequence], container: Dict[str, Sequence], steps: int, regions: int = 2,
+          workers: Optional[int] = None, chunk_size: Optional[int] = None,
+          callback: Optional[Callable[[SweepResult], None]] = None) -> SweepResult:
+    """Runs every combination of the Ball and Container parameter grids in a process pool.
+
+        Workers receive chunks of configurations and send back only their summaries,
+        which are aggregated as soon as every chunk completes.
+
+        Args:
+            ball (Dict[str, Sequence]): Values of every Ball argument.
+            container (Dict[str, Sequence]): Values of every Container argument.
+            steps (int): Number of steps of every configuration.
+            regions (int): Number of cells along every side of the container.
+            workers (int): Number of processes, defaults to the number of cores.
+            chunk_size (int): Number of configurations sent to a worker at once, defaults to
+                an equal share per worker.
+            callback (Callable): Called with the partial result after every chunk.
+
+        Returns:
+            SweepResult
+    """
+    configs = grid(ball, container)
+    result = SweepResult(configs, regions)
+    workers = workers or os.cpu_count() or 1
+    if chunk_size is None:
+        chunk_size = max(-(-len(configs) // workers), 1)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(run_chunk, configs[start:start + chunk_size], steps, regions): start
+                   for start in range(0, len(configs), chunk_size)}
+        for future in as_completed(futures):
+            result.add(futures[future], future.result())
+            if callback is not None:
+                callback(result)
+    return result
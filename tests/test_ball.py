@@ -1,5 +1,10 @@
 import unittest
-from ball import Ball, Container
+from math import cos, pi, sin
+
+import numpy as np
+
+from ball import Ball, BallArray, Container, PolygonContainer, Simulation, SpatialHash
+from events import EventDrivenSimulation
 
 
 class TestBall(unittest.TestCase):
@@ -13,3 +18,136 @@ class TestBall(unittest.TestCase):
             self.assertGreaterEqual(ball.y - ball.radius, box.y1)
             self.assertLessEqual(ball.x + ball.radius, box.x2)
             self.assertLessEqual(ball.y + ball.radius, box.y2)
+
+    def test_collide_all_matches_collides(self):
+        balls = [Ball(50, 50, 5, 10, 30), Ball(20, 70, 3, 7, 1), Ball(80, 15, 4, 12, 2.5)]
+        box = Container(0, 0, 100, 100)
+        swarm = BallArray.from_balls(balls)
+        for step in range(0, 100):
+            for ball in balls:
+                ball.move()
+                box.collides(ball)
+            box.collide_all(swarm)
+        for ball, copy in zip(balls, swarm.to_balls()):
+            self.assertEqual((ball.x, ball.y, ball.delta_x, ball.delta_y),
+                             (copy.x, copy.y, copy.delta_x, copy.delta_y))
+
+    def test_spatial_hash_pairs(self):
+        rng = np.random.default_rng(1)
+        swarm = BallArray(rng.uniform(0, 100, 300), rng.uniform(0, 100, 300), rng.uniform(1, 3, 300),
+                          np.ones(300), rng.uniform(0, 6.28, 300))
+        grid = SpatialHash()
+        grid.build(swarm)
+        found = {tuple(sorted(pair)) for pair in zip(*grid.pairs())}
+        reach = 2 * swarm.radius.max()
+        for i in range(300):
+            for j in range(i + 1, 300):
+                if (swarm.x[i] - swarm.x[j]) ** 2 + (swarm.y[i] - swarm.y[j]) ** 2 < reach ** 2:
+                    self.assertIn((i, j), found)
+
+    def test_spatial_hash_collide_matches_ball_collides(self):
+        first, second = Ball(10, 10, 2, 1, 0), Ball(13, 11, 3, 1, 3)
+        swarm = BallArray.from_balls([first, second])
+        self.assertTrue(first.collides(second))
+        self.assertEqual(SpatialHash().collide(swarm), 1)
+        self.assertAlmostEqual(swarm.delta_x[0], first.delta_x)
+        self.assertAlmostEqual(swarm.delta_y[1], second.delta_y)
+        self.assertAlmostEqual(4 * first.delta_x + 9 * second.delta_x, 4 * cos(0) + 9 * cos(3))
+
+    def test_state_at_matches_loop(self):
+        box = Container(0, 0, 100, 100)
+        for args in ((50, 50, 5, 10, 30), (93.5, 20, 5, 3.3, 0.1), (20, 70, 3, 7, 4), (50, 50, 45, 7.3, 1)):
+            start, ball = Ball(*args), Ball(*args)
+            states = box.states_at(start, np.arange(300))
+            for step in range(0, 300):
+                self.assertEqual(box.position_at(start, step), (states[0][step], states[1][step]))
+                for expected, value in zip((ball.x, ball.y, ball.delta_x, ball.delta_y), box.state_at(start, step)):
+                    self.assertAlmostEqual(expected, value, places=6)
+                ball.move()
+                box.collides(ball)
+        start, ball = Ball(93.5, 20, 5, 3.3, 0.1), Ball(93.5, 20, 5, 3.3, 0.1)
+        for step in range(0, 20000):
+            ball.move()
+            box.collides(ball)
+        for expected, value in zip((ball.x, ball.y, ball.delta_x, ball.delta_y), box.state_at(start, 20000)):
+            self.assertAlmostEqual(expected, value, places=6)
+
+    def test_simulation_records_with_stride(self):
+        ball = Ball(50, 50, 5, 10, 30)
+        box = Container(0, 0, 100, 100)
+        simulation = Simulation([Ball(50, 50, 5, 10, 30)], box, stride=3)
+        trajectory = simulation.run(10)
+        self.assertEqual(trajectory.shape, (3, 1, 4))
+        self.assertEqual(list(simulation.steps), [3, 6, 9])
+        for step in range(1, 10):
+            ball.move()
+            box.collides(ball)
+            if step % 3 == 0:
+                self.assertEqual(list(trajectory[step // 3 - 1, 0]), [ball.x, ball.y, ball.delta_x, ball.delta_y])
+        x, y = box.position_at(Ball(50, 50, 5, 10, 30), 12)
+        self.assertAlmostEqual(simulation.run(2)[0, 0, 0], x)
+        self.assertAlmostEqual(simulation.trajectory[0, 0, 1], y)
+
+    def test_sweep_does_not_tunnel(self):
+        ball = Ball(50, 50, 5, 250, 0)
+        hits = Container(0, 0, 101, 101).sweep(ball)
+        # 45 to the right wall, 90 back, 90 forth and the last 25 back again.
+        self.assertEqual(hits, 3)
+        self.assertAlmostEqual(ball.x, 70.0)
+        self.assertAlmostEqual(ball.delta_x, -250.0)
+        swarm = BallArray([50], [50], [5], [250], [0])
+        self.assertEqual(list(Container(0, 0, 101, 101).sweep_all(swarm)), [3])
+        self.assertAlmostEqual(swarm.x[0], 70.0)
+
+    def test_sweep_all_matches_event_driven_simulation(self):
+        rng = np.random.default_rng(5)
+        balls = []
+        for x, y, v, d in zip(rng.uniform(10, 190, 40), rng.uniform(10, 190, 40), rng.uniform(5, 40, 40),
+                              rng.uniform(0, 6.28, 40)):
+            if all((x - b.x) ** 2 + (y - b.y) ** 2 > 36 for b in balls):
+                balls.append(Ball(x, y, 3, v, d))
+        box = Container(0, 0, 201, 201)
+        swarm = BallArray.from_balls(balls)
+        reference = EventDrivenSimulation(balls, box)
+        grid = SpatialHash()
+        hits = 0
+        for tick in range(10):
+            hits += box.sweep_all(swarm, grid).sum()
+            reference.run(1)
+        reference.sync()
+        self.assertGreater(hits, 0)
+        for i, ball in enumerate(balls):
+            self.assertAlmostEqual(swarm.x[i], ball.x, places=3)
+            self.assertAlmostEqual(swarm.y[i], ball.y, places=3)
+
+    def test_sweep_all_bounces_off_a_wall_into_a_ball(self):
+        balls = [Ball(90, 50, 3, 20, 0), Ball(79, 50, 3, 0, 0)]
+        swarm = BallArray.from_balls(balls)
+        box = Container(0, 0, 100, 100)
+        hits = box.sweep_all(swarm, SpatialHash())
+        reference = EventDrivenSimulation(balls, box)
+        reference.run(1)
+        reference.sync()
+        self.assertEqual(list(hits), [2, 1])
+        for i, ball in enumerate(balls):
+            self.assertAlmostEqual(swarm.x[i], ball.x)
+            self.assertAlmostEqual(swarm.delta_x[i], ball.delta_x)
+        self.assertAlmostEqual(swarm.x[0], 85.0)
+        self.assertAlmostEqual(swarm.x[1], 76.0)
+
+    def test_polygon_container(self):
+        hexagon = PolygonContainer([(50 + 50 * cos(k * pi / 3), 50 + 50 * sin(k * pi / 3)) for k in range(6)])
+        balls = [Ball(50, 50, 4, 6, 0.3), Ball(30, 60, 2, 9, 2), Ball(70, 40, 3, 4, 5)]
+        swarm = BallArray.from_balls(balls)
+        for step in range(0, 300):
+            for ball in balls:
+                ball.move()
+                hexagon.collides(ball)
+            hexagon.collide_all(swarm)
+            for i, ball in enumerate(balls):
+                self.assertTrue(np.all(hexagon.normals @ (ball.x, ball.y) - hexagon.offsets > -ball.delta_x ** 2 - ball.delta_y ** 2))
+                self.assertAlmostEqual(swarm.x[i], ball.x)
+                self.assertAlmostEqual(swarm.delta_y[i], ball.delta_y)
+        self.assertAlmostEqual(np.hypot(swarm.delta_x[0], swarm.delta_y[0]), 6)
+        with self.assertRaises(ValueError):
+            PolygonContainer([(0, 0), (10, 0), (5, 2), (10, 10), (0, 10)])
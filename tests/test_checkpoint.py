@@ -0,0 +1,79 @@
+import os
+import tempfile
+import time
+import unittest
+
+import numpy as np
+
+from ball import BallArray, Container, PolygonContainer, Simulation, SpatialHash
+from checkpoint import Checkpointer, load, save
+
+
+class SlowCheckpointer(Checkpointer):
+    failing = None
+
+    def _write(self, meta, columns):
+        if meta["step_count"] == self.failing:
+            raise OSError("No space left on device")
+        time.sleep(0.02)
+        super()._write(meta, columns)
+
+
+class TestCheckpoint(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "run.ckp")
+        rng = np.random.default_rng(3)
+        self.swarm = lambda: BallArray(*np.random.default_rng(3).uniform(10, 90, (2, 50)), np.full(50, 2.0),
+                                       np.full(50, 3.0), np.random.default_rng(4).uniform(0, 6.28, 50))
+        self.rng = rng
+
+    def test_resume_is_bit_for_bit(self):
+        expected = Simulation(self.swarm(), Container(0, 0, 100, 100), grid=SpatialHash()).run(60)
+        simulation = Simulation(self.swarm(), Container(0, 0, 100, 100), grid=SpatialHash())
+        simulation.run(40)
+        save(self.path, simulation, self.rng)
+        draws = self.rng.random(3)
+        restored, rng = load(self.path)
+        self.assertEqual(restored.step_count, 40)
+        self.assertTrue(np.array_equal(rng.random(3), draws))
+        self.assertTrue(np.array_equal(restored.run(20), expected[40:]))
+
+    def test_checkpointer_writes_in_background(self):
+        with Checkpointer(self.path, every=10) as checkpointer:
+            simulation = Simulation(self.swarm(), Container(0, 0, 100, 100), checkpointer=checkpointer)
+            simulation.run(30)
+            checkpointer.wait()
+        self.assertEqual(checkpointer.saved, 3)
+        restored, rng = load(self.path)
+        self.assertIsNone(rng)
+        self.assertIn(restored.step_count, (10, 20, 30))
+
+    def test_checkpointer_writes_every_due_checkpoint(self):
+        with SlowCheckpointer(self.path, every=1) as checkpointer:
+            Simulation(self.swarm(), Container(0, 0, 100, 100), checkpointer=checkpointer).run(10)
+        self.assertEqual(checkpointer.saved, 10)
+        self.assertGreater(checkpointer.blocked, 0)
+        self.assertEqual(load(self.path)[0].step_count, 10)
+
+    def test_checkpointer_raises_a_failed_write(self):
+        checkpointer = SlowCheckpointer(self.path, every=1)
+        checkpointer.failing = 1
+        with self.assertRaises(OSError):
+            Simulation(self.swarm(), Container(0, 0, 100, 100), checkpointer=checkpointer).run(5)
+        checkpointer.close()
+
+    def test_rejects_other_containers(self):
+        hexagon = PolygonContainer([(0, 0), (100, 0), (100, 100), (0, 100)])
+        with self.assertRaises(TypeError):
+            Simulation(self.swarm(), hexagon, checkpointer=Checkpointer(self.path, every=1))
+        with self.assertRaises(TypeError):
+            save(self.path, Simulation(self.swarm(), hexagon))
+        self.assertFalse(os.path.exists(self.path))
+
+    def test_rejects_other_files(self):
+        with open(self.path, "wb") as file:
+            file.write(b"\0" * 64)
+        with self.assertRaises(ValueError):
+            load(self.path)
@@ -1,8 +1,12 @@
+import random
+import sys
+import threading
+import time
 import unittest
 from datetime import datetime, timedelta
 
-from course import Seminar, CourseProgress, Math, Enrollment
-from staff import Student
+from course import Seminar, CourseProgress, Math, Programming, Enrollment, EnrollmentRegistry, NotesLog
+from staff import MathProfessor, Student
 
 
 class TestCourse(unittest.TestCase):
@@ -34,6 +38,322 @@ class TestCourse(unittest.TestCase):
         self.assertEqual(student.courses, [])
         self.assertEqual(course.students, [])
 
+    def test_registry(self):
+        registry = EnrollmentRegistry()
+        math = Math('math', datetime.now(), datetime.now(), "desc test", [], [], limit=3)
+        programming = Programming('programming', datetime.now(), datetime.now(), "desc test", [], [], limit=3)
+        students = [Student(i, f"student{i}_name", "address", "phone", "email", "position", "rank", 50,
+                            student_number=i, average_mark=4) for i in range(4)]
+        for student in students:
+            Enrollment(student, math, registry).enroll()
+        Enrollment(students[0], programming, registry).enroll()
+        Enrollment(students[0], math, registry).enroll()
+        self.assertEqual(math.students, students[:3])
+        self.assertEqual(students[0].courses, [math, programming])
+        self.assertFalse(registry.is_enrolled(students[3], math))
+        Enrollment(students[0], math, registry).unenroll(0)
+        self.assertEqual(math.students, [students[1], students[2]])
+        self.assertEqual(students[0].courses, [programming])
+        self.assertFalse(registry.is_enrolled(students[0], math))
+        self.assertTrue(registry.is_enrolled(students[2], math))
+        self.assertEqual(registry.students_of[math], {1: 0, 2: 1})
+        self.assertEqual(registry.courses_of[0], {'programming': 0})
+        self.assertFalse(registry.unenroll(students[0], math))
+        self.assertTrue(registry.enroll(students[3], math))
+        self.assertFalse(registry.enroll(students[0], math))
+        other_math = Math('math', datetime.now(), datetime.now(), "desc test", [], [], limit=3)
+        with self.assertRaises(ValueError):
+            registry.enroll(students[1], other_math)
+        self.assertEqual(other_math.add_students([students[1], students[0]], registry).already_enrolled, [students[1]])
+        self.assertEqual(other_math.students, [students[0]])
+        self.assertTrue(registry.unenroll(students[0], other_math))
+        self.assertEqual(students[0].courses, [programming])
+        self.assertEqual(registry.students_of[math], {1: 0, 2: 1, 3: 2})
+
+    def test_add_students(self):
+        registry = EnrollmentRegistry()
+        course = Math('math', datetime.now(), datetime.now(), "desc test", [], [], limit=3)
+        students = [Student(i, f"student{i}_name", "address", "phone", "email", "position", "rank", 50,
+                            student_number=i, average_mark=4) for i in range(5)]
+        Enrollment(students[1], course, registry).enroll()
+        result = course.add_students([students[0], students[1], students[2], students[0], students[3], students[4]],
+                                     registry)
+        self.assertEqual(result.enrolled, [students[0], students[2]])
+        self.assertEqual(result.already_enrolled, [students[1], students[0]])
+        self.assertEqual(result.rejected_full, [students[3], students[4]])
+        self.assertEqual(course.students, [students[1], students[0], students[2]])
+        self.assertEqual(len(students[2].course_progress), 1)
+        registry.unenroll(students[1], course)
+        self.assertEqual(course.add_students(students, registry).enrolled, [students[1]])
+
+    def test_no_overbooking(self):
+        class SlowList(list):
+            # Yields to other threads between the seat check and the reservation.
+            def __len__(self):
+                time.sleep(0)
+                return super().__len__()
+
+        registry = EnrollmentRegistry()
+        course = Math('math', datetime.now(), datetime.now(), "desc test", [], [], limit=10)
+        course.students = SlowList()
+        students = [Student(i, f"student{i}_name", "address", "phone", "email", "position", "rank", 50,
+                            student_number=i, average_mark=4) for i in range(320)]
+        threads = [threading.Thread(target=lambda part: [registry.enroll(s, course) for s in part],
+                                    args=(students[i::32],)) for i in range(32)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(course.students), 10)
+
+    def test_concurrent_enrollment(self):
+        registry = EnrollmentRegistry()
+        courses = [Math(f'course{i}', datetime.now(), datetime.now(), "desc test", [], [], limit=10) for i in range(4)]
+        students = [Student(i, f"student{i}_name", "address", "phone", "email", "position", "rank", 50,
+                            student_number=i, average_mark=4) for i in range(64)]
+        interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+
+        def work(first):
+            for round_ in range(20):
+                for student in students[first::16]:
+                    course = courses[(student.personal_info.id_ + round_) % 4]
+                    try:
+                        registry.enroll(student, course)
+                    except ValueError:
+                        pass
+                    if round_ % 3 == 2:
+                        registry.unenroll(student, courses[round_ % 4])
+
+        threads = [threading.Thread(target=work, args=(i % 16,)) for i in range(32)]
+        try:
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            sys.setswitchinterval(interval)
+        for course in courses:
+            self.assertLessEqual(len(course.students), course.limit)
+            self.assertEqual(len(set(map(id, course.students))), len(course.students))
+            self.assertEqual(registry.students_of[course],
+                             {student.personal_info.id_: i for i, student in enumerate(course.students)})
+            for student in course.students:
+                self.assertIn(course, student.courses)
+        for student in students:
+            self.assertEqual(registry.courses_of.get(student.personal_info.id_, {}),
+                             {course.title: i for i, course in enumerate(student.courses)})
+
+    def test_waitlist_promotion(self):
+        registry = EnrollmentRegistry()
+        course = Math('math', datetime.now(), datetime.now(), "desc test", [], [], limit=2)
+        students = [Student(i, f"student{i}_name", "address", "phone", "email", "position", "rank", 50,
+                            student_number=i, average_mark=mark) for i, mark in enumerate([3, 4, 2, 5, 4, 3])]
+        waitlist = registry.waitlist(course, key=lambda student: -student.average_mark)
+        promotions = []
+        registry.on_promote(lambda student, promoted_to: promotions.append((student.personal_info.id_, promoted_to)))
+        self.assertEqual(course.add_students(students[:4], registry).rejected_full, students[2:4])
+        Enrollment(students[4], course, registry).enroll()
+        Enrollment(students[5], course, registry).enroll()
+        self.assertEqual(len(waitlist), 4)
+        self.assertTrue(waitlist.remove(students[4]))
+        self.assertFalse(registry.enroll(students[2], course))
+        self.assertEqual(len(waitlist), 3)
+        registry.unenroll(students[0], course)
+        registry.unenroll(students[1], course)
+        self.assertEqual(promotions, [(3, course), (5, course)])
+        self.assertEqual(course.students, [students[3], students[5]])
+        self.assertEqual(len(students[3].course_progress), 1)
+        self.assertEqual(list(waitlist.heap[0][2:]), [students[2]])
+        registry.unenroll(students[3], course)
+        self.assertEqual(promotions[-1], (2, course))
+        self.assertEqual(len(waitlist), 0)
+        registry.unenroll(students[5], course)
+        self.assertEqual(course.students, [students[2]])
+
+    def test_progress_aggregates(self):
+        assignments = {f"task{i}": {'title': f'test{i}', 'description': 'testing...', 'is_done': i % 2 == 0,
+                                    'mark': 0.0} for i in range(5)}
+        course = Math('math', datetime.now(), datetime.now(), "desc test", [], assignments, limit=3)
+        progress = CourseProgress("math", course.assignments, course)
+        other = CourseProgress("math", course.assignments, course)
+
+        def full_scan(tasks):
+            return sum(task["mark"] for task in tasks.values()) / len(tasks)
+
+        self.assertEqual(progress.get_final_mark(), 0.0)
+        MathProfessor.check_assignment(progress.completed_assignments)
+        self.assertEqual(progress.get_final_mark(), full_scan(progress.completed_assignments))
+        self.assertEqual(progress.get_final_mark(), 3.0)
+        self.assertEqual(progress.get_progress_to_date(datetime.now() + timedelta(days=1)), 3.0)
+        self.assertEqual(progress.get_progress_to_date(datetime.now() - timedelta(days=1)), 0.0)
+        self.assertEqual(other.get_final_mark(), 0.0)
+        progress.completed_assignments["task1"]["mark"] = 4.5
+        progress.completed_assignments["task5"] = {'title': 'test5', 'description': '', 'is_done': True, 'mark': 2.25}
+        del progress.completed_assignments["task0"]
+        progress.completed_assignments.pop("task2")
+        self.assertEqual(progress.get_final_mark(), full_scan(progress.completed_assignments))
+        self.assertTrue(progress.check_aggregates())
+        self.assertTrue(other.check_aggregates())
+        self.assertEqual(other.get_final_mark(), full_scan(other.completed_assignments))
+        progress._marks_count += 1
+        self.assertFalse(progress.check_aggregates())
+
+    def test_final_mark_matches_scan(self):
+        rng = random.Random(7)
+        course = Math('math', datetime.now(), datetime.now(), "desc test", [], {}, limit=3)
+        for _ in range(200):
+            tasks = {f"task{i}": {'title': '', 'is_done': True, 'mark': round(rng.uniform(0, 5), 2)}
+                     for i in range(rng.randint(1, 30))}
+            progress = CourseProgress("math", tasks, course)
+            for _ in range(5):
+                progress.completed_assignments[rng.choice(list(tasks))]["mark"] = round(rng.uniform(0, 5), 2)
+                scan = 0.0
+                for task in progress.completed_assignments.values():
+                    scan += task["mark"]
+                self.assertEqual(progress.get_final_mark(), scan / len(tasks))
+            self.assertTrue(progress.check_aggregates())
+
+    def test_progress_to_date_matches_scan(self):
+        rng = random.Random(11)
+        start = datetime(2024, 9, 1)
+        course = Math('math', start, start + timedelta(days=120), "desc test", [], {}, limit=3)
+        for case in range(300):
+            count = rng.randint(1, 30)
+            if case % 2:
+                tasks = {f"task{i}": {'title': '', 'is_done': True, 'mark': rng.uniform(0, 5)} for i in range(count)}
+            else:
+                tasks = {start + timedelta(days=4 * i): {'title': '', 'is_done': True, 'mark': rng.uniform(0, 5)}
+                         for i in range(count)}
+            progress = CourseProgress("math", tasks, course)
+            dates = [start + timedelta(days=rng.randint(-5, 130)) for _ in range(8)]
+
+            def scan(date):
+                grades, i = 0.0, 0.0
+                for name, task in progress.completed_assignments.items():
+                    if progress._date_of(name, task) <= date:
+                        grades += task["mark"]
+                        i += 1.0
+                return grades / (i or 1.0)
+
+            for _ in range(4):
+                self.assertEqual([progress.get_progress_to_date(date) for date in dates], [scan(d) for d in dates])
+                self.assertEqual(progress.progress_over_dates(dates), [scan(date) for date in dates])
+                progress.completed_assignments[rng.choice(list(tasks))]["mark"] = rng.uniform(0, 5)
+            self.assertTrue(progress.check_aggregates())
+        progress._date_sums[0] += 1e-9
+        self.assertFalse(progress.check_aggregates())
+
+    def test_assignment_template(self):
+        assignments = {f"task{i}": {'title': f'test{i}', 'description': 'testing...', 'is_done': True,
+                                    'mark': 0.0} for i in range(3)}
+        course = Math('math', datetime.now(), datetime.now(), "desc test", [], assignments, limit=3)
+        progress = CourseProgress("math", course.assignments, course)
+        other = CourseProgress("math", course.assignments, course)
+        self.assertIs(progress.template, course.template)
+        self.assertIs(other.template, course.template)
+        progress.comment = "graded late"
+        self.assertEqual(progress.comment, "graded late")
+        self.assertEqual(progress.marks.typecode, 'd')
+        self.assertEqual(progress.done.typecode, 'b')
+        MathProfessor.check_assignment(other.completed_assignments)
+        self.assertEqual(list(other.marks), [5.0, 5.0, 5.0])
+        self.assertEqual(list(progress.marks), [0.0, 0.0, 0.0])
+        self.assertEqual(course.assignments["task0"]["mark"], 0.0)
+        self.assertEqual(dict(progress.completed_assignments["task1"]),
+                         {'title': 'test1', 'description': 'testing...', 'is_done': True, 'mark': 0.0})
+        with self.assertRaises(TypeError):
+            progress.completed_assignments["task1"]["title"] = "changed"
+        progress.completed_assignments["extra"] = {'title': 'extra', 'is_done': False, 'mark': 4.0}
+        self.assertIsNot(progress.template, course.template)
+        self.assertEqual(len(other.completed_assignments), 3)
+        self.assertEqual(progress.get_final_mark(), 1.0)
+        MathProfessor.check_assignment(course.assignments)
+        course.assignments["task3"] = {'title': 'test3', 'is_done': False, 'mark': 4.0}
+        self.assertEqual(assignments["task0"]["mark"], 0.0)
+        self.assertEqual(list(other.marks), [5.0, 5.0, 5.0])
+        self.assertEqual(len(other.completed_assignments), 3)
+        fresh = CourseProgress("math", course.assignments, course)
+        self.assertIs(fresh.template, course.template)
+        self.assertEqual(list(fresh.marks), [5.0, 5.0, 5.0, 4.0])
+        del course.assignments["task0"]
+        self.assertEqual(len(CourseProgress("math", course.assignments, course).completed_assignments), 3)
+        self.assertEqual(len(fresh.completed_assignments), 4)
+        course.assignments = dict(assignments)
+        self.assertEqual(list(CourseProgress("math", course.assignments, course).marks), [0.0, 0.0, 0.0])
+
+    def test_assignment_outlives_other_removals(self):
+        tasks = {f"task{i}": {'title': f'test{i}', 'is_done': False, 'mark': 0.0} for i in range(4)}
+        course = Math('math', datetime.now(), datetime.now(), "desc test", [], tasks, limit=3)
+        progress = CourseProgress("math", course.assignments, course)
+        task1 = progress.completed_assignments["task1"]
+        task3 = progress.completed_assignments["task3"]
+        del progress.completed_assignments["task0"]
+        task1["mark"] = 5.0
+        self.assertEqual(progress.completed_assignments["task1"]["mark"], 5.0)
+        self.assertEqual(progress.completed_assignments["task2"]["mark"], 0.0)
+        del progress.completed_assignments["task3"]
+        with self.assertRaises(KeyError):
+            task3["mark"] = 5.0
+        self.assertTrue(progress.check_aggregates())
+
+    def test_progress_over_dates(self):
+        start = datetime(2024, 9, 1)
+        course = Math('math', start, start + timedelta(days=120), "desc test", [], {}, limit=3)
+        tasks = {start + timedelta(days=7 * i): {'title': f'test{i}', 'is_done': True, 'mark': float(i % 5)}
+                 for i in range(1, 15, 2)}
+        tasks["late"] = {'title': 'late', 'date': start + timedelta(days=30), 'is_done': True, 'mark': 4.5}
+        tasks["undated"] = {'title': 'undated', 'is_done': True, 'mark': 1.0}
+        progress = CourseProgress("math", tasks, course)
+
+        def full_scan(date):
+            marks = [task["mark"] for name, task in progress.completed_assignments.items()
+                     if progress._date_of(name, task) <= date]
+            return sum(marks) / max(len(marks), 1)
+
+        weeks = [start + timedelta(days=d) for d in range(-7, 120, 7)][::-1]
+        self.assertEqual(progress.progress_over_dates(weeks), [full_scan(date) for date in weeks])
+        self.assertEqual(progress.get_progress_to_date(start - timedelta(days=1)), 0.0)
+        self.assertEqual(progress.get_progress_to_date(start), 1.0)
+        progress.completed_assignments["late"]["mark"] = 2.0
+        self.assertEqual([progress.get_progress_to_date(date) for date in weeks], [full_scan(date) for date in weeks])
+        progress.completed_assignments[start + timedelta(days=3)] = {'title': 'quiz', 'is_done': True, 'mark': 5.0}
+        self.assertEqual(progress.progress_over_dates(weeks), [full_scan(date) for date in weeks])
+        self.assertTrue(progress.check_aggregates())
+
+    def test_notes_log(self):
+        course = Math('math', datetime.now(), datetime.now(), "desc test", [], [], limit=1)
+        progress = CourseProgress("math", [], course)
+        keys = [progress.fill_notes(f"note{i}") for i in range(100)]
+        self.assertEqual(len(set(keys)), 100)
+        self.assertEqual(keys, sorted(keys))
+        self.assertEqual(progress.notes[keys[42]], "note42")
+        progress.remove_note(keys[42])
+        self.assertNotIn(keys[42], progress.notes)
+        self.assertEqual(len(progress.notes), 99)
+        self.assertEqual([note for _, note in progress.notes.range(keys[40], keys[45])],
+                         ["note40", "note41", "note43", "note44"])
+        pages = list(progress.notes.pages(30))
+        self.assertEqual([len(page) for page in pages], [30, 30, 30, 9])
+        self.assertEqual([key for page in pages for key, _ in page], list(progress.notes))
+
+    def test_notes_retention(self):
+        start = datetime(2024, 9, 1)
+        notes = NotesLog(max_count=10)
+        for i in range(1000):
+            notes.append(i, start)
+        self.assertEqual(list(notes.values()), list(range(990, 1000)))
+        self.assertLessEqual(len(notes._keys), 2 * 10 + 16)
+        notes = NotesLog(max_age=timedelta(days=7))
+        for day in range(30):
+            notes.append(day, start + timedelta(days=day))
+        self.assertEqual(list(notes.values()), list(range(22, 30)))
+        notes.evict(start + timedelta(days=35))
+        self.assertEqual(list(notes.values()), [28, 29])
+        notes[start + timedelta(days=40)] = "late"
+        self.assertEqual(list(notes.values()), ["late"])
+        self.assertEqual(notes, {start + timedelta(days=40): "late"})
+
     # class Seminar tests
 
     def test_implement_item(self):
@@ -0,0 +1,73 @@
+import unittest
+
+import numpy as np
+
+from ball import BallArray, Container, Simulation, SpatialHash
+from domain import DomainDecomposition
+
+
+def swarm(n, seed):
+    rng = np.random.default_rng(seed)
+    return BallArray(rng.uniform(10, 290, n), rng.uniform(10, 190, n), rng.uniform(1, 3, n),
+                     rng.uniform(1, 4, n), rng.uniform(0, 2 * np.pi, n))
+
+
+class FailingContainer(Container):
+    def collide_all(self, balls):
+        if np.any(balls.x > 150):
+            raise ArithmeticError("right half")
+        return super().collide_all(balls)
+
+
+class TestDomainDecomposition(unittest.TestCase):
+    def test_matches_simulation(self):
+        box = Container(0, 0, 300, 200)
+        for workers, collisions in ((2, False), (3, True)):
+            reference = Simulation(swarm(200, workers), box, grid=SpatialHash() if collisions else None)
+            with DomainDecomposition(swarm(200, workers), box, workers=workers, collisions=collisions) as domain:
+                domain.run(150)
+                domain.run(50)
+                balls = domain.balls
+            for _ in range(200):
+                reference.step()
+            self.assertEqual(domain.step_count, 200)
+            self.assertEqual(len(balls), 200)
+            for name in ("x", "y", "delta_x", "delta_y"):
+                np.testing.assert_allclose(getattr(balls, name), getattr(reference.balls, name), atol=1e-6)
+            np.testing.assert_array_equal(balls.radius, reference.balls.radius)
+
+    def test_rebalances_a_spreading_swarm(self):
+        box = Container(0, 0, 300, 200)
+        rng = np.random.default_rng(3)
+
+        def clustered():
+            return BallArray(rng.uniform(3, 30, 400), rng.uniform(10, 190, 400), np.full(400, 1.0),
+                             rng.uniform(1, 4, 400), rng.uniform(0, 2 * np.pi, 400))
+
+        balls = clustered()
+        reference = Simulation(BallArray(balls.x, balls.y, balls.radius, balls.velocity, balls.direction), box)
+        with DomainDecomposition(balls, box, workers=4, capacity=150) as domain:
+            domain.run(150)
+            result = domain.balls
+            self.assertGreater(domain.rebalances, 0)
+            self.assertEqual(domain.step_count, 150)
+        for _ in range(150):
+            reference.step()
+        for name in ("x", "y", "delta_x", "delta_y"):
+            np.testing.assert_allclose(getattr(result, name), getattr(reference.balls, name), atol=1e-6)
+
+    def test_reports_the_failing_worker(self):
+        with DomainDecomposition(swarm(100, 1), FailingContainer(0, 0, 300, 200), workers=3) as domain:
+            with self.assertRaisesRegex(RuntimeError, "ArithmeticError: right half"):
+                domain.run(5)
+            with self.assertRaisesRegex(RuntimeError, "inconsistent"):
+                domain.run(1)
+
+    def test_narrow_strips(self):
+        balls = BallArray([10, 11, 12, 13], [10, 10, 10, 10], [5, 5, 5, 5], [1, 1, 1, 1], [0, 0, 0, 0])
+        with self.assertRaises(ValueError):
+            DomainDecomposition(balls, Container(0, 0, 100, 100), workers=4, collisions=True)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,54 @@
+import unittest
+
+from ball import Ball, Container
+from events import EventDrivenSimulation
+
+
+class TestEventDrivenSimulation(unittest.TestCase):
+    def test_wall_bounce(self):
+        ball = Ball(50, 50, 5, 10, 0)
+        box = Container(0, 0, 101, 101)
+        simulation = EventDrivenSimulation([ball], box)
+        simulation.run(10)
+        simulation.sync()
+        # 4.5 ticks to reach x = 95, then 5.5 ticks back.
+        self.assertAlmostEqual(ball.x, 40.0)
+        self.assertAlmostEqual(ball.delta_x, -10.0)
+        self.assertEqual(simulation.collisions, 1)
+
+    def test_head_on_collision(self):
+        first, second = Ball(20, 50, 5, 1, 0), Ball(80, 50, 5, 1, 0)
+        second.delta_x = -1.0
+        simulation = EventDrivenSimulation([first, second], Container(0, 0, 1000, 1000))
+        simulation.run(30)
+        simulation.sync()
+        self.assertAlmostEqual(first.x, 40.0)
+        self.assertAlmostEqual(second.x, 60.0)
+        self.assertAlmostEqual(first.delta_x, -1.0)
+        self.assertAlmostEqual(second.delta_x, 1.0)
+
+    def test_balls_stay_inside_and_keep_energy(self):
+        balls = [Ball(10 + 20 * (i % 5), 10 + 20 * (i // 5), 3, 1 + i % 3, i) for i in range(25)]
+        box = Container(0, 0, 100, 100)
+        energy = sum(b.radius ** 2 * (b.delta_x ** 2 + b.delta_y ** 2) for b in balls)
+        simulation = EventDrivenSimulation(balls, box)
+        simulation.run(500)
+        simulation.sync()
+        self.assertGreater(simulation.collisions, 25)
+        for ball in balls:
+            self.assertGreaterEqual(ball.x - ball.radius, box.x1 - 1e-6)
+            self.assertLessEqual(ball.x + ball.radius, box.x2 + 1e-6)
+            self.assertGreaterEqual(ball.y - ball.radius, box.y1 - 1e-6)
+            self.assertLessEqual(ball.y + ball.radius, box.y2 + 1e-6)
+        self.assertAlmostEqual(sum(b.radius ** 2 * (b.delta_x ** 2 + b.delta_y ** 2) for b in balls), energy)
+
+    def test_dense_swarm_never_overlaps(self):
+        for cell_size in (None, 400):
+            balls = [Ball(8 + 14 * (i % 13), 8 + 14 * (i // 13), 3, 1 + i % 4, 7 * i) for i in range(150)]
+            simulation = EventDrivenSimulation(balls, Container(0, 0, 201, 201), cell_size)
+            for _ in range(100):
+                simulation.run(1)
+                simulation.sync()
+                overlap = max(a.radius + b.radius - ((a.x - b.x) ** 2 + (a.y - b.y) ** 2) ** 0.5
+                              for k, a in enumerate(balls) for b in balls[k + 1:])
+                self.assertLess(overlap, 1e-6)
@@ -0,0 +1,84 @@
+import unittest
+from datetime import datetime
+
+import numpy as np
+
+from course import EnrollmentRegistry, Math
+from gradebook import Gradebook, progress_of
+from staff import MathProfessor, Student
+
+
+def students(n):
+    return [Student(i, f"student{i}_name", "address", "phone", "email", "position", "rank", 50,
+                    student_number=i, average_mark=4) for i in range(n)]
+
+
+class TestGradebook(unittest.TestCase):
+    def setUp(self):
+        assignments = {f"task{i}": {'title': f'test{i}', 'description': 'testing...', 'is_done': False, 'mark': 0.0}
+                       for i in range(4)}
+        self.course = Math('math', datetime.now(), datetime.now(), "desc test", [], assignments, limit=10)
+        self.group = students(5)
+        self.course.add_students(self.group, EnrollmentRegistry())
+        for i, student in enumerate(self.group):
+            tasks = progress_of(student, self.course).completed_assignments
+            for j in range(i % 4 + 1):
+                tasks[f"task{j}"]["is_done"] = True
+            MathProfessor.check_assignment(tasks)
+
+    def test_statistics(self):
+        book = Gradebook(self.course)
+        self.assertEqual(book.marks.shape, (5, 4))
+        progresses = [progress_of(student, self.course) for student in self.group]
+        np.testing.assert_allclose(book.final_marks(), [p.get_final_mark() for p in progresses])
+        np.testing.assert_allclose(book.final_marks(done_only=True), 5.0)
+        np.testing.assert_allclose(book.assignment_means(), [5.0, 3.0, 2.0, 1.0])
+        self.assertAlmostEqual(book.mean(), np.mean([p.get_final_mark() for p in progresses]))
+        np.testing.assert_allclose(book.completion(), [0.25, 0.5, 0.75, 1.0, 0.25])
+        np.testing.assert_allclose(book.percentiles([0, 50, 100]), [1.25, 2.5, 5.0])
+        counts, edges = book.histogram(bins=4, range=(0.0, 5.0))
+        self.assertEqual(counts.tolist(), [0, 2, 1, 2])
+        self.assertEqual(book.ranks().tolist(), [4, 3, 2, 1, 4])
+        self.assertEqual([student for student, _ in book.ranking()],
+                         [self.group[3], self.group[2], self.group[1], self.group[0], self.group[4]])
+
+    def test_write_back(self):
+        book = Gradebook(self.course)
+        book.marks[:, 3] = 4.0
+        book.done[:, 3] = True
+        book.write_back()
+        progress = progress_of(self.group[0], self.course)
+        self.assertEqual(progress.completed_assignments["task3"]["mark"], 4.0)
+        self.assertTrue(progress.completed_assignments["task3"]["is_done"])
+        self.assertEqual(progress.get_final_mark(), 2.25)
+        self.assertTrue(progress.check_aggregates())
+        own = progress_of(self.group[1], self.course)
+        own.completed_assignments["extra"] = {'title': 'extra', 'is_done': True, 'mark': 1.0}
+        del own.completed_assignments["task0"]
+        book.sync()
+        self.assertEqual(book.marks[1].tolist(), [0.0, 5.0, 0.0, 4.0])
+        self.assertFalse(book.done[1, 0])
+        book.marks[1, 1] = 3.0
+        book.write_back()
+        self.assertEqual(own.completed_assignments["task1"]["mark"], 3.0)
+        self.assertEqual(own.completed_assignments["extra"]["mark"], 1.0)
+        self.assertTrue(own.check_aggregates())
+
+    def test_final_marks_of_a_template_of_its_own(self):
+        own = progress_of(self.group[2], self.course)
+        own.completed_assignments["extra"] = {'title': 'extra', 'is_done': True, 'mark': 1.5}
+        own.completed_assignments["skipped"] = {'title': 'skipped', 'is_done': False, 'mark': 2.0}
+        del own.completed_assignments["task0"]
+        book = Gradebook(self.course)
+        self.assertEqual(book.present[2].tolist(), [False, True, True, True])
+        # task1, task2 and extra are done with 5, 5 and 1.5, task3 and skipped aren't with 0 and 2.
+        self.assertAlmostEqual(own.get_final_mark(), 13.5 / 5)
+        np.testing.assert_allclose(book.final_marks(), [progress_of(s, self.course).get_final_mark()
+                                                        for s in self.group])
+        self.assertAlmostEqual(book.final_marks(done_only=True)[2], 11.5 / 3)
+        self.assertEqual(book.assignment_means()[0], 5.0)
+        self.assertAlmostEqual(book.completion()[2], 3 / 5)
+
+
+if __name__ == "__main__":
+    unittest.main()
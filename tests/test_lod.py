@@ -0,0 +1,50 @@
+import unittest
+
+import numpy as np
+
+from ball import BallArray, Container, Simulation
+from lod import TrajectoryPyramid, lttb
+
+
+def swarm():
+    rng = np.random.default_rng(3)
+    return BallArray(rng.uniform(10, 90, 6), rng.uniform(10, 90, 6), np.full(6, 2.0), rng.uniform(1, 3, 6),
+                     rng.uniform(0, 2 * np.pi, 6))
+
+
+class TestTrajectoryPyramid(unittest.TestCase):
+    def test_lttb_keeps_spike(self):
+        step = np.arange(100)[:, None]
+        x = np.zeros((100, 1))
+        x[37] = 50.0
+        kept_step, kept_x, kept_y = lttb(step, x, np.zeros((100, 1)), 5)
+        self.assertEqual(len(kept_step), 5)
+        self.assertIn(37, kept_step[:, 0])
+        self.assertEqual((kept_step[0, 0], kept_step[-1, 0]), (0, 99))
+
+    def test_query(self):
+        box = Container(0, 0, 100, 100)
+        reference = Simulation(swarm(), box)
+        reference.run(5000)
+        pyramid = TrajectoryPyramid(6, factor=4)
+        Simulation(swarm(), box, writer=pyramid).run(5000)
+        self.assertEqual(pyramid.n_frames, 5000)
+        self.assertEqual([level.length for level in pyramid.levels[:3]], [1249, 311, 76])
+        for start, stop, k in ((None, None, 50), (1000, 3000, 200), (4990, None, 20), (2500, 2502, 10),
+                               (100, 300, 1000)):
+            step, x, y = pyramid.query(start, stop, k)
+            self.assertLessEqual(len(step), k)
+            self.assertTrue(len(step) > 0)
+            self.assertTrue(np.all(np.diff(step, axis=0) > 0))
+            frames = step - 1
+            np.testing.assert_array_equal(x, np.take_along_axis(reference.trajectory[:, :, 0], frames, axis=0))
+            np.testing.assert_array_equal(y, np.take_along_axis(reference.trajectory[:, :, 1], frames, axis=0))
+            if start is not None:
+                self.assertLess(abs(step[0] - start).max(), 4 ** 4)
+        step, x, y = pyramid.query(100, 300, 1000, balls=[1, 4])
+        self.assertEqual(step.shape[1], 2)
+        self.assertGreater(len(step), 50)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,64 @@
+import json
+import unittest
+from math import pi
+
+import numpy as np
+
+from ball import Ball, Container, Simulation, SpatialHash
+from profiler import Profiler
+
+
+class CountingBall(Ball):
+    def __init__(self, *args):
+        super().__init__(*args)
+        self.calls = {"horizontal": 0, "vertical": 0}
+
+    def reflect_horizontal(self) -> None:
+        self.calls["horizontal"] += 1
+        super().reflect_horizontal()
+
+    def reflect_vertical(self) -> None:
+        self.calls["vertical"] += 1
+        super().reflect_vertical()
+
+
+class TestProfiler(unittest.TestCase):
+    def test_counts_match_scalar_loop(self):
+        box = Container(0, 0, 100, 100)
+        ball = CountingBall(50, 50, 5, 10, 30)
+        for step in range(100):
+            ball.move()
+            box.collides(ball)
+        profiler = Profiler()
+        profiled = Simulation([Ball(50, 50, 5, 10, 30)], box, profiler=profiler)
+        plain = Simulation([Ball(50, 50, 5, 10, 30)], box)
+        self.assertTrue(np.array_equal(profiled.run(100), plain.run(100)))
+        self.assertEqual(profiler.reflections, ball.calls)
+        self.assertEqual(profiler.wall_hits["left"] + profiler.wall_hits["right"], ball.calls["horizontal"])
+        self.assertEqual(profiler.steps, 100)
+        self.assertEqual(profiler.phases["move"].count, 100)
+        self.assertEqual(profiler.phases["record"].count, 100)
+
+    def test_counts_walls_of_continuous_steps(self):
+        box = Container(0, 0, 100, 100)
+        profiler = Profiler()
+        Simulation([Ball(50, 50, 5, 230, 0), Ball(50, 50, 5, 100, 3 * pi / 2),
+                    Ball(50, 50, 5, 150, pi)], box, continuous=True,
+                   profiler=profiler).run(1)
+        self.assertEqual(profiler.wall_hits, {"left": 2, "right": 3, "top": 0, "bottom": 1})
+        self.assertEqual(profiler.reflections, {"horizontal": 5, "vertical": 1})
+        self.assertEqual(profiler.sweep_hits, 6)
+        profiler = Profiler()
+        Simulation([Ball(90, 50, 3, 20, 0), Ball(79, 50, 3, 0, 0)], box, grid=SpatialHash(), continuous=True,
+                   profiler=profiler).run(1)
+        self.assertEqual(profiler.wall_hits, {"left": 0, "right": 1, "top": 0, "bottom": 0})
+        self.assertEqual(profiler.sweep_hits, 3)
+
+    def test_json_report(self):
+        profiler = Profiler()
+        Simulation([Ball(20, 20, 5, 3, 0), Ball(29, 20, 5, 3, 3.14)], Container(0, 0, 100, 100),
+                   grid=SpatialHash(), profiler=profiler).run(10)
+        report = json.loads(profiler.to_json())
+        self.assertEqual(report["ball_collisions"], 1)
+        self.assertEqual(sum(report["phases"]["balls"]["histogram_ns"].values()), 10)
+        self.assertGreater(report["steps_per_second"], 0)
@@ -0,0 +1,31 @@
+import asyncio
+import unittest
+
+from ball import Ball, Container, Simulation
+from realtime import DROP_NEWEST, RealtimeDriver
+
+
+class TestRealtimeDriver(unittest.TestCase):
+    def test_slow_subscribers_never_stall_the_loop(self):
+        driver = RealtimeDriver(Simulation([Ball(50, 50, 5, 10, 30)], Container(0, 0, 100, 100)), tick_rate=500)
+        fast = driver.subscribe()
+        latest = driver.subscribe(maxsize=1)
+        stalled = driver.subscribe(maxsize=2, policy=DROP_NEWEST)
+
+        async def consume():
+            return [frame.step async for frame in fast]
+
+        async def main():
+            consumer = asyncio.ensure_future(consume())
+            await driver.run(ticks=20)
+            return await consumer
+
+        steps = asyncio.run(main())
+        self.assertEqual(steps, list(range(1, 21)))
+        self.assertEqual(driver.simulation.step_count, 20)
+        self.assertEqual([frame.step for frame in latest.frames], [20])
+        self.assertEqual([frame.step for frame in stalled.frames], [1, 2])
+        metrics = driver.metrics()
+        self.assertEqual(metrics["ticks"], 20)
+        self.assertEqual(metrics["dropped_frames"], 19 + 18)
+        self.assertGreaterEqual(metrics["jitter_max"], metrics["jitter_mean"])
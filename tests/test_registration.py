@@ -0,0 +1,65 @@
+import asyncio
+import unittest
+from datetime import datetime
+
+from course import Enrollment, EnrollmentRegistry, Math
+from registration import ALREADY_ENROLLED, ENROLLED, FULL, NOT_ENROLLED, UNENROLLED, EnrollmentService
+from staff import Student
+
+
+def students(n):
+    return [Student(i, f"student{i}_name", "address", "phone", "email", "position", "rank", 50,
+                    student_number=i, average_mark=4) for i in range(n)]
+
+
+class TestEnrollmentService(unittest.TestCase):
+    def test_matches_synchronous_path(self):
+        group = students(6)
+        calls = [("enroll", 0), ("enroll", 1), ("enroll", 0), ("unenroll", 1), ("unenroll", 5), ("enroll", 2),
+                 ("enroll", 3), ("enroll", 4), ("enroll", 5), ("unenroll", 0), ("enroll", 5)]
+        sync_registry = EnrollmentRegistry()
+        sync_course = Math('math', datetime.now(), datetime.now(), "desc test", [], [], limit=3)
+        for kind, i in calls:
+            enrollment = Enrollment(group[i], sync_course, sync_registry)
+            enrollment.enroll() if kind == "enroll" else enrollment.unenroll(i)
+        group_copy = students(6)
+        course = Math('math', datetime.now(), datetime.now(), "desc test", [], [], limit=3)
+        service = EnrollmentService(EnrollmentRegistry())
+
+        async def main():
+            futures = [(service.enroll if kind == "enroll" else service.unenroll)(group_copy[i], course)
+                       for kind, i in calls]
+            self.assertEqual(service.metrics()["queue_depth"], len(calls))
+            return await asyncio.gather(*futures)
+
+        statuses = asyncio.run(main())
+        self.assertEqual(statuses, [ENROLLED, ENROLLED, ALREADY_ENROLLED, UNENROLLED, NOT_ENROLLED, ENROLLED,
+                                    ENROLLED, FULL, FULL, UNENROLLED, ENROLLED])
+        self.assertEqual([s.personal_info.id_ for s in course.students],
+                         [s.personal_info.id_ for s in sync_course.students])
+        metrics = service.metrics()
+        self.assertEqual((metrics["requests"], metrics["batches"], metrics["queue_depth"]), (11, 1, 0))
+        self.assertGreaterEqual(metrics["latency_p99"], metrics["latency_p50"])
+
+    def test_batches_per_course_and_skips_cancelled(self):
+        group = students(4)
+        first = Math('first', datetime.now(), datetime.now(), "desc test", [], [], limit=4)
+        second = Math('second', datetime.now(), datetime.now(), "desc test", [], [], limit=4)
+        service = EnrollmentService(EnrollmentRegistry())
+
+        async def main():
+            cancelled = service.enroll(group[0], first)
+            cancelled.cancel()
+            futures = [service.enroll(student, course) for student in group[1:] for course in (first, second)]
+            results = await asyncio.gather(*futures)
+            await asyncio.sleep(0)
+            results.append(await service.enroll(group[0], second))
+            return results
+
+        self.assertEqual(asyncio.run(main()), [ENROLLED] * 7)
+        self.assertEqual(first.students, group[1:])
+        self.assertEqual(service.batches, 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
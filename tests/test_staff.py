@@ -106,10 +106,13 @@ class TestStaff(unittest.TestCase):
         math_course = professor.create_course("title", datetime.now(), datetime.now() + timedelta(hours=600),
                                               "description",
                                               [], [], 2)
-        professor.fill_course(group)
+        result = professor.fill_course(group)
         self.assertEqual(student1.courses, [math_course])
         self.assertEqual(student2.courses, [math_course])
         self.assertEqual(student3.courses, [])
+        self.assertEqual(result.enrolled, [student1, student2])
+        self.assertEqual(result.rejected_full, [student3])
+        self.assertEqual(professor.fill_course(group).already_enrolled, [student1, student2])
 
     def test_define_control_works_date(self):
         professor = MathProfessor(7, "name_surname", "address2", "phone_number2", "email2", "position2", "rank2", 1000)
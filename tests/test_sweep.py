@@ -0,0 +1,55 @@
+import unittest
+
+import numpy as np
+
+from ball import Ball, Container
+from sweep import run_chunk, sweep
+
+
+class CountingBall(Ball):
+    def __init__(self, *args):
+        super().__init__(*args)
+        self.horizontal = self.vertical = 0
+
+    def reflect_horizontal(self) -> None:
+        self.horizontal += 1
+        super().reflect_horizontal()
+
+    def reflect_vertical(self) -> None:
+        self.vertical += 1
+        super().reflect_vertical()
+
+
+class TestSweep(unittest.TestCase):
+    def test_sweep_matches_loop(self):
+        ball = {"x": [30, 50], "y": [50], "radius": [5], "velocity": [4, 10], "direction": [0.5, 30]}
+        container = {"x": [0], "y": [0], "width": [100, 150], "height": [100]}
+        updates = []
+        result = sweep(ball, container, 200, workers=2, chunk_size=3, callback=lambda r: updates.append(r.completed))
+        self.assertEqual(result.completed, 16)
+        self.assertEqual(updates[-1], 16)
+        for i, config in enumerate(result.configs):
+            subject, box = CountingBall(*config[:5]), Container(*config[5:])
+            for step in range(200):
+                subject.move()
+                box.collides(subject)
+            self.assertEqual(result.horizontal[i], subject.horizontal)
+            self.assertEqual(result.vertical[i], subject.vertical)
+            self.assertEqual(list(result.final[i]), [subject.x, subject.y, subject.delta_x, subject.delta_y])
+            self.assertEqual(result.occupancy[i].sum(), 200)
+
+    def test_counts_by_hand(self):
+        # x visits 5, 7, 9 (turns), 7, 5, 3, 1 (turns) in a box spanning 0..10, y stays at 5
+        # and its zero velocity is reflected at every other step.
+        horizontal, vertical, occupancy, final = run_chunk(np.array([[3, 5, 1, 2, 0, 0, 0, 11, 11]], dtype=float),
+                                                           7, 2)
+        self.assertEqual((horizontal[0], vertical[0]), (2, 5))
+        self.assertEqual(list(occupancy[0]), [0, 0, 2, 5])
+        self.assertEqual(list(final[0, :3]), [1, 5, 2])
+
+    def test_default_chunks_use_every_worker(self):
+        updates = []
+        sweep({"x": [30, 50], "y": [50], "radius": [5], "velocity": [4, 10], "direction": [0.5, 30]},
+              {"x": [0], "y": [0], "width": [100, 150], "height": [100]}, 10, workers=4,
+              callback=lambda r: updates.append(r.completed))
+        self.assertEqual(updates, [4, 8, 12, 16])
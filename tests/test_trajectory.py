@@ -0,0 +1,46 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from ball import BallArray, Container, Simulation
+from trajectory import TrajectoryReader, TrajectoryWriter
+
+
+class TestTrajectory(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "run.trj")
+
+    def swarm(self):
+        return BallArray([20, 40, 60], [30, 50, 70], [5, 5, 5], [3, 4, 5], [0.3, 1.2, 2.5])
+
+    def test_write_and_read(self):
+        expected = Simulation(self.swarm(), Container(0, 0, 100, 100), stride=2).run(25)
+        with TrajectoryWriter(self.path, 3, chunk_frames=5) as writer:
+            Simulation(self.swarm(), Container(0, 0, 100, 100), stride=2, writer=writer).run(25)
+        reader = TrajectoryReader(self.path)
+        self.assertEqual(len(reader), 12)
+        self.assertEqual(list(reader.steps), list(range(2, 26, 2)))
+        self.assertEqual(os.path.getsize(self.path), 64 + 12 * 3 * 48)
+        self.assertTrue(np.array_equal(reader.records["x"], expected[:, :, 0]))
+        self.assertTrue(np.array_equal(reader.records["delta_y"], expected[:, :, 3]))
+        self.assertEqual(list(reader.records["ball_id"][4]), [0, 1, 2])
+
+    def test_read_range_is_a_view(self):
+        with TrajectoryWriter(self.path, 3) as writer:
+            Simulation(self.swarm(), Container(0, 0, 100, 100), writer=writer).run(10)
+        reader = TrajectoryReader(self.path)
+        window = reader.read(4, 8, slice(1, 3))
+        self.assertEqual(window.shape, (4, 2))
+        self.assertEqual(list(window["step"][:, 0]), [4, 5, 6, 7])
+        self.assertEqual(list(window["ball_id"][0]), [1, 2])
+        self.assertTrue(np.shares_memory(window, reader.records))
+
+    def test_rejects_other_files(self):
+        with open(self.path, "wb") as file:
+            file.write(b"not a trajectory" * 8)
+        with self.assertRaises(ValueError):
+            TrajectoryReader(self.path)
@@ -0,0 +1,42 @@
+import unittest
+
+import numpy as np
+
+from ball import Ball, BallArray, Container
+from world import BoundingVolumeHierarchy, Obstacle, World
+
+
+class TestWorld(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(7)
+        self.obstacles = [Obstacle(int(x), int(y), 8, 8) for x, y in rng.integers(0, 480, (200, 2))
+                          if not 200 <= x <= 300 or not 200 <= y <= 300]
+        self.inner = Container(220, 220, 60, 60)
+        self.world = World(Container(0, 0, 500, 500), self.obstacles, [self.inner])
+        free = [(x, y) for x, y in rng.uniform(10, 490, (400, 2))
+                if not self.world.tree.query(x - 3, y - 3, x + 3, y + 3)]
+        self.balls = [Ball(x, y, 2, 3, d) for (x, y), d in zip(free[:60], rng.uniform(0, 6.28, 60))]
+        self.balls.append(Ball(250, 250, 2, 3, 1.0))
+
+    def test_query_matches_brute_force(self):
+        tree = BoundingVolumeHierarchy([(o.x1, o.y1, o.x2, o.y2) for o in self.obstacles], leaf_size=2)
+        for x, y in ((10, 10), (250, 250), (100, 400), (480, 30)):
+            expected = [i for i, o in enumerate(self.obstacles)
+                        if not (o.x1 > x + 20 or o.x2 < x or o.y1 > y + 20 or o.y2 < y)]
+            self.assertEqual(sorted(tree.query(x, y, x + 20, y + 20)), expected)
+
+    def test_balls_stay_out_of_obstacles(self):
+        swarm = BallArray.from_balls(self.balls)
+        for step in range(300):
+            for ball in self.balls:
+                ball.move()
+                self.world.collides(ball)
+            self.world.collide_all(swarm)
+        for i, ball in enumerate(self.balls):
+            self.assertAlmostEqual(ball.x, swarm.x[i])
+            self.assertAlmostEqual(ball.y, swarm.y[i])
+            for o in self.obstacles:
+                self.assertFalse(o.x1 < ball.x < o.x2 and o.y1 < ball.y < o.y2)
+        last = self.balls[-1]
+        self.assertTrue(self.inner.x1 <= last.x - last.radius and last.x + last.radius <= self.inner.x2)
+        self.assertTrue(self.inner.y1 <= last.y - last.radius and last.y + last.radius <= self.inner.y2)
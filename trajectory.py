@@ -0,0 +1,156 @@
+from typing import Optional
+
+import numpy as np
+
+from ball import BallArray
+
+RECORD = np.dtype([("step", "<i8"), ("ball_id", "<i8"), ("x", "<f8"), ("y", "<f8"),
+                   ("delta_x", "<f8"), ("delta_y", "<f8")])
+HEADER = np.dtype([("magic", "S8"), ("version", "<i8"), ("n_balls", "<i8"), ("n_frames", "<i8"),
+                   ("reserved", "<i8", 4)])
+MAGIC = b"BALLTRJ1"
+VERSION = 1
+
+
+class TrajectoryWriter:
+    """Streams simulation frames into a fixed-layout memory-mapped file.
+
+        The file holds a header followed by frames of ``n_balls`` records each, a record
+        being (step, ball_id, x, y, delta_x, delta_y). The file grows by ``chunk_frames``
+        frames at a time and only the chunk being written is mapped.
+
+        Attributes:
+            path (str): Path of the trajectory file.
+            n_balls (int): Number of balls in every frame.
+            chunk_frames (int): Number of frames the file grows by.
+            n_frames (int): Number of frames written so far.
+    """
+
+    def __init__(self, path: str, n_balls: int, chunk_frames: int = 1024):
+        """TrajectoryWriter initializer, truncates an existing file."""
+        if chunk_frames < 1:
+            raise ValueError("The chunk must hold at least one frame")
+        self.path = path
+        self.n_balls = n_balls
+        self.chunk_frames = chunk_frames
+        self.n_frames = 0
+        self._ids = np.arange(n_balls, dtype=np.int64)
+        self._chunk: Optional[np.memmap] = None
+        self._chunk_start = 0
+        with open(path, "wb") as file:
+            file.write(self._header().tobytes())
+
+    def _header(self) -> np.ndarray:
+        header = np.zeros((), dtype=HEADER)
+        header["magic"] = MAGIC
+        header["version"] = VERSION
+        header["n_balls"] = self.n_balls
+        header["n_frames"] = self.n_frames
+        return header
+
+    def _map_chunk(self) -> None:
+        if self._chunk is not None:
+            self._chunk.flush()
+        self._chunk_start = self.n_frames
+        frame_bytes = self.n_balls * RECORD.itemsize
+        with open(self.path, "r+b") as file:
+            file.truncate(HEADER.itemsize + (self.n_frames + self.chunk_frames) * frame_bytes)
+        self._chunk = np.memmap(self.path, dtype=RECORD, mode="r+",
+                                offset=HEADER.itemsize + self.n_frames * frame_bytes,
+                                shape=(self.chunk_frames, self.n_balls))
+
+    def write(self, step: int, balls: BallArray) -> None:
+        """Appends the current state of the swarm as one frame.
+
+            Args:
+                step (int): Step number of the frame.
+                balls (BallArray): Swarm of ``n_balls`` balls.
+
+            Returns:
+                None.
+        """
+        if len(balls) != self.n_balls:
+            raise ValueError(f"Expected {self.n_balls} balls, got {len(balls)}")
+        if self._chunk is None or self.n_frames - self._chunk_start == self.chunk_frames:
+            self._map_chunk()
+        frame = self._chunk[self.n_frames - self._chunk_start]
+        frame["step"] = step
+        frame["ball_id"] = self._ids
+        frame["x"] = balls.x
+        frame["y"] = balls.y
+        frame["delta_x"] = balls.delta_x
+        frame["delta_y"] = balls.delta_y
+        self.n_frames += 1
+
+    def close(self) -> None:
+        """Flushes the last chunk, trims the unused space and stores the frame count."""
+        if self._chunk is not None:
+            self._chunk.flush()
+            self._chunk = None
+        with open(self.path, "r+b") as file:
+            file.truncate(HEADER.itemsize + self.n_frames * self.n_balls * RECORD.itemsize)
+            file.seek(0)
+            file.write(self._header().tobytes())
+
+    def __enter__(self) -> "TrajectoryWriter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+class TrajectoryReader:
+    """Random access to a trajectory file written by TrajectoryWriter.
+
+        The records are memory-mapped, not loaded: slicing a range of frames or balls
+        returns views into the file, only lists of indices make copies.
+
+        Attributes:
+            path (str): Path of the trajectory file.
+            n_balls (int): Number of balls in every frame.
+            records (np.memmap): Records, shaped (frames, balls).
+    """
+
+    def __init__(self, path: str):
+        """TrajectoryReader initializer."""
+        self.path = path
+        header = np.fromfile(path, dtype=HEADER, count=1)
+        if len(header) == 0 or header[0]["magic"] != MAGIC:
+            raise ValueError(f"{path} is not a trajectory file")
+        if header[0]["version"] != VERSION:
+            raise ValueError(f"Unsupported trajectory version {header[0]['version']}")
+        self.n_balls = int(header[0]["n_balls"])
+        n_frames = int(header[0]["n_frames"])
+        if n_frames == 0 or self.n_balls == 0:
+            self.records = np.empty((n_frames, self.n_balls), dtype=RECORD)
+        else:
+            self.records = np.memmap(path, dtype=RECORD, mode="r", offset=HEADER.itemsize,
+                                     shape=(n_frames, self.n_balls))
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    @property
+    def steps(self) -> np.ndarray:
+        """Step numbers of the frames."""
+        return self.records["step"][:, 0] if self.n_balls else np.empty(0, dtype=np.int64)
+
+    def read(self, start: Optional[int] = None, stop: Optional[int] = None, balls=slice(None)) -> np.ndarray:
+        """Returns the records of the frames with ``start <= step < stop``.
+
+            Args:
+                start (int): First step, defaults to the beginning of the trajectory.
+                stop (int): Step to stop before, defaults to the end of the trajectory.
+                balls: Ball ids, a slice gives a view, an index array gives a copy.
+
+            Returns:
+                Records, shaped (frames, balls).
+        """
+        steps = self.steps
+        first = 0 if start is None else int(np.searchsorted(steps, start, side="left"))
+        last = len(steps) if stop is None else int(np.searchsorted(steps, stop, side="left"))
+        return self.records[first:last, balls]
+
+    def __getitem__(self, key) -> np.ndarray:
+        return self.records[key]
+
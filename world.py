@@ -0,0 +1,219 @@
+from typing import List, Sequence, Tuple
+
+import numpy as np
+
+from ball import Ball, BallArray, Container
+
+
+class Obstacle:
+    """Solid axis-aligned box, the balls bounce off it from the outside.
+
+        Attributes:
+            x1, y1 (int): Top left corner.
+            x2, y2 (int): Bottom right corner, inclusive as in Container.
+            width, height (int): Size of the box.
+    """
+
+    def __init__(self, x: int, y: int, width: int, height: int):
+        """Obstacle initializer."""
+        self.x1 = x
+        self.y1 = y
+        self.width = width
+        self.height = height
+        self.x2 = self.x1 + self.width - 1
+        self.y2 = self.y1 + self.height - 1
+
+    def __str__(self) -> str:
+        return f"Obstacle[({self.x1},{self.y1}),({self.x2}, {self.y2})]"
+
+
+class BoundingVolumeHierarchy:
+    """Static binary tree of axis-aligned boxes for overlap queries.
+
+        Boxes are split at the median of their centres along the longer side of the
+        node, until at most ``leaf_size`` boxes are left. Nodes are stored as arrays,
+        so many queries can descend the tree together.
+
+        Attributes:
+            bounds (np.ndarray): Boxes, shaped (n, 4) as x1, y1, x2, y2.
+            order (np.ndarray): Box indices, grouped by leaf.
+            node_bounds (np.ndarray): Bounds of every node, shaped (nodes, 4).
+            left, right (np.ndarray): Children of every node, -1 for leaves.
+            start, count (np.ndarray): Boxes of every leaf, as a range of ``order``.
+    """
+
+    def __init__(self, bounds: np.ndarray, leaf_size: int = 4):
+        """BoundingVolumeHierarchy initializer."""
+        self.bounds = np.asarray(bounds, dtype=np.float64).reshape(-1, 4)
+        self.order = np.arange(len(self.bounds))
+        centres = np.stack([self.bounds[:, 0] + self.bounds[:, 2], self.bounds[:, 1] + self.bounds[:, 3]], axis=1)
+        node_bounds, left, right, start, count = [], [], [], [], []
+        stack = [(0, len(self.bounds), -1, False)]
+        while stack:
+            first, last, parent, is_right = stack.pop()
+            node = len(node_bounds)
+            if parent >= 0:
+                (right if is_right else left)[parent] = node
+            boxes = self.bounds[self.order[first:last]]
+            if len(boxes):
+                node_bounds.append((boxes[:, 0].min(), boxes[:, 1].min(), boxes[:, 2].max(), boxes[:, 3].max()))
+            else:
+                node_bounds.append((np.inf, np.inf, -np.inf, -np.inf))
+            left.append(-1)
+            right.append(-1)
+            start.append(first)
+            count.append(last - first)
+            if last - first > leaf_size:
+                extent = node_bounds[-1]
+                axis = 0 if extent[2] - extent[0] >= extent[3] - extent[1] else 1
+                middle = (first + last) // 2
+                part = self.order[first:last]
+                self.order[first:last] = part[np.argpartition(centres[part, axis], middle - first)]
+                stack.append((middle, last, node, True))
+                stack.append((first, middle, node, False))
+        self.node_bounds = np.array(node_bounds, dtype=np.float64).reshape(-1, 4)
+        self.left = np.array(left, dtype=np.int64)
+        self.right = np.array(right, dtype=np.int64)
+        self.start = np.array(start, dtype=np.int64)
+        self.count = np.array(count, dtype=np.int64)
+
+    def query(self, x1: float, y1: float, x2: float, y2: float) -> List[int]:
+        """Returns the indices of the boxes overlapping the given one."""
+        found = []
+        stack = [0]
+        while stack:
+            node = stack.pop()
+            lo_x, lo_y, hi_x, hi_y = self.node_bounds[node]
+            if lo_x > x2 or hi_x < x1 or lo_y > y2 or hi_y < y1:
+                continue
+            if self.left[node] >= 0:
+                stack.append(self.left[node])
+                stack.append(self.right[node])
+                continue
+            for i in self.order[self.start[node]:self.start[node] + self.count[node]]:
+                bx1, by1, bx2, by2 = self.bounds[i]
+                if not (bx1 > x2 or bx2 < x1 or by1 > y2 or by2 < y1):
+                    found.append(int(i))
+        return found
+
+    def query_all(self, x1: np.ndarray, y1: np.ndarray, x2: np.ndarray,
+                  y2: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Batched ``query``, descending the tree one level at a time for all boxes.
+
+            Returns:
+                Pairs of query and box indices, which overlap.
+        """
+        queries = np.arange(len(x1))
+        nodes = np.zeros(len(x1), dtype=np.int64)
+        found_queries, found_boxes = [], []
+        while len(queries):
+            bounds = self.node_bounds[nodes]
+            hit = ~((bounds[:, 0] > x2[queries]) | (bounds[:, 2] < x1[queries])
+                    | (bounds[:, 1] > y2[queries]) | (bounds[:, 3] < y1[queries]))
+            queries, nodes = queries[hit], nodes[hit]
+            leaf = self.left[nodes] < 0
+            leaf_queries, leaf_nodes = queries[leaf], nodes[leaf]
+            sizes = self.count[leaf_nodes]
+            pairs = np.repeat(leaf_queries, sizes)
+            local = np.arange(int(sizes.sum())) - np.repeat(np.cumsum(sizes) - sizes, sizes)
+            boxes = self.order[np.repeat(self.start[leaf_nodes], sizes) + local]
+            bounds = self.bounds[boxes]
+            hit = ~((bounds[:, 0] > x2[pairs]) | (bounds[:, 2] < x1[pairs])
+                    | (bounds[:, 1] > y2[pairs]) | (bounds[:, 3] < y1[pairs]))
+            found_queries.append(pairs[hit])
+            found_boxes.append(boxes[hit])
+            inner = nodes[~leaf]
+            queries = np.concatenate([queries[~leaf], queries[~leaf]])
+            nodes = np.concatenate([self.left[inner], self.right[inner]])
+        return np.concatenate(found_queries), np.concatenate(found_boxes)
+
+
+def _hits(x1, y1, x2, y2, keep_in, x, y, radius, delta_x, delta_y):
+    """Returns whether the next move of the ball calls for a horizontal and a vertical reflection.
+
+        A box, the ball is inside of, keeps it in, reflecting it off every wall its next
+        move crosses, any other box keeps it out. Works on scalars and on arrays of balls and boxes alike.
+    """
+    inside = keep_in & (x - radius >= x1) & (x + radius <= x2) & (y - radius >= y1) & (y + radius <= y2)
+    next_x, next_y = x + delta_x, y + delta_y
+    wall_x = (next_x + radius > x2) | (next_x - radius < x1)
+    wall_y = (next_y + radius > y2) | (next_y - radius < y1)
+    across_x = (next_x + radius >= x1) & (next_x - radius <= x2)
+    across_y = (next_y + radius >= y1) & (next_y - radius <= y2)
+    now_x = (x + radius >= x1) & (x - radius <= x2)
+    now_y = (y + radius >= y1) & (y - radius <= y2)
+    enters = across_x & across_y
+    horizontal = enters & now_y
+    vertical = enters & now_x
+    corner = enters & np.logical_not(horizontal | vertical)
+    return (np.where(inside, wall_x, horizontal | corner),
+            np.where(inside, wall_y, vertical | corner))
+
+
+class World:
+    """Container with many obstacles and nested containers, indexed by a BVH.
+
+        Every ball only tests the boxes, which its next move can reach.
+
+        Attributes:
+            bounds (Container): Outer container.
+            boxes (List[Any]): Obstacles and nested containers.
+            tree (BoundingVolumeHierarchy): Index of ``boxes``.
+    """
+
+    def __init__(self, bounds: Container, obstacles: Sequence[Obstacle] = (),
+                 containers: Sequence[Container] = ()):
+        """World initializer."""
+        self.bounds = bounds
+        self.boxes = list(obstacles) + list(containers)
+        self._box = np.array([(b.x1, b.y1, b.x2, b.y2) for b in self.boxes], dtype=np.float64).reshape(-1, 4)
+        self._keep_in = np.array([isinstance(b, Container) for b in self.boxes], dtype=bool)
+        self.tree = BoundingVolumeHierarchy(self._box)
+
+    def collides(self, ball: Ball) -> bool:
+        """Reflects the ball off every wall, its next move would cross.
+
+            Args:
+                ball (Ball): Ball, which should be checked.
+
+            Returns:
+                True, if the ball has been reflected, and false, if not.
+        """
+        x, y, r, dx, dy = ball.x, ball.y, ball.radius, ball.delta_x, ball.delta_y
+        box = self.bounds
+        horizontal = x + r + dx > box.x2 or x - r + dx < box.x1
+        vertical = y + r + dy > box.y2 or y - r + dy < box.y1
+        for i in self.tree.query(min(x, x + dx) - r, min(y, y + dy) - r, max(x, x + dx) + r, max(y, y + dy) + r):
+            hit_x, hit_y = _hits(*self._box[i], self._keep_in[i], x, y, r, dx, dy)
+            horizontal = horizontal or bool(hit_x)
+            vertical = vertical or bool(hit_y)
+        if horizontal:
+            ball.reflect_horizontal()
+        if vertical:
+            ball.reflect_vertical()
+        return horizontal or vertical
+
+    def collide_all(self, balls: BallArray) -> np.ndarray:
+        """Moves every ball of the swarm and reflects it, equivalent to ``move`` and ``collides``.
+
+            Args:
+                balls (BallArray): Swarm, which should be stepped.
+
+            Returns:
+                Boolean mask of the balls, which have been reflected.
+        """
+        balls.move()
+        x, y, r, dx, dy = balls.x, balls.y, balls.radius, balls.delta_x, balls.delta_y
+        box = self.bounds
+        horizontal = (x + r + dx > box.x2) | (x - r + dx < box.x1)
+        vertical = (y + r + dy > box.y2) | (y - r + dy < box.y1)
+        i, j = self.tree.query_all(np.minimum(x, x + dx) - r, np.minimum(y, y + dy) - r,
+                                   np.maximum(x, x + dx) + r, np.maximum(y, y + dy) + r)
+        bounds = self._box[j]
+        hit_x, hit_y = _hits(bounds[:, 0], bounds[:, 1], bounds[:, 2], bounds[:, 3], self._keep_in[j],
+                             x[i], y[i], r[i], dx[i], dy[i])
+        horizontal[i[hit_x]] = True
+        vertical[i[hit_y]] = True
+        balls.reflect_horizontal(horizontal)
+        balls.reflect_vertical(vertical)
+        return horizontal | vertical